@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import EmailLog, EmailAttachment
+from .models import EmailLog, EmailAttachment, RollupState, SlaBreach, SlaTarget
 
 
 @admin.register(EmailLog)
@@ -9,3 +9,20 @@ class EmailLogAdmin(admin.ModelAdmin):
     search_fields = ['recipient_email', 'subject']
     readonly_fields = ['sent_at']
 
+
+@admin.register(RollupState)
+class RollupStateAdmin(admin.ModelAdmin):
+    list_display = ['name', 'refreshed_through', 'updated_at']
+
+
+@admin.register(SlaTarget)
+class SlaTargetAdmin(admin.ModelAdmin):
+    list_display = ['company', 'status', 'hours']
+    list_filter = ['status']
+
+
+@admin.register(SlaBreach)
+class SlaBreachAdmin(admin.ModelAdmin):
+    list_display = ['permit', 'status', 'target_hours', 'breached_at', 'detected_at']
+    list_filter = ['status']
+    readonly_fields = ['detected_at']
@@ -0,0 +1,359 @@
+"""
+Automatic assignment of submitted permits.
+
+Each process keeps every employee's open workload in memory: the number of
+pending and in-progress permits assigned to them, and a score that weighs
+each permit by how much work it is (``weight()``). A policy picks the
+employee for a new submission from that state:
+
+``least_loaded``
+    Lowest score, then fewest open permits. A heap with lazy deletion, so
+    an assignment is O(log n) in the number of employees.
+``round_robin``
+    Strict rotation, ignoring load.
+``state_specialty``
+    Least loaded among the employees who have handled the permit's states
+    most often over the last SPECIALTY_DAYS, falling back to least loaded.
+    One heap per state, so also O(log n).
+
+The policy is settings.AUTO_ASSIGN_POLICY (a name above or the dotted path
+of a Policy subclass). It is empty by default, leaving new submissions to
+the claim-next work queue; with a policy set, submissions never reach that
+queue because it only offers unassigned permits. The workload is
+loaded from the database on first use and reloaded every
+settings.AUTO_ASSIGN_REFRESH_SECONDS, which picks up permits completed or
+reassigned elsewhere, and assignments made by other processes.
+
+    employee = auto_assign(permit)   # after the permit and its states are saved
+
+``manage.py simulate_assignment`` replays past submissions through each
+policy.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from permits.compliance import OVERWEIGHT, Violation
+from permits.models import PermitRequest, PermitState
+
+OPEN_STATUSES = [PermitRequest.Status.PENDING, PermitRequest.Status.IN_PROGRESS]
+
+# Work per permit, on top of 1 for the permit itself
+FLAG_WEIGHTS = {
+    OVERWEIGHT: 1.0,
+    Violation.OVERSIZE: 0.5,
+    Violation.ESCORT: 1.0,
+    Violation.SUPERLOAD: 2.0,
+}
+STATE_WEIGHT = 0.25  # per state after the first
+
+# An employee specialises in the states they handled most over this window
+SPECIALTY_DAYS = 180
+SPECIALTY_STATES = 3
+SPECIALTY_MIN_PERMITS = 3
+
+
+def weight(flags, state_count):
+    """Relative amount of work in a permit with these compliance flags and states."""
+    score = 1.0 + STATE_WEIGHT * max(state_count - 1, 0)
+    for mask, extra in FLAG_WEIGHTS.items():
+        if flags & mask:
+            score += extra
+    return score
+
+
+@dataclass(frozen=True)
+class Work:
+    """What the policies need to know about a permit."""
+    weight: float
+    states: frozenset = frozenset()
+
+    @classmethod
+    def of(cls, permit):
+        states = permit.states_list
+        return cls(weight(permit.compliance_flags, len(states)), frozenset(states))
+
+
+@dataclass
+class Load:
+    employee_id: int
+    name: str = ''
+    open: int = 0
+    score: float = 0.0
+    specialties: frozenset = frozenset()
+    # Changes on every update; heap entries with an older stamp are stale
+    stamp: int = 0
+
+    def key(self):
+        return (self.score, self.open, self.stamp, self.employee_id)
+
+
+class Policy:
+    """Chooses an employee for a permit.
+
+    ``pick()`` returns one of the loads (or None); the assigner calls
+    ``update()`` after any load changes and ``remove()`` when an employee
+    leaves.
+    """
+
+    def __init__(self, loads):
+        self.loads = loads
+
+    def pick(self, work):
+        raise NotImplementedError
+
+    def update(self, load):
+        pass
+
+    def remove(self, employee_id):
+        pass
+
+
+class LoadHeap:
+    """Min-heap of loads by Load.key(), with stale entries skipped lazily."""
+
+    def __init__(self, loads, members=None):
+        self.loads = loads
+        self.members = set(loads if members is None else members)
+        self.entries = [loads[e].key() for e in self.members]
+        heapq.heapify(self.entries)
+
+    def push(self, load):
+        self.members.add(load.employee_id)
+        heapq.heappush(self.entries, load.key())
+        if len(self.entries) > 2 * len(self.members) + 64:
+            self.entries = [self.loads[e].key() for e in self.members if e in self.loads]
+            heapq.heapify(self.entries)
+
+    def discard(self, employee_id):
+        self.members.discard(employee_id)
+
+    def top(self):
+        while self.entries:
+            *_, stamp, employee_id = self.entries[0]
+            load = self.loads.get(employee_id)
+            if load is not None and load.stamp == stamp and employee_id in self.members:
+                return load
+            heapq.heappop(self.entries)
+        return None
+
+
+class LeastLoaded(Policy):
+
+    def __init__(self, loads):
+        super().__init__(loads)
+        self.heap = LoadHeap(loads)
+
+    def pick(self, work):
+        return self.heap.top()
+
+    def update(self, load):
+        self.heap.push(load)
+
+    def remove(self, employee_id):
+        self.heap.discard(employee_id)
+
+
+class RoundRobin(Policy):
+
+    def __init__(self, loads):
+        super().__init__(loads)
+        self.order = deque(sorted(loads))
+
+    def pick(self, work):
+        while self.order:
+            employee_id = self.order[0]
+            self.order.rotate(-1)
+            if employee_id in self.loads:
+                return self.loads[employee_id]
+        return None
+
+    def update(self, load):
+        if load.employee_id not in self.order:
+            self.order.append(load.employee_id)
+
+    def remove(self, employee_id):
+        if employee_id in self.order:
+            self.order.remove(employee_id)
+
+
+class StateSpecialty(LeastLoaded):
+
+    def __init__(self, loads):
+        super().__init__(loads)
+        members = defaultdict(list)
+        for load in loads.values():
+            for state in load.specialties:
+                members[state].append(load.employee_id)
+        self.by_state = {state: LoadHeap(loads, ids) for state, ids in members.items()}
+
+    def pick(self, work):
+        specialists = [self.by_state[s].top() for s in work.states if s in self.by_state]
+        specialists = [load for load in specialists if load is not None]
+        if specialists:
+            return min(specialists, key=Load.key)
+        return super().pick(work)
+
+    def update(self, load):
+        super().update(load)
+        for state in load.specialties:
+            self.by_state.setdefault(state, LoadHeap(self.loads, [])).push(load)
+
+    def remove(self, employee_id):
+        super().remove(employee_id)
+        for heap in self.by_state.values():
+            heap.discard(employee_id)
+
+
+POLICIES = {
+    'least_loaded': LeastLoaded,
+    'round_robin': RoundRobin,
+    'state_specialty': StateSpecialty,
+}
+
+
+def policy_class(name):
+    return POLICIES.get(name) or import_string(name)
+
+
+class Assigner:
+    """Employee workloads plus a policy; no database access."""
+
+    def __init__(self, policy, loads):
+        self._stamps = itertools.count(1)
+        self.loads = {load.employee_id: load for load in loads}
+        for load in self.loads.values():
+            load.stamp = next(self._stamps)
+        self.policy = policy_class(policy)(self.loads)
+
+    def _change(self, load, open_delta, score_delta):
+        load.open = max(load.open + open_delta, 0)
+        load.score = max(load.score + score_delta, 0.0)
+        load.stamp = next(self._stamps)
+        self.policy.update(load)
+
+    def assign(self, work):
+        """Pick an employee for ``work`` and count it against them; None if nobody is available."""
+        load = self.policy.pick(work)
+        if load is not None:
+            self._change(load, 1, work.weight)
+        return load
+
+    def release(self, employee_id, work):
+        """``work`` assigned to the employee was finished, reassigned or not saved."""
+        load = self.loads.get(employee_id)
+        if load is not None:
+            self._change(load, -1, -work.weight)
+
+    def add(self, load):
+        load.stamp = next(self._stamps)
+        self.loads[load.employee_id] = load
+        self.policy.update(load)
+
+    def remove(self, employee_id):
+        self.loads.pop(employee_id, None)
+        self.policy.remove(employee_id)
+
+
+def employees():
+    from accounts.models import User
+    return User.objects.filter(
+        is_active=True, user_type__in=[User.UserType.EMPLOYEE, User.UserType.ADMIN],
+    )
+
+
+def specialties(since=None):
+    """``{employee_id: frozenset(states)}`` from the permits each employee handled."""
+    since = since or timezone.now() - timedelta(days=SPECIALTY_DAYS)
+    counts = defaultdict(Counter)
+    rows = (
+        PermitState.objects
+        .filter(permit__assigned_to__isnull=False, permit__submitted_at__gte=since)
+        .values_list('permit__assigned_to', 'state')
+        .annotate(n=Count('id'))
+    )
+    for employee_id, state, n in rows:
+        if n >= SPECIALTY_MIN_PERMITS:
+            counts[employee_id][state] = n
+    return {
+        employee_id: frozenset(state for state, _ in states.most_common(SPECIALTY_STATES))
+        for employee_id, states in counts.items()
+    }
+
+
+def load_from_database(policy):
+    """An Assigner with every active employee's current open workload."""
+    loads = {
+        user.id: Load(user.id, user.get_full_name() or user.username)
+        for user in employees().only('id', 'username', 'first_name', 'last_name')
+    }
+    for employee_id, states in specialties().items():
+        if employee_id in loads:
+            loads[employee_id].specialties = states
+    open_permits = (
+        PermitRequest.objects
+        .filter(status__in=OPEN_STATUSES, assigned_to__in=list(loads))
+        .annotate(state_count=Count('states'))
+        .values_list('assigned_to', 'compliance_flags', 'state_count')
+    )
+    for employee_id, flags, state_count in open_permits:
+        load = loads[employee_id]
+        load.open += 1
+        load.score += weight(flags, state_count)
+    return Assigner(policy, loads.values())
+
+
+_lock = threading.Lock()
+_assigner = None
+_loaded_at = 0.0
+
+
+def _current():
+    global _assigner, _loaded_at
+    policy = settings.AUTO_ASSIGN_POLICY
+    stale = time.monotonic() - _loaded_at > settings.AUTO_ASSIGN_REFRESH_SECONDS
+    if _assigner is None or stale or _assigner.policy.__class__ is not policy_class(policy):
+        _assigner = load_from_database(policy)
+        _loaded_at = time.monotonic()
+    return _assigner
+
+
+def reset():
+    """Drop the in-memory workload; it is reloaded on the next assignment."""
+    global _assigner
+    with _lock:
+        _assigner = None
+
+
+def auto_assign(permit):
+    """Assign a newly submitted, unassigned permit; returns the employee's Load or None."""
+    if not settings.AUTO_ASSIGN_POLICY or permit.assigned_to_id:
+        return None
+    work = Work.of(permit)
+    with _lock:
+        assigner = _current()
+        load = assigner.assign(work)
+    if load is None:
+        return None
+
+    # Someone may have claimed it from the work queue in the meantime
+    assigned = PermitRequest.objects.filter(pk=permit.pk, assigned_to__isnull=True).update(
+        assigned_to_id=load.employee_id, updated_at=timezone.now(), version=F('version') + 1,
+    )
+    if not assigned:
+        with _lock:
+            assigner.release(load.employee_id, work)
+        return None
+    permit.assigned_to_id = load.employee_id
+    permit.version += 1
+    return load
@@ -0,0 +1,88 @@
+"""
+Bulk actions from the employee dashboard.
+
+Each action is one set-based UPDATE (or one bulk_create for comments) over
+the selected permits, however many there are, plus one bulk_create of
+notifications for the assignees affected, in a single transaction:
+
+    changed = set_status(ids, PermitRequest.Status.COMPLETED, request.user)
+
+Timestamps follow employee_permit_detail: ``updated_at`` on every change,
+``completed_at`` the first time a permit is completed. Status changes are
+added to the permit history with one more bulk_create.
+"""
+
+from django.db import transaction
+from django.db.models import DateTimeField, F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from permits.history import record_many
+from permits.models import PermitComment, PermitRequest, PermitStatusChange
+from .models import Notification
+
+MAX_PERMITS = 500
+
+
+def _notify(rows, actor, title, message):
+    """One notification per permit for its assignee, unless they made the change."""
+    Notification.objects.bulk_create([
+        Notification(
+            notification_type=Notification.NotificationType.PERMIT_UPDATE,
+            title=title.format(number=number),
+            message=message.format(number=number),
+            permit_id=permit_id,
+            recipient_id=assignee,
+        )
+        for permit_id, number, _, assignee in rows
+        if assignee and assignee != actor.pk
+    ])
+
+
+def _rows(permits):
+    return list(permits.values_list('id', 'permit_number', 'status', 'assigned_to_id'))
+
+
+def assign(permit_ids, employee, actor):
+    """Assign the permits to ``employee``; returns how many changed."""
+    now = timezone.now()
+    with transaction.atomic():
+        rows = _rows(PermitRequest.objects.filter(pk__in=permit_ids).exclude(assigned_to=employee))
+        changed = PermitRequest.objects.filter(pk__in=[row[0] for row in rows]).update(
+            assigned_to=employee, updated_at=now, version=F('version') + 1,
+        )
+        by = actor.get_full_name() or actor.username
+        _notify(
+            [(permit_id, number, status, employee.pk) for permit_id, number, status, _ in rows],
+            actor, 'Permit #{number} assigned to you', f'{by} assigned permit #{{number}} to you.',
+        )
+    return changed
+
+
+def set_status(permit_ids, status, actor):
+    """Move the permits to ``status``; returns how many changed."""
+    now = timezone.now()
+    fields = {'status': status, 'updated_at': now, 'version': F('version') + 1}
+    if status == PermitRequest.Status.COMPLETED:
+        fields['completed_at'] = Coalesce('completed_at', Value(now, output_field=DateTimeField()))
+    label = PermitRequest.Status(status).label
+    with transaction.atomic():
+        rows = _rows(PermitRequest.objects.filter(pk__in=permit_ids).exclude(status=status))
+        changed = PermitRequest.objects.filter(pk__in=[row[0] for row in rows]).update(**fields)
+        record_many(
+            [(permit_id, previous) for permit_id, _, previous, _ in rows],
+            status, actor, PermitStatusChange.Source.BULK, at=now,
+        )
+        by = actor.get_full_name() or actor.username
+        _notify(rows, actor, f'Permit #{{number}} is {label.lower()}', f'{by} set permit #{{number}} to {label}.')
+    return changed
+
+
+def add_comment(permit_ids, message, actor):
+    """Add the same internal comment to every permit; returns how many were added."""
+    ids = PermitRequest.objects.filter(pk__in=permit_ids).values_list('id', flat=True)
+    comments = PermitComment.objects.bulk_create([
+        PermitComment(permit_id=permit_id, user=actor, message=message, is_internal=True)
+        for permit_id in ids
+    ])
+    return len(comments)
@@ -0,0 +1,120 @@
+"""
+Load test for the employee work queue.
+
+    python manage.py loadtest_claims
+    python manage.py loadtest_claims --employees 50 --permits 2000 --keep
+
+Creates a throwaway company with pending permits and employee accounts,
+then has every employee call claim_next() from its own thread until the
+queue is empty. Fails if any permit was handed out twice or if the
+claims disagree with the assigned_to column. The test data is deleted
+afterwards unless --keep is given.
+
+Run it against PostgreSQL to exercise SKIP LOCKED; on SQLite it tests the
+compare-and-swap fallback.
+"""
+
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from accounts.models import User
+from company.models import Company
+from dashboard.workqueue import claim_next
+from permits.models import PermitRequest
+
+PREFIX = 'loadtest-claims'
+
+
+class Command(BaseCommand):
+    help = 'Check that concurrent claim-next calls never assign a permit twice'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=50)
+        parser.add_argument('--permits', type=int, default=500)
+        parser.add_argument('--keep', action='store_true', help='Keep the test company, users and permits')
+
+    def handle(self, *args, **options):
+        company, employees = self._setup(options['employees'], options['permits'])
+        claims = []
+        lock = threading.Lock()
+        start_line = threading.Barrier(len(employees))
+
+        def work(employee):
+            try:
+                start_line.wait()
+                while True:
+                    permit = claim_next(employee, company_id=company.id)
+                    if permit is None:
+                        break
+                    with lock:
+                        claims.append((permit.id, employee.id))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=work, args=(e,)) for e in employees]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        try:
+            self._verify(company, claims, options['permits'])
+            per_employee = Counter(employee for _, employee in claims)
+            self.stdout.write(self.style.SUCCESS(
+                f'{len(claims)} claims by {len(employees)} employees in {elapsed:.1f}s '
+                f'({len(claims) / elapsed:.0f}/s, {min(per_employee.values(), default=0)}-'
+                f'{max(per_employee.values(), default=0)} each, {connection.vendor} '
+                f'{"SKIP LOCKED" if connection.features.has_select_for_update_skip_locked else "CAS"}); '
+                f'no permit was assigned twice'
+            ))
+        finally:
+            if not options['keep']:
+                self._cleanup(company)
+
+    def _setup(self, employee_count, permit_count):
+        company = Company.objects.create(
+            name=f'{PREFIX} {timezone.now():%Y%m%d%H%M%S}', email='loadtest@example.com',
+            address='-', city='-', state='TX', zipcode='00000', phone='-', usdot_number='0',
+        )
+        employees = [
+            User.objects.create_user(f'{PREFIX}-{company.id}-{i}', user_type=User.UserType.EMPLOYEE)
+            for i in range(employee_count)
+        ]
+        submitter = employees[0]
+        now = timezone.now()
+        PermitRequest.objects.bulk_create([
+            PermitRequest(
+                company=company, submitted_by=submitter, status=PermitRequest.Status.PENDING,
+                permit_number=number, load_description=f'Load test {i}',
+                origin_address='Dallas, TX', destination_address='Houston, TX',
+                submitted_at=now,
+            )
+            for i, number in enumerate(PermitRequest.next_permit_numbers(permit_count))
+        ], batch_size=500)
+        return company, employees
+
+    def _verify(self, company, claims, permit_count):
+        counts = Counter(permit_id for permit_id, _ in claims)
+        doubles = [permit_id for permit_id, n in counts.items() if n > 1]
+        if doubles:
+            raise CommandError(f'{len(doubles)} permit(s) claimed more than once, e.g. {doubles[:5]}')
+        if len(counts) != permit_count:
+            raise CommandError(f'{len(counts)} of {permit_count} permits were claimed')
+        assigned = dict(
+            PermitRequest.objects.filter(company=company, status=PermitRequest.Status.IN_PROGRESS)
+            .values_list('id', 'assigned_to_id')
+        )
+        if assigned != dict(claims):
+            raise CommandError('Claims do not match the assigned_to column')
+
+    def _cleanup(self, company):
+        PermitRequest.objects.filter(company=company).delete()
+        User.objects.filter(username__startswith=f'{PREFIX}-{company.id}-').delete()
+        company.delete()
@@ -0,0 +1,28 @@
+"""
+Refresh the daily analytics rollups.
+
+    python manage.py refresh_rollups          # only days changed since the last refresh
+    python manage.py refresh_rollups --full   # rebuild everything
+
+Also runs every 15 minutes from the scheduler (dashboard/tasks.py).
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from dashboard.rollups import refresh
+
+
+class Command(BaseCommand):
+    help = 'Refresh daily permit analytics rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild all days')
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        days = refresh(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {days} day(s) in {time.monotonic() - start:.1f}s'
+        ))
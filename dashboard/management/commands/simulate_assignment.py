@@ -0,0 +1,131 @@
+"""
+Replay past submissions through the auto-assignment policies.
+
+    python manage.py simulate_assignment
+    python manage.py simulate_assignment --days 365 --policy least_loaded --policy state_specialty
+    python manage.py simulate_assignment --employees 200
+
+Submitted permits from the last --days are fed to each policy in
+submission order. Each permit stays on its employee for as long as it
+really took (submitted_at to completed_at; the median for permits never
+completed), then is released. The employees are today's active
+employees, or --employees synthetic ones sharing their specialties.
+Nothing is written to the database.
+
+Reported per policy: time per assignment, the average spread between the
+busiest and idlest employee (open permits and score) at each submission,
+the peak open count, and how often a permit went to a specialist in one of
+its states.
+"""
+
+import heapq
+import statistics
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+
+from dashboard.assignment import POLICIES, Assigner, Load, Work, employees, specialties, weight
+from permits.models import PermitRequest, PermitState
+
+
+class Command(BaseCommand):
+    help = 'Compare auto-assignment policies on past permit submissions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90)
+        parser.add_argument('--policy', action='append', choices=sorted(POLICIES),
+                            help='Policy to simulate (repeatable; default all)')
+        parser.add_argument('--employees', type=int, help='Simulate this many employees')
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(days=options['days'])
+        submissions = self._submissions(since)
+        if not submissions:
+            raise CommandError(f'No permits submitted in the last {options["days"]} days')
+        staff = self._employees(submissions, since, options['employees'])
+        if not staff:
+            raise CommandError('No employees to assign to')
+        self.stdout.write(f'{len(submissions)} submissions, {len(staff)} employees')
+
+        for name in options['policy'] or sorted(POLICIES):
+            self._report(name, self._replay(name, submissions, staff))
+
+    def _submissions(self, since):
+        rows = list(
+            PermitRequest.objects
+            .filter(submitted_at__gte=since)
+            .annotate(state_count=Count('states'))
+            .order_by('submitted_at')
+            .values_list('id', 'submitted_at', 'completed_at', 'compliance_flags', 'state_count', 'assigned_to')
+        )
+        states = defaultdict(set)
+        for permit_id, state in PermitState.objects.filter(
+            permit__submitted_at__gte=since,
+        ).values_list('permit_id', 'state'):
+            states[permit_id].add(state)
+
+        durations = [done - submitted for _, submitted, done, *_ in rows if done and done > submitted]
+        typical = statistics.median(durations) if durations else timedelta(days=1)
+        return [
+            (
+                submitted,
+                (done - submitted) if done and done > submitted else typical,
+                Work(weight(flags, state_count), frozenset(states[permit_id])),
+                assignee,
+            )
+            for permit_id, submitted, done, flags, state_count, assignee in rows
+        ]
+
+    def _employees(self, submissions, since, count):
+        skills = specialties(since)
+        ids = sorted(employees().values_list('id', flat=True)) or sorted(
+            {assignee for *_, assignee in submissions if assignee}
+        )
+        if count:
+            # Synthetic staff, reusing the real employees' specialties in turn
+            return [(n, skills.get(ids[n % len(ids)], frozenset()) if ids else frozenset())
+                    for n in range(count)]
+        return [(employee_id, skills.get(employee_id, frozenset())) for employee_id in ids]
+
+    def _replay(self, policy, submissions, staff):
+        assigner = Assigner(policy, [Load(employee_id, specialties=skills) for employee_id, skills in staff])
+        finishing = []  # (finished_at, seq, employee_id, work)
+        open_spread, score_spread, peak, specialist, spent = [], [], 0, 0, 0.0
+
+        for seq, (submitted, duration, work, _) in enumerate(submissions):
+            while finishing and finishing[0][0] <= submitted:
+                _, _, employee_id, done = heapq.heappop(finishing)
+                assigner.release(employee_id, done)
+
+            started = time.perf_counter()
+            load = assigner.assign(work)
+            spent += time.perf_counter() - started
+
+            heapq.heappush(finishing, (submitted + duration, seq, load.employee_id, work))
+            if load.specialties & work.states:
+                specialist += 1
+            opens = [l.open for l in assigner.loads.values()]
+            scores = [l.score for l in assigner.loads.values()]
+            open_spread.append(max(opens) - min(opens))
+            score_spread.append(max(scores) - min(scores))
+            peak = max(peak, load.open)
+
+        return {
+            'us_per_assignment': spent / len(submissions) * 1e6,
+            'open_spread': statistics.mean(open_spread),
+            'score_spread': statistics.mean(score_spread),
+            'peak_open': peak,
+            'specialist_rate': specialist / len(submissions),
+        }
+
+    def _report(self, policy, result):
+        self.stdout.write(
+            f'{policy:16} {result["us_per_assignment"]:7.1f} us/assignment  '
+            f'spread {result["open_spread"]:5.2f} open / {result["score_spread"]:6.2f} score  '
+            f'peak {result["peak_open"]:3} open  '
+            f'specialist {result["specialist_rate"]:6.1%}'
+        )
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.27 on 2026-10-19 01:05
+
+from django.db import migrations, models
+import permit_system.uploads
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_notification'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emailattachment',
+            name='file',
+            field=models.FileField(max_length=255, upload_to=permit_system.uploads.ShardedUploadTo('email_attachments')),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.27 on 2026-10-19 01:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('company', '0001_initial'),
+        ('dashboard', '0004_image_previews'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('refreshed_through', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyStateCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('state', models.CharField(max_length=2)),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('day', 'state', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyTurnaround',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('total_hours', models.FloatField(default=0)),
+                ('histogram', models.JSONField(default=list)),
+                ('employee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='daily_turnaround_day_idx')],
+                'unique_together': {('day', 'employee')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyPermitCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='company.company')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'status'], name='daily_count_day_idx')],
+                'unique_together': {('day', 'company', 'status')},
+            },
+        ),
+    ]
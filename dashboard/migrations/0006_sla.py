@@ -0,0 +1,53 @@
+# Generated by Django 4.2.27 on 2026-10-19 01:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company', '0001_initial'),
+        ('permits', '0020_permit_status_submitted_idx'),
+        ('dashboard', '0005_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('new_permit', 'New Permit Submitted'), ('permit_update', 'Permit Updated'), ('new_company', 'New Company Registered'), ('sla_breach', 'SLA Breached'), ('general', 'General')], default='general', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='SlaTarget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20)),
+                ('hours', models.PositiveIntegerField()),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sla_targets', to='company.company')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SlaBreach',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20)),
+                ('target_hours', models.PositiveIntegerField()),
+                ('breached_at', models.DateTimeField()),
+                ('detected_at', models.DateTimeField(auto_now_add=True)),
+                ('permit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sla_breaches', to='permits.permitrequest')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='slatarget',
+            constraint=models.UniqueConstraint(condition=models.Q(('company__isnull', True)), fields=('status',), name='sla_default_target_unique'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='slatarget',
+            unique_together={('company', 'status')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='slabreach',
+            unique_together={('permit', 'status')},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-19 02:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0006_sla'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='slatarget',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('pending', 'Pending Review'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('invoiced', 'Invoiced'), ('cancelled', 'Cancelled')], max_length=20),
+        ),
+    ]
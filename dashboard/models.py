@@ -1,6 +1,9 @@
 from django.db import models
 from django.conf import settings
 
+from permit_system.uploads import email_attachment_upload_to, preview_upload_to, thumbnail_upload_to
+from permits.models import PermitRequest
+
 
 class EmailLog(models.Model):
     """Log of emails sent to customers."""
@@ -38,9 +41,18 @@ class EmailAttachment(models.Model):
         on_delete=models.CASCADE,
         related_name='attachment_files'
     )
-    file = models.FileField(upload_to='email_attachments/')
+    file = models.FileField(upload_to=email_attachment_upload_to, max_length=255)
     filename = models.CharField(max_length=200)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    
+    # Web-sized renditions of image uploads (built in the background)
+    preview = models.ImageField(upload_to=preview_upload_to, max_length=255, blank=True)
+    thumbnail = models.ImageField(upload_to=thumbnail_upload_to, max_length=255, blank=True)
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from permits.images import schedule_renditions
+        schedule_renditions(self)
 
 class Notification(models.Model):
     """Notifications for admin users."""
@@ -49,6 +61,7 @@ class Notification(models.Model):
         NEW_PERMIT = 'new_permit', 'New Permit Submitted'
         PERMIT_UPDATE = 'permit_update', 'Permit Updated'
         NEW_COMPANY = 'new_company', 'New Company Registered'
+        SLA_BREACH = 'sla_breach', 'SLA Breached'
         GENERAL = 'general', 'General'
     
     recipient = models.ForeignKey(
@@ -79,4 +92,123 @@ class Notification(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.title} - {'Read' if self.is_read else 'Unread'}"
\ No newline at end of file
+        return f"{self.title} - {'Read' if self.is_read else 'Unread'}"
+
+class DailyPermitCount(models.Model):
+    """Rollup: permits created per day, by company and current status."""
+    
+    day = models.DateField()
+    company = models.ForeignKey(
+        'company.Company',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    status = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['day', 'company', 'status']
+        indexes = [
+            models.Index(fields=['day', 'status'], name='daily_count_day_idx'),
+        ]
+
+
+class DailyStateCount(models.Model):
+    """Rollup: permit state legs per day (permit creation date), by state and status."""
+    
+    day = models.DateField()
+    state = models.CharField(max_length=2)
+    status = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['day', 'state', 'status']
+
+
+class DailyTurnaround(models.Model):
+    """Rollup: submitted→completed turnaround per completion day and employee.
+    
+    ``histogram`` holds counts per TURNAROUND_BUCKETS bucket so any date range
+    can be merged and turned into percentiles without touching permits.
+    """
+    
+    day = models.DateField()
+    employee = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    completed = models.PositiveIntegerField(default=0)
+    total_hours = models.FloatField(default=0)
+    histogram = models.JSONField(default=list)
+    
+    class Meta:
+        unique_together = ['day', 'employee']
+        indexes = [
+            models.Index(fields=['day'], name='daily_turnaround_day_idx'),
+        ]
+
+
+class RollupState(models.Model):
+    """High-water mark of the last rollup refresh."""
+    
+    name = models.CharField(max_length=50, unique=True)
+    refreshed_through = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} through {self.refreshed_through}"
+
+
+class SlaTarget(models.Model):
+    """Hours from submission a permit may spend in a status (see dashboard/sla.py).
+    
+    A row without a company overrides settings.SLA_TARGET_HOURS for everyone;
+    a row with one applies to that company only.
+    """
+    
+    company = models.ForeignKey(
+        'company.Company',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='sla_targets'
+    )
+    status = models.CharField(max_length=20, choices=PermitRequest.Status.choices)
+    hours = models.PositiveIntegerField()
+    
+    class Meta:
+        unique_together = ['company', 'status']
+        constraints = [
+            # unique_together does not cover the company-less defaults (NULLs differ)
+            models.UniqueConstraint(
+                fields=['status'],
+                condition=models.Q(company__isnull=True),
+                name='sla_default_target_unique',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.company or 'Default'}: {self.status} within {self.hours}h"
+
+
+class SlaBreach(models.Model):
+    """A permit that overran its target in a status; one row (and one notification) each."""
+    
+    permit = models.ForeignKey(
+        'permits.PermitRequest',
+        on_delete=models.CASCADE,
+        related_name='sla_breaches'
+    )
+    status = models.CharField(max_length=20)
+    target_hours = models.PositiveIntegerField()
+    breached_at = models.DateTimeField()
+    detected_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['permit', 'status']
+    
+    def __str__(self):
+        return f"{self.permit} over {self.target_hours}h in {self.status}"
@@ -0,0 +1,152 @@
+"""
+Daily analytics rollups.
+
+Permit counts are keyed on the permit's creation day (which never changes);
+turnaround is keyed on the completion day. A refresh only rebuilds the days
+touched by permits updated since the previous refresh, so its cost follows
+the amount of recent activity, not the size of the archive.
+
+Deleted permits and moved completion dates are not seen by the incremental
+pass; ``refresh(full=True)`` (``manage.py refresh_rollups --full``) rebuilds
+everything.
+"""
+
+import bisect
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from permits.models import PermitRequest, PermitState
+from .models import DailyPermitCount, DailyStateCount, DailyTurnaround, RollupState
+
+# Upper bounds (hours) of the turnaround histogram buckets; the last bucket is open-ended
+TURNAROUND_BUCKETS = [1, 2, 4, 8, 12, 24, 36, 48, 72, 96, 120, 168, 240, 336, 720]
+
+DAYS_PER_BATCH = 60
+
+
+def _batches(days):
+    days = sorted(days)
+    for i in range(0, len(days), DAYS_PER_BATCH):
+        yield days[i:i + DAYS_PER_BATCH]
+
+
+def _rebuild_counts(days):
+    DailyPermitCount.objects.filter(day__in=days).delete()
+    DailyStateCount.objects.filter(day__in=days).delete()
+
+    rows = (
+        PermitRequest.objects
+        .filter(created_at__date__in=days)
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'company_id', 'status')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    DailyPermitCount.objects.bulk_create([
+        DailyPermitCount(day=r['day'], company_id=r['company_id'], status=r['status'], count=r['n'])
+        for r in rows
+    ])
+
+    rows = (
+        PermitState.objects
+        .filter(permit__created_at__date__in=days)
+        .annotate(day=TruncDate('permit__created_at'))
+        .values('day', 'state', 'permit__status')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    DailyStateCount.objects.bulk_create([
+        DailyStateCount(day=r['day'], state=r['state'], status=r['permit__status'], count=r['n'])
+        for r in rows
+    ])
+
+
+def _rebuild_turnaround(days):
+    DailyTurnaround.objects.filter(day__in=days).delete()
+
+    groups = defaultdict(lambda: [0, 0.0, [0] * (len(TURNAROUND_BUCKETS) + 1)])
+    rows = (
+        PermitRequest.objects
+        .filter(completed_at__date__in=days, submitted_at__isnull=False)
+        .annotate(day=TruncDate('completed_at'))
+        .values_list('day', 'assigned_to_id', 'submitted_at', 'completed_at')
+    )
+    for day, employee_id, submitted_at, completed_at in rows.iterator():
+        hours = max(0.0, (completed_at - submitted_at).total_seconds() / 3600)
+        group = groups[(day, employee_id)]
+        group[0] += 1
+        group[1] += hours
+        group[2][bisect.bisect_left(TURNAROUND_BUCKETS, hours)] += 1
+
+    DailyTurnaround.objects.bulk_create([
+        DailyTurnaround(day=day, employee_id=employee_id, completed=n, total_hours=total, histogram=hist)
+        for (day, employee_id), (n, total, hist) in groups.items()
+    ])
+
+
+def _changed_days(since):
+    changed = PermitRequest.objects.filter(updated_at__gt=since) if since else PermitRequest.objects.all()
+    created = set(
+        changed.annotate(day=TruncDate('created_at'))
+        .values_list('day', flat=True).distinct().order_by()
+    )
+    completed = set(
+        changed.filter(completed_at__isnull=False)
+        .annotate(day=TruncDate('completed_at'))
+        .values_list('day', flat=True).distinct().order_by()
+    )
+    return created, completed
+
+
+def refresh(full=False):
+    """Rebuild the rollups for every day with changes. Returns the number of days rebuilt."""
+    started = timezone.now()
+    state, _ = RollupState.objects.get_or_create(name='permits')
+    since = None if full else state.refreshed_through
+
+    created_days, completed_days = _changed_days(since)
+    if full:
+        DailyPermitCount.objects.all().delete()
+        DailyStateCount.objects.all().delete()
+        DailyTurnaround.objects.all().delete()
+
+    for days in _batches(created_days):
+        with transaction.atomic():
+            _rebuild_counts(days)
+    for days in _batches(completed_days):
+        with transaction.atomic():
+            _rebuild_turnaround(days)
+
+    # Small overlap so rows saved while this refresh ran are picked up next time
+    state.refreshed_through = started - timedelta(seconds=5)
+    state.save()
+    return len(created_days | completed_days)
+
+
+def merge_histograms(histograms):
+    merged = [0] * (len(TURNAROUND_BUCKETS) + 1)
+    for hist in histograms:
+        for i, n in enumerate(hist):
+            merged[i] += n
+    return merged
+
+
+def percentile(histogram, pct):
+    """Approximate percentile (hours) from a bucket histogram, interpolating within the bucket."""
+    total = sum(histogram)
+    if not total:
+        return None
+    target = total * pct / 100
+    seen = 0
+    for i, n in enumerate(histogram):
+        if n and seen + n >= target:
+            low = TURNAROUND_BUCKETS[i - 1] if i else 0
+            high = TURNAROUND_BUCKETS[i] if i < len(TURNAROUND_BUCKETS) else low * 2
+            return low + (high - low) * (target - seen) / n
+        seen += n
+    return TURNAROUND_BUCKETS[-1]
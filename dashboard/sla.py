@@ -0,0 +1,142 @@
+"""
+Turnaround targets (SLAs) for open permits.
+
+A permit in a tracked status is due ``hours`` after ``submitted_at``. The
+targets come from settings.SLA_TARGET_HOURS, overridden by SlaTarget rows
+(without a company for everyone, with one for that company).
+
+Every (status, target) combination is one range scan on the
+(status, submitted_at) index, so neither the periodic ``scan()`` nor the
+dashboard's ``at_risk()`` loads permits that are still on time.
+
+``scan()`` records each overdue permit once per status in SlaBreach and
+posts one notification for it (to the assignee, if any). The scheduler
+runs a slot on one node only, but a manual run can overlap it: each breach
+row is inserted on its own, and only the scan whose insert gets past the
+unique (permit, status) constraint notifies.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from permits.models import PermitRequest
+from .models import Notification, SlaBreach, SlaTarget
+
+
+@dataclass
+class Target:
+    status: str
+    hours: int
+    company_id: int = None
+    # Companies with their own target for this status (default targets only)
+    excluded: tuple = ()
+
+    def permits(self):
+        permits = PermitRequest.objects.filter(status=self.status, submitted_at__isnull=False)
+        if self.company_id:
+            return permits.filter(company_id=self.company_id)
+        return permits.exclude(company_id__in=self.excluded)
+
+
+def targets():
+    """Every target in effect, most specific first."""
+    defaults = dict(settings.SLA_TARGET_HOURS)
+    by_company = defaultdict(dict)
+    for company_id, status, hours in SlaTarget.objects.values_list('company_id', 'status', 'hours'):
+        if company_id is None:
+            defaults[status] = hours
+        else:
+            by_company[status][company_id] = hours
+
+    result = []
+    # Skip unknown statuses (a typo in settings or an old row) rather than fail the scan
+    for status in sorted((set(defaults) | set(by_company)) & set(PermitRequest.Status.values)):
+        overrides = by_company.get(status, {})
+        result.extend(Target(status, hours, company_id) for company_id, hours in overrides.items())
+        if status in defaults:
+            result.append(Target(status, defaults[status], excluded=tuple(overrides)))
+    return result
+
+
+def scan(now=None):
+    """Record and notify new breaches; returns how many were found."""
+    now = now or timezone.now()
+    found = 0
+    for target in targets():
+        already = SlaBreach.objects.filter(permit=OuterRef('pk'), status=target.status)
+        overdue = list(
+            target.permits()
+            .filter(submitted_at__lt=now - timedelta(hours=target.hours))
+            .filter(~Exists(already))
+            .values_list('id', 'permit_number', 'submitted_at', 'assigned_to_id')
+        )
+        if not overdue:
+            continue
+
+        label = PermitRequest.Status(target.status).label
+        with transaction.atomic():
+            overdue = [row for row in overdue if _record(target, *row)]
+            Notification.objects.bulk_create([
+                Notification(
+                    notification_type=Notification.NotificationType.SLA_BREACH,
+                    title=f'Permit #{number} is past its {target.hours}h target',
+                    message=f'Permit #{number} has been {label.lower()} since it was submitted '
+                            f'{submitted_at:%m/%d/%Y %H:%M} and missed its {target.hours}h target.',
+                    permit_id=permit_id,
+                    recipient_id=assignee,
+                )
+                for permit_id, number, submitted_at, assignee in overdue
+            ])
+        found += len(overdue)
+    return found
+
+
+def _record(target, permit_id, number, submitted_at, assignee):
+    """Insert the breach; False if another scan recorded it first."""
+    try:
+        with transaction.atomic():
+            SlaBreach.objects.create(
+                permit_id=permit_id, status=target.status, target_hours=target.hours,
+                breached_at=submitted_at + timedelta(hours=target.hours),
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+@dataclass
+class AtRisk:
+    permit: PermitRequest
+    target_hours: int
+    deadline: datetime
+    remaining: timedelta
+
+    @property
+    def overdue(self):
+        return self.remaining < timedelta(0)
+
+
+def at_risk(limit=10, now=None):
+    """Open permits past or within SLA_AT_RISK_HOURS of their target, least time left first."""
+    now = now or timezone.now()
+    margin = timedelta(hours=settings.SLA_AT_RISK_HOURS)
+    found = []
+    for target in targets():
+        target_delta = timedelta(hours=target.hours)
+        permits = (
+            target.permits()
+            .filter(submitted_at__lt=now - target_delta + margin)
+            .select_related('company', 'assigned_to')
+            .order_by('submitted_at')[:limit]
+        )
+        for permit in permits:
+            deadline = permit.submitted_at + target_delta
+            found.append(AtRisk(permit, target.hours, deadline, deadline - now))
+    found.sort(key=lambda item: item.remaining)
+    return found[:limit]
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from jobs.scheduler import periodic
+from .models import Notification
+
+
+@periodic(cron='0 3 * * *')
+def purge_old_notifications():
+    """Delete read notifications older than NOTIFICATION_RETENTION_DAYS."""
+    cutoff = timezone.now() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+    deleted, _ = Notification.objects.filter(is_read=True, created_at__lt=cutoff).delete()
+    return f'{deleted} notifications deleted'
+
+
+@periodic(every=timedelta(minutes=15))
+def refresh_analytics_rollups():
+    """Rebuild rollups for days with permit changes."""
+    from .rollups import refresh
+    return f'{refresh()} days rebuilt'
+
+
+@periodic(every=timedelta(minutes=5))
+def scan_sla_breaches():
+    """Notify once for each permit that overran its SLA target."""
+    from .sla import scan
+    return f'{scan()} new breaches'
@@ -0,0 +1,73 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from permits.models import PermitRequest, PermitState, PermitStatusChange
+from permits.tests import make_permit
+
+from . import workqueue
+
+
+class ClaimNextTests(TestCase):
+    def setUp(self):
+        first = make_permit()
+        self.erin = User.objects.create_user('erin', 'e@example.com', 'pw', user_type='employee')
+        self.sam = User.objects.create_user('sam', 's@example.com', 'pw', user_type='employee')
+        now = timezone.now()
+        self.permits = [first] + [
+            PermitRequest.objects.create(
+                company=first.company, submitted_by=first.submitted_by, load_description=f'Load {n}',
+                origin_address='Chicago, IL', destination_address='Dallas, TX',
+            )
+            for n in range(1, 15)
+        ]
+        for n, permit in enumerate(self.permits):
+            PermitRequest.objects.filter(pk=permit.pk).update(
+                status=PermitRequest.Status.PENDING, submitted_at=now - timedelta(hours=len(self.permits) - n),
+            )
+
+    def test_claims_oldest_first(self):
+        permit = workqueue.claim_next(self.erin)
+        self.assertEqual(permit.pk, self.permits[0].pk)
+        self.assertEqual(permit.status, PermitRequest.Status.IN_PROGRESS)
+        self.assertEqual(permit.assigned_to, self.erin)
+        change = PermitStatusChange.objects.get(permit=permit)
+        self.assertEqual((change.source, change.changed_by), (PermitStatusChange.Source.CLAIM, self.erin))
+
+    def test_no_permit_is_claimed_twice(self):
+        claimed = [workqueue.claim_next(user).pk for user in [self.erin, self.sam] * 7]
+        self.assertEqual(len(set(claimed)), len(claimed))
+        self.assertEqual(claimed, [p.pk for p in self.permits[:14]])
+
+    def test_empty_queue_returns_none(self):
+        for _ in self.permits:
+            workqueue.claim_next(self.erin)
+        self.assertIsNone(workqueue.claim_next(self.sam))
+
+    def test_lost_races_move_on_to_the_next_batch(self):
+        reads = []
+
+        def rival_claims_first_batch(ids):
+            # Another worker claims every candidate between our read and our update
+            ids = list(ids)
+            if not reads:
+                PermitRequest.objects.filter(pk__in=ids).update(
+                    assigned_to=self.sam, status=PermitRequest.Status.IN_PROGRESS,
+                )
+            reads.append(ids)
+            return ids
+
+        with mock.patch.object(workqueue, 'list', rival_claims_first_batch, create=True):
+            permit = workqueue.claim_next(self.erin)
+
+        self.assertEqual(len(reads[0]), workqueue.CAS_CANDIDATES)
+        self.assertEqual(permit.pk, self.permits[workqueue.CAS_CANDIDATES].pk)
+        self.assertEqual(permit.assigned_to, self.erin)
+
+    def test_filters_by_state(self):
+        PermitState.objects.create(permit=self.permits[3], state='OK', order=0)
+        self.assertEqual(workqueue.claim_next(self.erin, state='OK').pk, self.permits[3].pk)
+        self.assertIsNone(workqueue.claim_next(self.erin, state='OK'))
@@ -9,12 +9,17 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('customer/', views.customer_dashboard, name='customer_dashboard'),
     path('employee/', views.employee_dashboard, name='employee_dashboard'),
+    path('employee/bulk/', views.bulk_action, name='bulk_action'),
+    path('employee/claim-next/', views.claim_next_permit, name='claim_next_permit'),
     path('employee/permit/<int:permit_id>/', views.employee_permit_detail, name='employee_permit_detail'),
     path('employee/permit/<int:permit_id>/email/', views.send_email, name='send_email'),
+    path('employee/permit/<int:permit_id>/section/<str:section>/', views.permit_section, name='permit_section'),
     path('permit/<int:permit_id>/comment/', views.add_comment, name='add_comment'),
     path('employee/companies/', views.company_list, name='company_list'),
     path('employee/company/<int:company_id>/', views.company_detail_employee, name='company_detail_employee'),
     path('attachment/<int:attachment_id>/download/', views.download_email_attachment, name='download_email_attachment'),
+    path('attachment/<int:attachment_id>/<str:rendition>/', views.email_attachment_preview, name='email_attachment_preview'),
     path('archive/', views.permit_archive, name='permit_archive'),
+    path('employee/analytics/', views.analytics, name='analytics'),
     path('permit/<int:permit_id>/admin-delete/', views.admin_permit_delete, name='admin_permit_delete'),
 ]
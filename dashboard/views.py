@@ -1,19 +1,76 @@
+import json
+import uuid
+
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.dateparse import parse_date
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
-from django.db.models import Q, Count
+from django.contrib.messages.utils import get_level_tags
+from django.http import HttpResponse, JsonResponse, Http404
+from django.db import transaction
+from django.db.models import Q, Count, Sum
 from django.utils import timezone
 from django.core.mail import EmailMessage
 from django.core.paginator import Paginator
 from django.conf import settings
+from datetime import timedelta
 
 from permits.models import PermitRequest, PermitDocument, PermitComment
-from permits.forms import PermitStatusForm, EmailForm, PermitDocumentForm
+from permits.forms import PermitStatusForm, EmailForm, PermitDocumentForm, BulkActionForm
+from permits.idempotency import idempotent
+from permits.concurrency import baseline, changed_fields, posted_baseline, posted_version, save_merged, snapshot
+from permits.history import record
+from permits.models import PermitState, PermitStatusChange
+from permits.compliance import OVERWEIGHT, Violation, check_permit, flag_values
+from permits.conflicts import describe, find_conflicts
+from permits.fingerprints import find_duplicates
+from permits.routing import check_permit_route
+from permits.state_rules import get_rules, state_legs
 from company.models import Company
-from .models import EmailLog, EmailAttachment
+from .models import EmailLog, EmailAttachment, DailyPermitCount, DailyStateCount, DailyTurnaround, RollupState
+from . import bulk
+from .rollups import merge_histograms, percentile
+from .sla import at_risk
+from .workqueue import claim_next
 from django.http import FileResponse
 
+# Employee queue filters: ?flag=<key> -> (label, Violation bits)
+COMPLIANCE_FILTERS = {
+    'overweight': ('Overweight', OVERWEIGHT),
+    'oversize': ('Oversize/Overweight in any state', Violation.OVERSIZE),
+    'escort': ('Needs escort', Violation.ESCORT),
+    'superload': ('Superload', Violation.SUPERLOAD),
+}
+
+SORT_OPTIONS = {
+    '-created_at': 'Newest',
+    '-max_axle_overload': 'Largest axle overload',
+    '-overall_width_total_in': 'Widest',
+    '-overall_height_total_in': 'Tallest',
+    '-overall_length_total_in': 'Longest',
+}
+
+
+# What employee_permit_detail compares against the page's baseline
+STATUS_FIELDS = [*PermitStatusForm.Meta.fields, 'completed_at']
+
+
+def _wants_json(request):
+    return 'application/json' in request.headers.get('Accept', '')
+
+
+def _date_param(request, name, default):
+    """The ``name`` query parameter as a date, or ``default`` if missing or invalid."""
+    try:
+        return parse_date(request.GET.get(name, '')) or default
+    except ValueError:
+        # Well formed but not a real date, e.g. 2026-02-30
+        return default
+
 
 @login_required
 def index(request):
@@ -95,6 +152,22 @@ def employee_dashboard(request):
     if date_to:
         permits = permits.filter(created_at__date__lte=date_to)
     
+    # Compliance filters use the denormalized, indexed summary columns
+    flag = request.GET.get('flag', '')
+    min_width = request.GET.get('min_width', '')
+    sort = request.GET.get('sort', '')
+    
+    if flag == 'compliant':
+        permits = permits.filter(compliance_flags=0)
+    elif flag in COMPLIANCE_FILTERS:
+        permits = permits.filter(compliance_flags__in=flag_values(COMPLIANCE_FILTERS[flag][1]))
+    
+    if min_width.isdigit():
+        permits = permits.filter(overall_width_total_in__gt=int(min_width) * 12)
+    
+    if sort in SORT_OPTIONS:
+        permits = permits.order_by(sort, '-created_at')
+    
     # Statistics
     stats = {
         'total': PermitRequest.objects.count(),
@@ -121,9 +194,223 @@ def employee_dashboard(request):
         'date_from': date_from,
         'date_to': date_to,
         'status_choices': PermitRequest.Status.choices,
+        'flag_filter': flag,
+        'min_width': min_width,
+        'sort': sort,
+        'flag_choices': [(key, label) for key, (label, _) in COMPLIANCE_FILTERS.items()],
+        'state_choices': PermitState.US_STATES,
+        'sort_choices': SORT_OPTIONS.items(),
+        'at_risk': at_risk(),
+        'bulk_form': BulkActionForm(),
     })
 
 
+@login_required
+@require_POST
+@idempotent
+def bulk_action(request):
+    """Apply one action to every permit selected on the employee dashboard."""
+    
+    if not request.user.is_employee:
+        messages.error(request, 'Access denied.')
+        return redirect('dashboard:index')
+    
+    next_url = request.POST.get('next', '')
+    if not url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        next_url = reverse('dashboard:employee_dashboard')
+    
+    form = BulkActionForm(request.POST)
+    if not form.is_valid():
+        for errors in form.errors.values():
+            messages.error(request, errors[0])
+        return redirect(next_url)
+    
+    action = form.cleaned_data['action']
+    permits = form.cleaned_data['permits']
+    if action == 'assign':
+        employee = form.cleaned_data['assigned_to']
+        changed = bulk.assign(permits, employee, request.user)
+        messages.success(request, f'{changed} permit(s) assigned to {employee.get_full_name() or employee.username}.')
+    elif action == 'comment':
+        added = bulk.add_comment(permits, form.cleaned_data['message'], request.user)
+        messages.success(request, f'Comment added to {added} permit(s).')
+    else:
+        status = PermitRequest.Status.INVOICED if action == 'invoiced' else form.cleaned_data['status']
+        changed = bulk.set_status(permits, status, request.user)
+        messages.success(request, f'{changed} permit(s) set to {PermitRequest.Status(status).label}.')
+    
+    return redirect(next_url)
+
+
+@login_required
+@require_POST
+def claim_next_permit(request):
+    """Assign the oldest unassigned pending permit (matching the filters) to the caller."""
+    
+    if not request.user.is_employee:
+        messages.error(request, 'Access denied.')
+        return redirect('dashboard:index')
+    
+    flag = request.POST.get('flag', '')
+    if flag == 'compliant':
+        flags = 0
+    elif flag in COMPLIANCE_FILTERS:
+        flags = COMPLIANCE_FILTERS[flag][1]
+    else:
+        flags = None
+    company_id = request.POST.get('company', '')
+    
+    permit = claim_next(
+        request.user,
+        state=request.POST.get('state') or None,
+        company_id=int(company_id) if company_id.isdigit() else None,
+        flags=flags,
+    )
+    wants_json = _wants_json(request)
+    
+    if permit is None:
+        if wants_json:
+            return JsonResponse({'permit': None})
+        messages.info(request, 'No pending permits match those filters.')
+        return redirect('dashboard:employee_dashboard')
+    
+    if wants_json:
+        return JsonResponse({
+            'permit': permit.id,
+            'permit_number': permit.permit_number,
+            'url': reverse('dashboard:employee_permit_detail', args=[permit.id]),
+        })
+    messages.success(request, f'Permit #{permit.permit_number} is assigned to you.')
+    return redirect('dashboard:employee_permit_detail', permit_id=permit.id)
+
+
+@login_required
+def analytics(request):
+    """Permit analytics for employees, read only from the daily rollup tables."""
+    
+    if not request.user.is_employee:
+        messages.error(request, 'Access denied.')
+        return redirect('dashboard:index')
+    
+    today = timezone.localdate()
+    date_from = _date_param(request, 'date_from', today - timedelta(days=90)).isoformat()
+    date_to = _date_param(request, 'date_to', today).isoformat()
+    
+    counts = DailyPermitCount.objects.filter(day__gte=date_from, day__lte=date_to)
+    status_labels = dict(PermitRequest.Status.choices)
+    by_status = [
+        {'status': status_labels.get(row['status'], row['status']), 'total': row['total']}
+        for row in counts.values('status').annotate(total=Sum('count')).order_by('-total')
+    ]
+    by_company = (
+        counts.values('company_id', 'company__name')
+        .annotate(total=Sum('count'))
+        .order_by('-total')[:25]
+    )
+    by_state = (
+        DailyStateCount.objects.filter(day__gte=date_from, day__lte=date_to)
+        .values('state')
+        .annotate(total=Sum('count'))
+        .order_by('-total')
+    )
+    
+    turnaround = {}
+    rows = (
+        DailyTurnaround.objects.filter(day__gte=date_from, day__lte=date_to)
+        .values_list('employee_id', 'employee__first_name', 'employee__last_name',
+                     'employee__username', 'completed', 'total_hours', 'histogram')
+    )
+    for employee_id, first, last, username, completed, hours, histogram in rows:
+        entry = turnaround.setdefault(employee_id, {
+            'name': ' '.join(filter(None, [first, last])) or username or 'Unassigned',
+            'completed': 0, 'hours': 0.0, 'histograms': [],
+        })
+        entry['completed'] += completed
+        entry['hours'] += hours
+        entry['histograms'].append(histogram)
+    by_employee = []
+    for entry in turnaround.values():
+        merged = merge_histograms(entry.pop('histograms'))
+        entry['avg'] = entry['hours'] / entry['completed']
+        entry['p50'] = percentile(merged, 50)
+        entry['p90'] = percentile(merged, 90)
+        by_employee.append(entry)
+    by_employee.sort(key=lambda e: -e['completed'])
+    
+    state = RollupState.objects.filter(name='permits').first()
+    
+    return render(request, 'dashboard/analytics.html', {
+        'date_from': date_from,
+        'date_to': date_to,
+        'total': sum(row['total'] for row in by_status),
+        'by_status': by_status,
+        'by_company': by_company,
+        'by_state': by_state,
+        'by_employee': by_employee,
+        'refreshed_through': state.refreshed_through if state else None,
+    })
+
+
+def _status_panel(permit, form=None, edit_conflicts=(), shown=None):
+    if form is None:
+        form = PermitStatusForm(instance=permit)
+    # Get employees for assignment dropdown
+    from accounts.models import User
+    employees = User.objects.filter(user_type__in=[User.UserType.EMPLOYEE, User.UserType.ADMIN])
+    form.fields['assigned_to'].queryset = employees
+    return {
+        'form': form,
+        'edit_conflicts': edit_conflicts,
+        'baseline': shown or baseline(permit, STATUS_FIELDS),
+        'status_history': permit.status_history.select_related('changed_by'),
+    }
+
+
+def _comments(permit):
+    return {'comments': permit.comments.select_related('user')}
+
+
+def _email_history(permit):
+    # Newest ten (EmailLog is ordered by -sent_at)
+    return {'email_logs': permit.email_logs.select_related('sent_by').prefetch_related('attachment_files')[:10]}
+
+
+# Parts of the employee permit page that can be fetched and updated on their own:
+# name -> (template, context function)
+PERMIT_SECTIONS = {
+    'status': ('dashboard/_permit_status_panel.html', _status_panel),
+    'comments': ('dashboard/_permit_comments.html', _comments),
+    'emails': ('dashboard/_permit_email_history.html', _email_history),
+}
+
+
+def _render_section(request, permit, name, **context):
+    template, get_context = PERMIT_SECTIONS[name]
+    return render_to_string(template, {'permit': permit, **get_context(permit, **context)}, request=request)
+
+
+def _section_reply(request, permit, notices, sections=(), status=200, **data):
+    """Redirect to the permit page with ``notices`` flashed, or (for fetch()) return them
+    as JSON with the re-rendered ``sections`` so the page can update in place.
+
+    ``sections`` names PERMIT_SECTIONS, or maps a name to extra context for it.
+    """
+    if not _wants_json(request):
+        for level, text in notices:
+            messages.add_message(request, level, text)
+        return redirect('dashboard:employee_permit_detail', permit_id=permit.id)
+    if not isinstance(sections, dict):
+        sections = dict.fromkeys(sections, {})
+    tags = get_level_tags()
+    return JsonResponse({
+        'messages': [{'level': tags[level], 'text': text} for level, text in notices],
+        'sections': {name: _render_section(request, permit, name, **context) for name, context in sections.items()},
+        'permit_status': permit.status,
+        'permit_status_display': permit.get_status_display(),
+        **data,
+    }, status=status)
+
+
 @login_required
 def employee_permit_detail(request, permit_id):
     """Employee view of permit details with management options."""
@@ -133,39 +420,76 @@ def employee_permit_detail(request, permit_id):
         return redirect('dashboard:index')
     
     permit = get_object_or_404(PermitRequest, pk=permit_id)
+    panel = {}
     
     if request.method == 'POST':
+        previous_status = permit.status
+        completed_at = permit.completed_at
+        original = posted_baseline(request) or snapshot(permit, STATUS_FIELDS)
+        version = posted_version(request, permit)
         form = PermitStatusForm(request.POST, instance=permit)
+        panel = {'form': form, 'shown': json.dumps(original)}
         if form.is_valid():
             updated_permit = form.save(commit=False)
             
             # Update completion time if completed
-            if updated_permit.status == PermitRequest.Status.COMPLETED and not permit.completed_at:
+            if updated_permit.status == PermitRequest.Status.COMPLETED and not completed_at:
                 updated_permit.completed_at = timezone.now()
             
-            updated_permit.save()
-            messages.success(request, 'Permit updated successfully.')
-            return redirect('dashboard:employee_permit_detail', permit_id=permit.id)
-    else:
-        form = PermitStatusForm(instance=permit)
-    
-    # Get employees for assignment dropdown
-    from accounts.models import User
-    employees = User.objects.filter(user_type__in=[User.UserType.EMPLOYEE, User.UserType.ADMIN])
-    form.fields['assigned_to'].queryset = employees
-    
-    comments = permit.comments.all()
-    email_logs = permit.email_logs.all()[:10]
+            conflicts = save_merged(
+                updated_permit, changed_fields(updated_permit, original, STATUS_FIELDS), version, original,
+                lambda: record(updated_permit, previous_status, request.user, PermitStatusChange.Source.FORM),
+            )
+            if not conflicts:
+                return _section_reply(
+                    request, permit, [(messages.SUCCESS, 'Permit updated successfully.')], ['status'],
+                )
+            panel = {
+                'form': form,
+                'edit_conflicts': conflicts,
+                'shown': baseline(PermitRequest.objects.get(pk=permit.pk), STATUS_FIELDS),
+            }
+            notice = (messages.WARNING, 'Someone else updated this permit while you were looking at it. '
+                                        'Review the differences below and save again.')
+            if _wants_json(request):
+                return _section_reply(request, permit, [notice], {'status': panel}, status=409)
+            messages.add_message(request, *notice)
+        elif _wants_json(request):
+            return _section_reply(
+                request, permit, [], {'status': panel}, status=400,
+                errors={name: list(errors) for name, errors in form.errors.items()},
+            )
     
     return render(request, 'dashboard/employee_permit_detail.html', {
         'permit': permit,
-        'form': form,
-        'comments': comments,
-        'email_logs': email_logs,
+        **_comments(permit),
+        **_email_history(permit),
+        **_status_panel(permit, **panel),
+        'compliance': check_permit(permit),
+        'state_legs': state_legs(permit),
+        'rules_version': get_rules().version,
+        'conflicts': describe(find_conflicts(permit)),
+        'route': check_permit_route(permit),
+        'duplicates': find_duplicates(permit),
     })
 
 
 @login_required
+def permit_section(request, permit_id, section):
+    """One section of the employee permit page, as HTML."""
+    
+    if not request.user.is_employee:
+        messages.error(request, 'Access denied.')
+        return redirect('dashboard:index')
+    if section not in PERMIT_SECTIONS:
+        raise Http404
+    
+    permit = get_object_or_404(PermitRequest, pk=permit_id)
+    return HttpResponse(_render_section(request, permit, section))
+
+
+@login_required
+@idempotent
 def send_email(request, permit_id):
     """Send email to customer with attachments."""
     
@@ -180,9 +504,10 @@ def send_email(request, permit_id):
         message_body = request.POST.get('message', '')
         recipient = request.POST.get('recipient', permit.company.email)
         
+        # Each reply gives the form a new idempotency key, or the next email would replay this one
+        key = uuid.uuid4().hex
         if not subject:
-            messages.error(request, 'Subject.')
-            return redirect('dashboard:employee_permit_detail', permit_id=permit.id)
+            return _section_reply(request, permit, [(messages.ERROR, 'Subject.')], idempotency_key=key)
         
         # Create email
 
@@ -238,21 +563,24 @@ This is an automated message. Please do not reply directly to this email.
                 )
                 # Automatically change status to completed when email is sent
             if permit.status != PermitRequest.Status.COMPLETED:
+                previous_status = permit.status
                 permit.status = PermitRequest.Status.COMPLETED
                 permit.completed_at = timezone.now()
-                permit.save()
-                messages.success(request, f'Email sent to {recipient}. Permit status changed to Completed.')
+                with transaction.atomic():
+                    permit.save(update_fields=['status', 'completed_at', 'updated_at'])
+                    record(permit, previous_status, request.user, PermitStatusChange.Source.EMAIL)
+                notice = (messages.SUCCESS, f'Email sent to {recipient}. Permit status changed to Completed.')
+                sections = ['emails', 'status']
             else:
-                messages.success(request, f'Email sent to {recipient}')
+                notice = (messages.SUCCESS, f'Email sent to {recipient}')
+                sections = ['emails']
                 
         except Exception as e:
-            messages.error(request, f'Failed to send email: {str(e)}')
-            
-            messages.success(request, f'Email sent to {recipient}')
-        except Exception as e:
-            messages.error(request, f'Failed to send email: {str(e)}')
+            return _section_reply(
+                request, permit, [(messages.ERROR, f'Failed to send email: {str(e)}')], idempotency_key=key,
+            )
         
-        return redirect('dashboard:employee_permit_detail', permit_id=permit.id)
+        return _section_reply(request, permit, [notice], sections, idempotency_key=key)
     
     return redirect('dashboard:employee_permit_detail', permit_id=permit.id)
 
@@ -268,6 +596,7 @@ def add_comment(request, permit_id):
         messages.error(request, 'Access denied.')
         return redirect('dashboard:index')
     
+    notices = []
     if request.method == 'POST':
         message = request.POST.get('message', '').strip()
         is_internal = request.POST.get('is_internal') == 'on' and request.user.is_employee
@@ -279,12 +608,14 @@ def add_comment(request, permit_id):
                 message=message,
                 is_internal=is_internal,
             )
-            messages.success(request, 'Comment added.')
+            notices.append((messages.SUCCESS, 'Comment added.'))
     
     # Redirect back to appropriate detail page
     if request.user.is_employee:
-        return redirect('dashboard:employee_permit_detail', permit_id=permit.id)
+        return _section_reply(request, permit, notices, ['comments'] if notices else [])
     else:
+        for level, text in notices:
+            messages.add_message(request, level, text)
         return redirect('permits:detail', permit_id=permit.id)
 
 
@@ -351,6 +682,27 @@ def download_email_attachment(request, attachment_id):
         as_attachment=True,
         filename=attachment.filename
     )
+
+
+@login_required
+def email_attachment_preview(request, attachment_id, rendition):
+    """Serve the preview or thumbnail of an image attachment."""
+    
+    attachment = get_object_or_404(EmailAttachment, pk=attachment_id)
+    
+    if request.user.is_customer:
+        if attachment.email_log.permit.company != request.user.company:
+            messages.error(request, 'Access denied.')
+            return redirect('dashboard:index')
+    
+    image = getattr(attachment, rendition) if rendition in ('preview', 'thumbnail') else None
+    if not image:
+        raise Http404('Preview not available yet.')
+    
+    response = FileResponse(image.open('rb'), content_type='image/jpeg')
+    response['Cache-Control'] = 'private, max-age=86400'
+    return response
+
 @login_required
 def permit_archive(request):
     """View all completed/archived permits."""
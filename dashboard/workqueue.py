@@ -0,0 +1,92 @@
+"""
+Employee work queue.
+
+``claim_next()`` hands the oldest unassigned PENDING permit to an employee
+and moves it to IN_PROGRESS in the same statement, so two employees never
+get the same permit. Like jobs/queue.py it uses
+``SELECT ... FOR UPDATE SKIP LOCKED`` where the database supports it
+(PostgreSQL) and falls back to a compare-and-swap UPDATE on SQLite.
+
+    permit = claim_next(request.user, state='TX', flags=Violation.SUPERLOAD)
+
+The queue is read through the (status, submitted_at) index.
+"""
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from permits.compliance import flag_values
+from permits.history import record_many
+from permits.models import PermitRequest, PermitState, PermitStatusChange
+
+# Candidates read per batch on databases without row locks
+CAS_CANDIDATES = 10
+
+
+def queue(state=None, company_id=None, flags=None):
+    """Unassigned pending permits, oldest submission first.
+
+    ``flags`` is a compliance.Violation mask the permit must share a bit
+    with; 0 means compliant permits only.
+    """
+    permits = PermitRequest.objects.filter(
+        status=PermitRequest.Status.PENDING,
+        assigned_to__isnull=True,
+    )
+    if state:
+        # A subquery rather than a join, so only permit rows get locked
+        permits = permits.filter(pk__in=PermitState.objects.filter(state=state).values('permit_id'))
+    if company_id:
+        permits = permits.filter(company_id=company_id)
+    if flags == 0:
+        permits = permits.filter(compliance_flags=0)
+    elif flags:
+        permits = permits.filter(compliance_flags__in=flag_values(flags))
+    return permits.order_by('submitted_at', 'id')
+
+
+def _record_claim(permit_id, user, at):
+    record_many(
+        [(permit_id, PermitRequest.Status.PENDING)],
+        PermitRequest.Status.IN_PROGRESS, user, PermitStatusChange.Source.CLAIM, at=at,
+    )
+
+
+def claim_next(user, state=None, company_id=None, flags=None):
+    """Assign the next permit in the queue to ``user`` and return it, or None."""
+    candidates = queue(state, company_id, flags)
+    claim_fields = {
+        'assigned_to': user,
+        'status': PermitRequest.Status.IN_PROGRESS,
+        'updated_at': timezone.now(),
+        'version': F('version') + 1,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(candidates.select_for_update(skip_locked=True).values_list('id', flat=True)[:1])
+            if not ids:
+                return None
+            PermitRequest.objects.filter(id=ids[0]).update(**claim_fields)
+            _record_claim(ids[0], user, claim_fields['updated_at'])
+            claimed = ids[0]
+    else:
+        # No row locks (SQLite): keep the first candidate we were first to flip.
+        # Every lost race takes that permit out of the queue, so re-reading
+        # the next batch always makes progress until the queue is empty.
+        claimed = None
+        while claimed is None:
+            ids = list(candidates.values_list('id', flat=True)[:CAS_CANDIDATES])
+            if not ids:
+                return None
+            for permit_id in ids:
+                with transaction.atomic():
+                    if PermitRequest.objects.filter(
+                        id=permit_id, status=PermitRequest.Status.PENDING, assigned_to__isnull=True,
+                    ).update(**claim_fields):
+                        _record_claim(permit_id, user, claim_fields['updated_at'])
+                        claimed = permit_id
+                        break
+
+    return PermitRequest.objects.get(pk=claimed)
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.27 on 2026-10-19 01:05
+
+from django.db import migrations, models
+import permit_system.uploads
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet', '0006_equipmentcombination_kingpin_to_rear_axle_ft_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vehicle',
+            name='registration_pdf',
+            field=models.FileField(blank=True, max_length=255, null=True, upload_to=permit_system.uploads.ShardedUploadTo('registrations')),
+        ),
+    ]
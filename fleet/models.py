@@ -1,5 +1,6 @@
 from django.db import models
 from company.models import Company
+from permit_system.uploads import registration_upload_to
 
 
 class Driver(models.Model):
@@ -61,7 +62,8 @@ class Vehicle(models.Model):
     
     # Registration document
     registration_pdf = models.FileField(
-        upload_to='registrations/',
+        upload_to=registration_upload_to,
+        max_length=255,
         blank=True,
         null=True
     )
@@ -0,0 +1,46 @@
+import posixpath
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from jobs.scheduler import periodic
+from permit_system.uploads import is_sharded, registration_upload_to, sharded_name
+from .models import Vehicle
+
+
+def _walk(storage, path):
+    dirs, files = storage.listdir(path)
+    for name in files:
+        yield posixpath.join(path, name)
+    for name in dirs:
+        yield from _walk(storage, posixpath.join(path, name))
+
+
+@periodic(cron='0 4 * * 0')
+def prune_orphan_registrations():
+    """Delete registration files no vehicle points at (left behind by re-uploads)."""
+    prefix = registration_upload_to.prefix
+    if not default_storage.exists(prefix):
+        return 'nothing to prune'
+    
+    referenced = set()
+    rows = (
+        Vehicle.objects.exclude(registration_pdf='')
+        .exclude(registration_pdf__isnull=True)
+        .values_list('registration_pdf', 'created_at')
+    )
+    for name, created_at in rows:
+        referenced.add(name)
+        if not is_sharded(prefix, name):
+            # shard_media moves the file (keeping its mtime) before it rewrites
+            # the row, so an unfinished run leaves it at this name
+            referenced.add(sharded_name(prefix, name, when=created_at, key=name))
+    # Leave recent files alone: they may belong to an upload still in flight
+    cutoff = timezone.now() - timedelta(days=1)
+    deleted = 0
+    for name in _walk(default_storage, prefix):
+        if name not in referenced and default_storage.get_modified_time(name) < cutoff:
+            default_storage.delete(name)
+            deleted += 1
+    return f'{deleted} orphaned files deleted'
@@ -0,0 +1,25 @@
+from django.contrib import admin
+from .models import Job, Schedule, ScheduleRun
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'queue', 'status', 'attempts', 'run_at', 'wait_ms', 'duration_ms', 'finished_at']
+    list_filter = ['status', 'queue', 'task']
+    search_fields = ['task', 'last_error']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'wait_ms', 'duration_ms', 'locked_by', 'locked_at', 'heartbeat_at']
+
+
+@admin.register(Schedule)
+class ScheduleAdmin(admin.ModelAdmin):
+    list_display = ['name', 'cron', 'interval_seconds', 'enabled', 'next_run_at', 'last_run_at', 'last_status', 'last_duration_ms']
+    list_filter = ['enabled', 'last_status']
+    list_editable = ['enabled']
+    readonly_fields = ['task', 'locked_by', 'lease_until', 'last_run_at', 'last_status', 'last_duration_ms']
+
+
+@admin.register(ScheduleRun)
+class ScheduleRunAdmin(admin.ModelAdmin):
+    list_display = ['schedule', 'node', 'status', 'started_at', 'duration_ms']
+    list_filter = ['status', 'schedule']
+    readonly_fields = ['schedule', 'node', 'status', 'started_at', 'finished_at', 'duration_ms', 'result', 'error']
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    name = 'jobs'
+
+    def ready(self):
+        # Pull in every app's tasks.py so @periodic registrations are known
+        autodiscover_modules('tasks')
@@ -0,0 +1,86 @@
+"""
+Minimal five-field cron expressions ("minute hour day month weekday").
+
+Supports ``*``, numbers, ranges (``1-5``), lists (``1,15``) and steps
+(``*/15``, ``0-30/10``). Weekday 0 (or 7) is Sunday. Times are evaluated in
+the project's local time zone.
+"""
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+FIELDS = [
+    ('minute', 0, 59),
+    ('hour', 0, 23),
+    ('day', 1, 31),
+    ('month', 1, 12),
+    ('weekday', 0, 7),
+]
+
+
+def _parse_field(text, low, high):
+    values = set()
+    for part in text.split(','):
+        step = 1
+        if '/' in part:
+            part, step = part.split('/', 1)
+            step = int(step)
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (int(v) for v in part.split('-', 1))
+        else:
+            start = end = int(part)
+            if step != 1:
+                end = high
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f'{part!r} is out of range {low}-{high}')
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression:
+
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f'Cron expression needs 5 fields: {expression!r}')
+        self.expression = expression
+        parsed = [_parse_field(p, low, high) for p, (_, low, high) in zip(parts, FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # Python weekday(): Monday=0; cron: Sunday=0 (and 7)
+        self.weekdays = {(d - 1) % 7 for d in weekdays}
+        self.any_day = parts[2] == '*'
+        self.any_weekday = parts[4] == '*'
+
+    def _day_matches(self, dt):
+        day_ok = dt.day in self.days
+        weekday_ok = dt.weekday() in self.weekdays
+        # Standard cron: if both day fields are restricted, either may match
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after):
+        """First matching time strictly after ``after`` (aware datetime)."""
+        dt = timezone.localtime(after).replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+                continue
+            if dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+                continue
+            return timezone.make_aware(dt)
+        raise ValueError(f'{self.expression!r} never matches')
+
+    def __str__(self):
+        return self.expression
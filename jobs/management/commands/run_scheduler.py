@@ -0,0 +1,40 @@
+"""
+Run periodic tasks registered with @periodic.
+
+    python manage.py run_scheduler          # loop forever
+    python manage.py run_scheduler --once   # run what is due now and exit (e.g. from cron)
+
+Safe to run on several nodes at once; each due slot runs on exactly one.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.scheduler import node_name, registry, sync_schedules, tick
+
+
+class Command(BaseCommand):
+    help = 'Run due periodic tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run one tick and exit')
+
+    def handle(self, *args, **options):
+        sync_schedules()
+        node = node_name()
+        self.stdout.write(f'Scheduler {node}: {len(registry)} periodic task(s)')
+
+        while True:
+            for run in tick(node):
+                style = self.style.SUCCESS if run.status == run.Status.SUCCEEDED else self.style.ERROR
+                self.stdout.write(style(
+                    f'{run.schedule.name}: {run.get_status_display()} in {run.duration_ms} ms'
+                ))
+            if options['once']:
+                break
+            try:
+                time.sleep(settings.SCHEDULER_TICK_SECONDS)
+            except KeyboardInterrupt:
+                break
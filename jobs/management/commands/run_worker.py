@@ -0,0 +1,97 @@
+"""
+Run background jobs from the Job table.
+
+    python manage.py run_worker --concurrency 4
+    python manage.py run_worker --concurrency 4 --mode processes --queue default --queue reports
+
+Each thread (or process) polls for due jobs, claims one at a time and runs it.
+Stop with Ctrl+C / SIGTERM; running jobs are allowed to finish.
+"""
+
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from jobs.queue import release_stale
+from jobs.worker import process_main, work_loop
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument('--mode', choices=['threads', 'processes'], default='threads')
+        parser.add_argument('--queue', action='append', dest='queues', help='Queue(s) to serve (default: "default")')
+        parser.add_argument('--burst', action='store_true', help='Exit once no jobs are due')
+
+    def handle(self, *args, **options):
+        queues = options['queues'] or ['default']
+        poll_interval = settings.JOBS_POLL_INTERVAL
+        base_id = f'{socket.gethostname()}:{os.getpid()}'
+
+        released = release_stale()
+        if released:
+            self.stdout.write(f'Released {released} stale job(s)')
+        connection.close()
+
+        self.stdout.write(
+            f'Worker {base_id} serving {", ".join(queues)} '
+            f'with {options["concurrency"]} {options["mode"]}'
+        )
+
+        if options['mode'] == 'processes':
+            self.run_processes(base_id, queues, poll_interval, options)
+        else:
+            self.run_threads(base_id, queues, poll_interval, options)
+
+    def run_threads(self, base_id, queues, poll_interval, options):
+        stop = threading.Event()
+        threads = [
+            threading.Thread(
+                target=work_loop,
+                args=(f'{base_id}/t{n}', queues, stop, poll_interval, options['burst']),
+                daemon=True,
+            )
+            for n in range(options['concurrency'])
+        ]
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        for t in threads:
+            t.start()
+        try:
+            while any(t.is_alive() for t in threads):
+                for t in threads:
+                    t.join(timeout=1)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping, waiting for running jobs...')
+            stop.set()
+            for t in threads:
+                t.join()
+
+    def run_processes(self, base_id, queues, poll_interval, options):
+        ctx = multiprocessing.get_context('spawn')
+        procs = [
+            ctx.Process(
+                target=process_main,
+                args=(f'{base_id}/p{n}', queues, poll_interval, options['burst']),
+            )
+            for n in range(options['concurrency'])
+        ]
+        for p in procs:
+            p.start()
+        signal.signal(signal.SIGTERM, lambda *args: [p.terminate() for p in procs])
+        try:
+            for p in procs:
+                p.join()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping, waiting for running jobs...')
+            for p in procs:
+                p.terminate()
+            for p in procs:
+                p.join()
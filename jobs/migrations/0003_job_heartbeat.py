@@ -0,0 +1,26 @@
+# Generated by Django 4.2.27 on 2026-10-19 02:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_schedules'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='job',
+            name='job_lock_idx',
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'heartbeat_at'], name='job_heartbeat_idx'),
+        ),
+    ]
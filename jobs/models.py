@@ -0,0 +1,115 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """A unit of background work, run by `manage.py run_worker`."""
+    
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Running'
+        SUCCEEDED = 'succeeded', 'Succeeded'
+        FAILED = 'failed', 'Failed'
+    
+    # Dotted path of the callable, e.g. "permits.images.build_renditions_job"
+    task = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    queue = models.CharField(max_length=50, default='default')
+    priority = models.SmallIntegerField(default=0, help_text="Lower runs first")
+    
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+    
+    # Worker bookkeeping
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed while the job runs; a running job without one for
+    # JOBS_LOCK_TIMEOUT is assumed dead (see queue.release_stale())
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    
+    # Timing
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    wait_ms = models.PositiveIntegerField(null=True, blank=True, help_text="Time from run_at to start")
+    duration_ms = models.PositiveIntegerField(null=True, blank=True, help_text="Run time of the last attempt")
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['queue', 'status', 'priority', 'run_at'], name='job_claim_idx'),
+            models.Index(fields=['status', 'heartbeat_at'], name='job_heartbeat_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.get_status_display()})"
+
+
+class Schedule(models.Model):
+    """A recurring task, registered in code with @periodic (see jobs/scheduler.py)."""
+    
+    name = models.CharField(max_length=100, unique=True)
+    task = models.CharField(max_length=200)
+    cron = models.CharField(max_length=100, blank=True, help_text="Five-field cron expression")
+    interval_seconds = models.PositiveIntegerField(null=True, blank=True)
+    enabled = models.BooleanField(default=True)
+    
+    next_run_at = models.DateTimeField(null=True, blank=True)
+    
+    # Lease held by the scheduler node currently running this schedule
+    locked_by = models.CharField(max_length=100, blank=True)
+    lease_until = models.DateTimeField(null=True, blank=True)
+    
+    # Outcome of the last run
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_status = models.CharField(max_length=20, blank=True)
+    last_duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+class ScheduleRun(models.Model):
+    """One execution of a Schedule."""
+    
+    class Status(models.TextChoices):
+        RUNNING = 'running', 'Running'
+        SUCCEEDED = 'succeeded', 'Succeeded'
+        FAILED = 'failed', 'Failed'
+    
+    schedule = models.ForeignKey(
+        Schedule,
+        on_delete=models.CASCADE,
+        related_name='runs'
+    )
+    node = models.CharField(max_length=100)
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.RUNNING
+    )
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    result = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['schedule', '-started_at'], name='schedule_run_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.schedule.name} at {self.started_at:%Y-%m-%d %H:%M} ({self.get_status_display()})"
@@ -0,0 +1,181 @@
+"""
+Database-backed job queue.
+
+Jobs are rows in the Job table. Workers claim them with
+``SELECT ... FOR UPDATE SKIP LOCKED`` where the database supports it
+(PostgreSQL) and fall back to a compare-and-swap UPDATE on SQLite, so several
+workers can poll the same table without handing out a job twice.
+
+    from jobs.queue import enqueue
+    enqueue('permits.images.build_renditions_job', args=['permits.PermitDocument', doc.pk])
+
+Enqueueing inside a transaction is safe: the job only becomes visible to
+workers once the transaction commits.
+
+While a job runs, a side thread refreshes its ``heartbeat_at`` every
+settings.JOBS_HEARTBEAT_INTERVAL. ``release_stale()`` (run by the scheduler
+and at worker start-up) only requeues running jobs whose heartbeat is older
+than settings.JOBS_LOCK_TIMEOUT, so a long job is never handed out twice
+while its worker is alive.
+"""
+
+import logging
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def _task_path(task):
+    if isinstance(task, str):
+        return task
+    return f'{task.__module__}.{task.__qualname__}'
+
+
+def enqueue(task, args=None, kwargs=None, run_at=None, delay=None, queue='default',
+            priority=0, max_attempts=None):
+    """Add a job for ``task`` (a callable or its dotted path) and return it.
+
+    ``args``/``kwargs`` must be JSON serializable. Use ``run_at`` or
+    ``delay`` (seconds or timedelta) to schedule it for later.
+    """
+    if delay is not None and not isinstance(delay, timedelta):
+        delay = timedelta(seconds=delay)
+    if run_at is None:
+        run_at = timezone.now() + (delay or timedelta())
+    return Job.objects.create(
+        task=_task_path(task),
+        args=list(args or []),
+        kwargs=dict(kwargs or {}),
+        run_at=run_at,
+        queue=queue,
+        priority=priority,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+
+
+def claim(worker_id, queues=('default',), limit=1):
+    """Mark up to ``limit`` due jobs as running for ``worker_id`` and return them."""
+    now = timezone.now()
+    due = (
+        Job.objects
+        .filter(queue__in=queues, status=Job.Status.PENDING, run_at__lte=now)
+        .order_by('priority', 'run_at', 'id')
+    )
+    claim_fields = {
+        'status': Job.Status.RUNNING,
+        'locked_by': worker_id,
+        'locked_at': now,
+        'heartbeat_at': now,
+        'started_at': now,
+        'attempts': F('attempts') + 1,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            Job.objects.filter(id__in=ids).update(**claim_fields)
+    else:
+        # No row locks (SQLite): take candidates one at a time, keeping the
+        # ones whose status we were first to flip.
+        ids = []
+        for job_id in due.values_list('id', flat=True)[:limit * 4]:
+            if Job.objects.filter(id=job_id, status=Job.Status.PENDING).update(**claim_fields):
+                ids.append(job_id)
+                if len(ids) == limit:
+                    break
+
+    return list(Job.objects.filter(id__in=ids).order_by('priority', 'run_at', 'id'))
+
+
+def _beat(job, stop):
+    try:
+        while not stop.wait(settings.JOBS_HEARTBEAT_INTERVAL):
+            try:
+                Job.objects.filter(pk=job.pk, status=Job.Status.RUNNING, locked_by=job.locked_by).update(
+                    heartbeat_at=timezone.now(),
+                )
+            except DatabaseError:
+                # e.g. SQLite busy; the next beat tries again
+                logger.warning('Heartbeat for job %s failed', job.pk, exc_info=True)
+    finally:
+        connection.close()
+
+
+@contextmanager
+def heartbeat(job):
+    """Keep ``job`` marked alive for as long as the block runs."""
+    stop = threading.Event()
+    thread = threading.Thread(target=_beat, args=(job, stop), daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job):
+    """Execute a claimed job and record the outcome and timings."""
+    start = time.monotonic()
+    wait_ms = max(0, int((job.started_at - job.run_at).total_seconds() * 1000))
+    try:
+        func = import_string(job.task)
+        with heartbeat(job):
+            func(*job.args, **job.kwargs)
+    except Exception:
+        duration_ms = int((time.monotonic() - start) * 1000)
+        error = traceback.format_exc()
+        logger.warning('Job %s (%s) failed on attempt %s', job.pk, job.task, job.attempts)
+        fields = {
+            'last_error': error,
+            'wait_ms': wait_ms,
+            'duration_ms': duration_ms,
+            'locked_by': '',
+            'locked_at': None,
+            'heartbeat_at': None,
+        }
+        if job.attempts < job.max_attempts:
+            backoff = settings.JOBS_RETRY_DELAY * (2 ** (job.attempts - 1))
+            fields.update(status=Job.Status.PENDING, run_at=timezone.now() + timedelta(seconds=backoff))
+        else:
+            fields.update(status=Job.Status.FAILED, finished_at=timezone.now())
+        Job.objects.filter(pk=job.pk).update(**fields)
+        return False
+
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.Status.SUCCEEDED,
+        finished_at=timezone.now(),
+        wait_ms=wait_ms,
+        duration_ms=int((time.monotonic() - start) * 1000),
+        locked_by='',
+        locked_at=None,
+        heartbeat_at=None,
+    )
+    return True
+
+
+def release_stale(timeout=None):
+    """Return jobs held by workers that died mid-run (no heartbeat for ``timeout``) to the queue."""
+    timeout = timeout or settings.JOBS_LOCK_TIMEOUT
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    stale = Job.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, locked_at__lt=cutoff),
+        status=Job.Status.RUNNING,
+    )
+    reset = {'locked_by': '', 'locked_at': None, 'heartbeat_at': None, 'last_error': 'Worker heartbeat expired'}
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.Status.FAILED, finished_at=timezone.now(), **reset
+    )
+    return failed + stale.update(status=Job.Status.PENDING, **reset)
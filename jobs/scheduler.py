@@ -0,0 +1,150 @@
+"""
+Periodic tasks.
+
+Apps register plain callables in their ``tasks.py`` module:
+
+    from jobs.scheduler import periodic
+
+    @periodic(cron='0 3 * * *')
+    def purge_old_notifications():
+        ...
+
+    @periodic(every=timedelta(minutes=10))
+    def scan_something():
+        ...
+
+``manage.py run_scheduler`` copies the registrations into the Schedule table
+and runs whatever is due. Any number of nodes may run the scheduler: a run is
+claimed by a conditional UPDATE that advances ``next_run_at`` and takes a
+lease, so each due slot is executed by exactly one node.
+"""
+
+import os
+import socket
+import time
+import traceback
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .cron import CronExpression
+from .models import Schedule, ScheduleRun
+
+
+@dataclass
+class PeriodicTask:
+    name: str
+    task: str
+    cron: str = ''
+    interval_seconds: int = None
+
+
+registry = {}
+
+
+def periodic(cron=None, every=None, name=None):
+    """Register the decorated function as a periodic task."""
+    if bool(cron) == bool(every):
+        raise ValueError('Pass exactly one of cron= or every=')
+    if cron:
+        CronExpression(cron)  # validate early
+    if isinstance(every, timedelta):
+        every = int(every.total_seconds())
+
+    def decorator(func):
+        task = f'{func.__module__}.{func.__qualname__}'
+        key = name or task
+        registry[key] = PeriodicTask(key, task, cron or '', every)
+        return func
+
+    return decorator
+
+
+def next_run(schedule, after):
+    if schedule.cron:
+        return CronExpression(schedule.cron).next_after(after)
+    return after + timedelta(seconds=schedule.interval_seconds)
+
+
+def sync_schedules():
+    """Create/update Schedule rows for every registered task."""
+    now = timezone.now()
+    for entry in registry.values():
+        schedule, created = Schedule.objects.get_or_create(
+            name=entry.name,
+            defaults={
+                'task': entry.task,
+                'cron': entry.cron,
+                'interval_seconds': entry.interval_seconds,
+            },
+        )
+        changed = (schedule.task, schedule.cron, schedule.interval_seconds) != (
+            entry.task, entry.cron, entry.interval_seconds
+        )
+        if created or changed or schedule.next_run_at is None:
+            schedule.task = entry.task
+            schedule.cron = entry.cron
+            schedule.interval_seconds = entry.interval_seconds
+            schedule.next_run_at = next_run(schedule, now)
+            schedule.save()
+
+
+def node_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def tick(node=None):
+    """Run every due schedule this node manages to claim. Returns the runs."""
+    node = node or node_name()
+    now = timezone.now()
+    lease_free = Q(lease_until__isnull=True) | Q(lease_until__lt=now)
+    due = Schedule.objects.filter(
+        lease_free,
+        enabled=True,
+        name__in=list(registry),
+        next_run_at__lte=now,
+    )
+    runs = []
+    for schedule in due:
+        claimed = Schedule.objects.filter(
+            lease_free,
+            pk=schedule.pk,
+            next_run_at=schedule.next_run_at,
+        ).update(
+            locked_by=node,
+            lease_until=now + timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS),
+            next_run_at=next_run(schedule, now),
+        )
+        if claimed:
+            runs.append(execute(schedule, node))
+    return runs
+
+
+def execute(schedule, node):
+    """Run one claimed schedule, record the outcome and release the lease."""
+    run = ScheduleRun.objects.create(schedule=schedule, node=node, started_at=timezone.now())
+    start = time.monotonic()
+    try:
+        result = import_string(schedule.task)()
+    except Exception:
+        run.status = ScheduleRun.Status.FAILED
+        run.error = traceback.format_exc()
+    else:
+        run.status = ScheduleRun.Status.SUCCEEDED
+        run.result = '' if result is None else str(result)[:1000]
+    run.finished_at = timezone.now()
+    run.duration_ms = int((time.monotonic() - start) * 1000)
+    run.save()
+
+    Schedule.objects.filter(pk=schedule.pk, locked_by=node).update(
+        locked_by='',
+        lease_until=None,
+        last_run_at=run.started_at,
+        last_status=run.status,
+        last_duration_ms=run.duration_ms,
+    )
+    return run
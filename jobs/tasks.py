@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Job, ScheduleRun
+from .queue import release_stale
+from .scheduler import periodic
+
+
+@periodic(cron='30 2 * * *')
+def purge_job_history():
+    """Delete finished jobs and schedule runs past the retention window."""
+    cutoff = timezone.now() - timedelta(days=settings.JOBS_HISTORY_DAYS)
+    jobs, _ = Job.objects.filter(
+        status__in=[Job.Status.SUCCEEDED, Job.Status.FAILED],
+        finished_at__lt=cutoff,
+    ).delete()
+    runs, _ = ScheduleRun.objects.filter(started_at__lt=cutoff).delete()
+    return f'{jobs} jobs, {runs} runs deleted'
+
+
+@periodic(every=timedelta(minutes=1))
+def release_stale_jobs():
+    """Requeue (or fail) running jobs whose worker stopped sending heartbeats."""
+    return f'{release_stale()} jobs released'
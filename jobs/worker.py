@@ -0,0 +1,40 @@
+"""
+Worker loops used by `manage.py run_worker`.
+
+This module must stay importable before Django is set up: in process mode it
+is the entry point of freshly spawned interpreters, so anything touching
+models is imported inside the functions.
+"""
+
+import signal
+import threading
+
+
+def work_loop(worker_id, queues, stop, poll_interval, burst=False):
+    """Claim and run jobs until ``stop`` is set (or the queue is empty in burst mode)."""
+    from django.db import connection
+    from .queue import claim, run_job
+
+    try:
+        while not stop.is_set():
+            jobs = claim(worker_id, queues)
+            if not jobs:
+                if burst:
+                    return
+                stop.wait(poll_interval)
+                continue
+            for job in jobs:
+                run_job(job)
+    finally:
+        connection.close()
+
+
+def process_main(worker_id, queues, poll_interval, burst=False):
+    """Entry point of a spawned worker process."""
+    import django
+    django.setup()
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+    work_loop(worker_id, queues, stop, poll_interval, burst)
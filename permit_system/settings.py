@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     'fleet',
     'permits',
     'dashboard',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -127,6 +128,55 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Image previews for uploaded photos (see permits/images.py)
+IMAGE_PREVIEW_SIZE = 1280
+IMAGE_THUMBNAIL_SIZE = 320
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', '2'))
+# Re-encode originals larger than this many bytes (0 = keep originals untouched)
+IMAGE_REENCODE_OVER_BYTES = int(os.environ.get('IMAGE_REENCODE_OVER_BYTES', '0'))
+IMAGE_REENCODE_MAX_SIDE = 3000
+
+# Per-state oversize/overweight limits (see permits/state_rules.py)
+STATE_RULES_FILE = BASE_DIR / 'permits' / 'data' / 'state_rules.json'
+# Land borders of the lower 48 states (see permits/routing.py)
+STATE_ADJACENCY_FILE = BASE_DIR / 'permits' / 'data' / 'state_adjacency.json'
+
+# Background jobs (see jobs/queue.py, run with `manage.py run_worker`)
+JOBS_POLL_INTERVAL = 2  # seconds between polls when the queue is empty
+JOBS_MAX_ATTEMPTS = 3
+JOBS_RETRY_DELAY = 30  # seconds, doubled after each failed attempt
+JOBS_HEARTBEAT_INTERVAL = 30  # seconds between a running job's heartbeats
+JOBS_LOCK_TIMEOUT = 5 * 60  # running jobs without a heartbeat for this long are assumed dead
+JOBS_HISTORY_DAYS = 14  # finished jobs and schedule runs are kept this long
+
+# Periodic tasks (see jobs/scheduler.py, run with `manage.py run_scheduler`)
+SCHEDULER_TICK_SECONDS = 30
+SCHEDULER_LEASE_SECONDS = 60 * 60
+NOTIFICATION_RETENTION_DAYS = 30  # read notifications older than this are deleted
+STALE_PENDING_HOURS = 48
+
+# Near-duplicate permits are looked for this many days either side (see permits/fingerprints.py)
+DUPLICATE_WINDOW_DAYS = 14
+
+# Turnaround targets, in hours from submission (see dashboard/sla.py); override
+# globally or per company with SlaTarget rows
+SLA_TARGET_HOURS = {
+    'pending': 24,
+    'in_progress': 72,
+}
+SLA_AT_RISK_HOURS = 4  # permits this close to their target are listed on the dashboard
+
+# Auto-assignment of submitted permits (see dashboard/assignment.py). Off by
+# default: new submissions wait unassigned in the claim-next work queue
+# (dashboard/workqueue.py), which only hands out unassigned permits
+AUTO_ASSIGN_POLICY = os.environ.get('AUTO_ASSIGN_POLICY', '')  # e.g. 'least_loaded'
+AUTO_ASSIGN_REFRESH_SECONDS = 300  # workloads are reloaded from the database this often
+
+# Idempotency keys on form POSTs (see permits/idempotency.py)
+IDEMPOTENCY_TTL_HOURS = 24       # how long a finished request can be replayed
+IDEMPOTENCY_WAIT_SECONDS = 15    # how long a repeat waits for the first request to finish
+IDEMPOTENCY_LOCK_SECONDS = 120   # after this an unfinished first request is presumed dead
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -0,0 +1,63 @@
+"""
+Upload path generators for file fields.
+
+Files are spread over date and hash shards instead of one flat directory
+per field, e.g. ``permit_documents/2026/03/14/a7/invoice.pdf``.
+"""
+
+import hashlib
+import posixpath
+import re
+import uuid
+
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+
+def sharded_name(prefix, filename, when=None, key=None):
+    """Build a sharded storage name for ``filename`` under ``prefix``.
+
+    ``when`` picks the date directories and ``key`` the hash bucket. Both
+    default to "now" and a random key; pass them explicitly to get a stable
+    name (used when relocating existing files).
+    """
+    when = timezone.localtime(when or timezone.now())
+    key = key or uuid.uuid4().hex
+    bucket = hashlib.md5(key.encode()).hexdigest()[:2]
+    return posixpath.join(
+        prefix,
+        when.strftime('%Y'), when.strftime('%m'), when.strftime('%d'),
+        bucket,
+        posixpath.basename(filename),
+    )
+
+
+def is_sharded(prefix, name):
+    """Return True if ``name`` already uses the sharded layout for ``prefix``."""
+    return re.match(sharded_regex(prefix), name or '') is not None
+
+
+def sharded_regex(prefix):
+    """Regex matching names already stored in the sharded layout."""
+    return r'^%s/[0-9]{4}/[0-9]{2}/[0-9]{2}/[0-9a-f]{2}/' % re.escape(prefix)
+
+
+@deconstructible(path='permit_system.uploads.ShardedUploadTo')
+class ShardedUploadTo:
+    """``upload_to`` callable that stores uploads in date/hash shards."""
+
+    def __init__(self, prefix):
+        self.prefix = prefix.strip('/')
+
+    def __call__(self, instance, filename):
+        return sharded_name(self.prefix, filename)
+
+    def __eq__(self, other):
+        return isinstance(other, ShardedUploadTo) and self.prefix == other.prefix
+
+
+permit_document_upload_to = ShardedUploadTo('permit_documents')
+email_attachment_upload_to = ShardedUploadTo('email_attachments')
+registration_upload_to = ShardedUploadTo('registrations')
+preview_upload_to = ShardedUploadTo('previews')
+thumbnail_upload_to = ShardedUploadTo('thumbnails')
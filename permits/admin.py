@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import PermitRequest, PermitState, PermitDocument, PermitComment, PermitAxleDetail
+from .history import record
+from .models import (
+    PermitRequest, PermitState, PermitDocument, PermitComment, PermitAxleDetail, PermitStatusChange, PermitTemplate,
+)
 
 
 class PermitStateInline(admin.TabularInline):
@@ -12,13 +15,32 @@ class PermitDocumentInline(admin.TabularInline):
     extra = 0
 
 
+class PermitStatusChangeInline(admin.TabularInline):
+    model = PermitStatusChange
+    extra = 0
+    can_delete = False
+    readonly_fields = ['from_status', 'to_status', 'changed_by', 'source', 'changed_at']
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(PermitRequest)
 class PermitRequestAdmin(admin.ModelAdmin):
     list_display = ['permit_number', 'company', 'load_description', 'status', 'submitted_by', 'created_at']
     list_filter = ['status', 'created_at']
     search_fields = ['permit_number', 'company__name', 'load_description']
-    inlines = [PermitStateInline, PermitDocumentInline]
+    inlines = [PermitStateInline, PermitDocumentInline, PermitStatusChangeInline]
     readonly_fields = ['permit_number', 'created_at', 'updated_at']
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if 'status' in form.changed_data:
+            record(obj, form.initial.get('status', ''), request.user, PermitStatusChange.Source.ADMIN)
+    
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        form.instance.refresh_from_states()
 
 
 @admin.register(PermitDocument)
@@ -26,3 +48,9 @@ class PermitDocumentAdmin(admin.ModelAdmin):
     list_display = ['filename', 'permit', 'document_type', 'uploaded_by', 'uploaded_at']
     list_filter = ['document_type', 'uploaded_at']
 
+
+
+@admin.register(PermitTemplate)
+class PermitTemplateAdmin(admin.ModelAdmin):
+    list_display = ['name', 'company', 'created_by', 'updated_at']
+    search_fields = ['name', 'company__name']
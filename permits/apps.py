@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class PermitsConfig(AppConfig):
+    name = 'permits'
+
+    def ready(self):
+        # Compile the state rule tables once at startup (and fail early on a bad file)
+        from .state_rules import get_rules
+        get_rules()
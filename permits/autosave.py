@@ -0,0 +1,107 @@
+"""
+Draft autosave.
+
+The permit form posts only the fields that changed since its last autosave,
+as JSON, together with the version it last saw:
+
+    {"version": 7, "fields": {"axle_weight_3": "20000", "spacing_2_3_ft": "4",
+     "spacing_2_3_in": "6"}, "states": [...]}
+
+Each field is cleaned with its own PermitRequestForm field (no full-form
+validation), and the changes are written by one conditional UPDATE that
+also checks company, status and version, so a write from a stale tab
+matches no row and is rejected. The states are only synced when the
+payload includes them.
+
+Only drafts are autosaved. The compliance summary is not recomputed here;
+it is refreshed when the draft is saved or submitted through the form.
+"""
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .concurrency import StaleVersion
+from .forms import PermitRequestForm
+from .models import PermitRequest
+from .state_sync import in_route_order, states_from_json, sync_states
+
+# Submitted permits are already in the employee queue, whose filters, claim-next
+# and duplicate checks read columns only save() keeps up to date
+EDITABLE_STATUSES = [PermitRequest.Status.DRAFT]
+
+AUTOSAVE_FIELDS = set(PermitRequestForm.Meta.fields)
+
+# The form enters spacings as ft/in pairs; they are stored in total inches
+SPACINGS = ['1_2', '2_3', '3_4', '4_5', '5_6', '6_7', '7_8', '8_9']
+
+
+def clean_changes(data, company):
+    """Validated model values for the posted ``fields``; raises ValidationError."""
+    form = PermitRequestForm(company=company)
+    changes, errors = {}, {}
+    for name, value in data.items():
+        if name in AUTOSAVE_FIELDS:
+            # Drafts may be incomplete
+            form.fields[name].required = False
+            try:
+                changes[name] = form.fields[name].clean(value)
+            except ValidationError as e:
+                errors[name] = e.messages
+    for spacing in SPACINGS:
+        parts = [data.get(f'spacing_{spacing}_{unit}') for unit in ('ft', 'in')]
+        if parts == [None, None]:
+            continue
+        try:
+            ft, inches = (int(part or 0) for part in parts)
+        except (TypeError, ValueError):
+            ft = inches = -1
+        if ft < 0 or inches < 0:
+            errors[f'spacing_{spacing}'] = ['Enter whole feet and inches.']
+            continue
+        changes[f'spacing_{spacing}'] = ft * 12 + inches
+
+    # Blank numbers mean 0, as in the full form
+    for name, value in changes.items():
+        if value is None and PermitRequest._meta.get_field(name).has_default():
+            changes[name] = PermitRequest._meta.get_field(name).get_default()
+    if errors:
+        raise ValidationError(errors)
+    return changes
+
+
+def autosave(permit_id, company, version, changes, states=None):
+    """Write ``changes`` if the permit is still at ``version``; returns the new version."""
+    with transaction.atomic():
+        updated = PermitRequest.objects.filter(
+            pk=permit_id, company=company, status__in=EDITABLE_STATUSES, version=version,
+        ).update(**changes, version=F('version') + 1, updated_at=timezone.now())
+        if not updated:
+            current = (
+                PermitRequest.objects
+                .filter(pk=permit_id, company=company, status__in=EDITABLE_STATUSES)
+                .values_list('version', flat=True).first()
+            )
+            if current is None:
+                raise PermitRequest.DoesNotExist
+            raise StaleVersion(current)
+        if states is not None:
+            permit = PermitRequest.objects.get(pk=permit_id)
+            permit.refresh_from_states(sync_states(permit, in_route_order(permit, states_from_json(states))))
+    return version + 1
+
+
+def autosave_new(company, user, changes, states=None):
+    """Create the draft on the first autosave of a new permit."""
+    with transaction.atomic():
+        permit = PermitRequest(
+            **changes,
+            company=company,
+            submitted_by=user,
+            status=PermitRequest.Status.DRAFT,
+        )
+        permit.save()
+        if states:
+            permit.refresh_from_states(sync_states(permit, in_route_order(permit, states_from_json(states))))
+    return permit
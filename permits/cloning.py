@@ -0,0 +1,110 @@
+"""
+Copy permits, including recurring loads.
+
+``clone_permit()`` copies every concrete field of the permit together with
+its states and axle details, and can make several copies at once with the
+travel dates shifted:
+
+    # a permit for the same lane every Monday for the next four weeks
+    clone_permit(permit, user, count=4, first_date=next_monday, every_days=7)
+
+The whole batch is written in one transaction with one bulk insert per
+table, and permit numbers are allocated for the batch in a single query
+(and again if a concurrent insert took them first).
+Documents, comments and workflow fields (status, assignment, timestamps,
+internal notes) belong to the original and are not copied.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+
+from .models import PermitAxleDetail, PermitRequest, PermitState
+
+# Upper bound for one recurring batch (a year of weekly loads)
+MAX_CLONES = 52
+
+# Fields that describe the original's processing rather than the load
+NOT_COPIED = {
+    'id', 'permit_number', 'status', 'submitted_by', 'assigned_to', 'internal_notes',
+    'created_at', 'updated_at', 'submitted_at', 'completed_at', 'travel_start', 'travel_end',
+    'version', 'fingerprint', 'similarity_key',
+}
+
+
+def _values(obj, exclude=()):
+    """Concrete field values of ``obj`` by attname, for building a copy."""
+    return {
+        field.attname: getattr(obj, field.attname)
+        for field in obj._meta.concrete_fields
+        if not field.primary_key and field.name not in exclude
+    }
+
+
+def _travel_date(day, base, offset):
+    if offset is None:
+        return None
+    return (day or base) + offset
+
+
+def clone_permit(original, user, count=1, first_date=None, every_days=7):
+    """Create ``count`` draft copies of ``original`` submitted by ``user``.
+
+    Without ``first_date`` the copies have no travel dates. With it, the
+    first copy starts on ``first_date`` and each following one ``every_days``
+    later; the states keep their spacing from the original (states without
+    a date get the copy's start date). Returns the new permits in date order.
+    """
+    if not 1 <= count <= MAX_CLONES:
+        raise ValueError(f'count must be between 1 and {MAX_CLONES}')
+
+    permit_values = _values(original, exclude=NOT_COPIED)
+    states = list(original.states.all())
+    axles = list(original.axle_details.all())
+    state_values = [_values(state, exclude={'permit'}) for state in states]
+    axle_values = [_values(axle, exclude={'permit'}) for axle in axles]
+
+    base, offsets = None, [None] * count
+    if first_date:
+        base = original.travel_start or first_date
+        offsets = [first_date - base + timedelta(days=n * every_days) for n in range(count)]
+
+    def insert(numbers):
+        permits, new_states = [], []
+        for number, offset in zip(numbers, offsets):
+            permit = PermitRequest(
+                **permit_values,
+                permit_number=number,
+                status=PermitRequest.Status.DRAFT,
+                submitted_by=user,
+            )
+            rows = [
+                PermitState(**{**values, 'travel_date': _travel_date(values['travel_date'], base, offset)})
+                for values in state_values
+            ]
+            permit.apply_states([row.state for row in rows], [row.travel_date for row in rows])
+            permits.append(permit)
+            new_states.append(rows)
+
+        PermitRequest.objects.bulk_create(permits)
+        if any(permit.pk is None for permit in permits):
+            # Backends that cannot return ids from a bulk insert
+            ids = dict(
+                PermitRequest.objects.filter(permit_number__in=numbers).values_list('permit_number', 'pk')
+            )
+            for permit in permits:
+                permit.pk = ids[permit.permit_number]
+        return permits, new_states
+
+    with transaction.atomic():
+        permits, new_states = PermitRequest.allocate_permit_numbers(count, insert)
+        for permit, rows in zip(permits, new_states):
+            for row in rows:
+                row.permit = permit
+        PermitState.objects.bulk_create([row for rows in new_states for row in rows])
+        PermitAxleDetail.objects.bulk_create([
+            PermitAxleDetail(permit=permit, **values)
+            for permit in permits
+            for values in axle_values
+        ])
+    return permits
@@ -0,0 +1,302 @@
+"""
+Axle-weight compliance engine.
+
+Evaluates the federal bridge formula over every axle group (i..j) plus
+single/tandem/tridem, tire-load and gross limits. Everything is computed on
+NumPy arrays shaped (permits, axles), so checking one permit and re-checking
+a few hundred thousand archived ones is the same code path:
+
+    result = check_permit(permit)                    # one permit
+    out = evaluate(*load_arrays(rows))               # batch, see AXLE_COLUMNS
+
+Axle spacings are stored in inches (see permit_create). Groups are formed by
+axle position only; the federal "within 40 inches counts as one axle" rule is
+not modelled.
+"""
+
+from dataclasses import dataclass, field
+from enum import IntFlag
+
+import numpy as np
+
+MAX_AXLES = 9
+
+WEIGHT_FIELDS = [f'axle_weight_{i}' for i in range(1, MAX_AXLES + 1)]
+TIRE_FIELDS = [f'tires_per_axle_{i}' for i in range(1, MAX_AXLES + 1)]
+SPACING_FIELDS = [f'spacing_{i}_{i + 1}' for i in range(1, MAX_AXLES)]
+# Column order expected by load_arrays(), e.g. for values_list(*AXLE_COLUMNS)
+AXLE_COLUMNS = ['num_axles'] + WEIGHT_FIELDS + TIRE_FIELDS + SPACING_FIELDS
+
+# Federal limits (lbs)
+SINGLE_AXLE_LIMIT = 20000
+TANDEM_LIMIT = 34000
+TRIDEM_LIMIT = 42000
+GROSS_LIMIT = 80000
+# 600 lbs per inch of tire width on 11" tires
+TIRE_LOAD_LIMIT = 6600
+# Axles closer than this (inches) belong to the same tandem/tridem group
+GROUP_SPACING_IN = 96
+
+
+class Violation(IntFlag):
+    """Bits describing which checks a permit fails."""
+    NONE = 0
+    BRIDGE = 1
+    AXLE_GROUP = 2
+    TIRE_LOAD = 4
+    GROSS = 8
+    # Dimension bits from the per-state rule tables (see state_rules.py),
+    # set when any state on the permit classifies that way
+    OVERSIZE = 16
+    ESCORT = 32
+    SUPERLOAD = 64
+
+
+OVERWEIGHT = Violation.BRIDGE | Violation.AXLE_GROUP | Violation.TIRE_LOAD | Violation.GROSS
+
+
+def flag_values(mask):
+    """Every bitmask value that has any bit of ``mask`` set.
+
+    Lets ``compliance_flags__in=flag_values(...)`` use the plain index on the
+    column instead of a bitwise expression.
+    """
+    return [v for v in range(1, max(Violation) * 2) if v & mask]
+
+
+# Group index helpers: I[i, j] = i, J[i, j] = j, N = axles in group i..j
+_I, _J = np.meshgrid(np.arange(MAX_AXLES), np.arange(MAX_AXLES), indexing='ij')
+_N = (_J - _I + 1).astype(np.float64)
+_UPPER = _J > _I
+
+
+def bridge_limit(length_ft, n_axles):
+    """W = 500(LN/(N-1) + 12N + 36), rounded to the nearest 500 lbs."""
+    length_ft = np.rint(length_ft)
+    n = np.asarray(n_axles, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w = 500 * (length_ft * n / (n - 1) + 12 * n + 36)
+    return np.rint(w / 500) * 500
+
+
+def load_arrays(rows):
+    """Turn rows of AXLE_COLUMNS values into (weights, tires, spacings_in, num_axles) arrays."""
+    data = np.array(rows, dtype=np.float64).reshape(-1, len(AXLE_COLUMNS))
+    num_axles = data[:, 0].astype(np.int64)
+    weights = data[:, 1:1 + MAX_AXLES]
+    tires = data[:, 1 + MAX_AXLES:1 + 2 * MAX_AXLES]
+    spacings = data[:, 1 + 2 * MAX_AXLES:]
+    return weights, tires, spacings, num_axles
+
+
+def evaluate(weights, tires, spacings_in, num_axles=None):
+    """Check a batch of axle layouts.
+
+    ``weights`` and ``tires`` are (P, 9), ``spacings_in`` is (P, 8). When
+    ``num_axles`` is missing or 0 for a row, the last axle with a weight
+    decides. Returns a dict of arrays:
+
+    - ``group_overload`` (P, 9, 9): bridge overload for group i..j (0 = ok)
+    - ``cluster`` (P, 9): tandem/tridem cluster id of each axle
+    - ``cluster_weight``/``cluster_limit``/``cluster_overload`` (P, 9): per
+      cluster id
+    - ``tire_overload`` (P, 9): lbs per tire above TIRE_LOAD_LIMIT
+    - ``gross_overload`` (P,)
+    - ``max_overload`` (P,): worst bridge, cluster or gross overload in lbs
+      (tire overload is per tire, so it only shows in ``tire_overload`` and
+      ``flags``)
+    - ``flags`` (P,): Violation bits
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    tires = np.asarray(tires, dtype=np.float64)
+    spacings_in = np.asarray(spacings_in, dtype=np.float64)
+    p = weights.shape[0]
+
+    # Effective axle count per permit
+    used = np.where(weights > 0, np.arange(1, MAX_AXLES + 1), 0).max(axis=1)
+    if num_axles is None:
+        n_axles = used
+    else:
+        n_axles = np.asarray(num_axles, dtype=np.int64)
+        n_axles = np.where(n_axles > 0, np.minimum(n_axles, MAX_AXLES), used)
+    present = np.arange(MAX_AXLES)[None, :] < n_axles[:, None]
+    weights = np.where(present, weights, 0)
+
+    # Axle positions (ft) and cumulative weights
+    positions = np.zeros((p, MAX_AXLES))
+    positions[:, 1:] = np.cumsum(spacings_in, axis=1) / 12
+    cum_w = np.zeros((p, MAX_AXLES + 1))
+    cum_w[:, 1:] = np.cumsum(weights, axis=1)
+
+    # Bridge formula over every group i..j
+    length = positions[:, None, :] - positions[:, :, None]          # [p, i, j] = pos_j - pos_i
+    group_w = cum_w[:, None, 1:] - cum_w[:, :-1, None]              # sum of axles i..j
+    allowed = bridge_limit(length, _N[None, :, :])
+    # Exception: two consecutive tandems 36 ft or more apart may carry 34,000 each
+    four = (_N == 4)[None, :, :] & (length >= 36)
+    allowed = np.where(four, np.maximum(allowed, 2 * TANDEM_LIMIT), allowed)
+    valid = _UPPER[None, :, :] & (_J[None, :, :] < n_axles[:, None, None])
+    group_overload = np.where(valid, np.maximum(group_w - allowed, 0), 0)
+
+    # Tandem / tridem / single clusters: a new cluster starts after a long spacing
+    breaks = np.ones((p, MAX_AXLES), dtype=bool)
+    breaks[:, 1:] = spacings_in > GROUP_SPACING_IN
+    cluster = np.cumsum(breaks, axis=1) - 1                         # cluster id per axle
+    flat = (cluster + np.arange(p)[:, None] * MAX_AXLES).ravel()
+    present_flat = present.ravel()
+    cluster_w = np.bincount(flat, weights=weights.ravel(), minlength=p * MAX_AXLES).reshape(p, MAX_AXLES)
+    cluster_n = np.bincount(flat, weights=present_flat, minlength=p * MAX_AXLES).reshape(p, MAX_AXLES)
+    cluster_limit = np.select(
+        [cluster_n == 1, cluster_n == 2, cluster_n == 3],
+        [SINGLE_AXLE_LIMIT, TANDEM_LIMIT, TRIDEM_LIMIT],
+        default=np.inf,  # 4+ axle clusters are covered by the bridge formula
+    )
+    cluster_overload = np.where(cluster_n > 0, np.maximum(cluster_w - cluster_limit, 0), 0)
+
+    # Tire load
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_tire = np.where(tires > 0, weights / tires, 0)
+    tire_overload = np.where(present, np.maximum(per_tire - TIRE_LOAD_LIMIT, 0), 0)
+
+    gross_overload = np.maximum(cum_w[:, -1] - GROSS_LIMIT, 0)
+
+    bridge_max = group_overload.reshape(p, -1).max(axis=1, initial=0)
+    cluster_max = cluster_overload.max(axis=1, initial=0)
+    tire_max = tire_overload.max(axis=1, initial=0)
+    max_overload = np.max([bridge_max, cluster_max, gross_overload], axis=0)
+
+    flags = (
+        (bridge_max > 0) * Violation.BRIDGE
+        | (cluster_max > 0) * Violation.AXLE_GROUP
+        | (tire_max > 0) * Violation.TIRE_LOAD
+        | (gross_overload > 0) * Violation.GROSS
+    ).astype(np.int64)
+
+    return {
+        'num_axles': n_axles,
+        'group_weight': group_w,
+        'group_allowed': allowed,
+        'group_overload': group_overload,
+        'cluster': cluster,
+        'cluster_weight': cluster_w,
+        'cluster_limit': cluster_limit,
+        'cluster_overload': cluster_overload,
+        'tire_overload': tire_overload,
+        'gross_overload': gross_overload,
+        'max_overload': max_overload,
+        'flags': flags,
+    }
+
+
+@dataclass
+class GroupResult:
+    first_axle: int
+    last_axle: int
+    weight: int
+    allowed: int
+
+    @property
+    def overload(self):
+        return self.weight - self.allowed
+
+
+@dataclass
+class ComplianceResult:
+    flags: int = 0
+    max_overload: int = 0
+    gross_weight: int = 0
+    overweight_groups: list = field(default_factory=list)
+    cluster_violations: list = field(default_factory=list)
+    tire_violations: list = field(default_factory=list)
+
+    @property
+    def is_compliant(self):
+        return self.flags == 0
+
+    @property
+    def violations(self):
+        return [v.name for v in Violation if v and self.flags & v]
+
+
+def check_permit(permit):
+    """Evaluate one PermitRequest (or anything with the axle attributes)."""
+    row = [getattr(permit, name) or 0 for name in AXLE_COLUMNS]
+    out = evaluate(*load_arrays([row]))
+
+    result = ComplianceResult(
+        flags=int(out['flags'][0]),
+        max_overload=int(out['max_overload'][0]),
+        gross_weight=int(out['group_weight'][0, 0, out['num_axles'][0] - 1]) if out['num_axles'][0] else 0,
+    )
+    for i, j in zip(*np.nonzero(out['group_overload'][0])):
+        result.overweight_groups.append(GroupResult(
+            first_axle=int(i) + 1,
+            last_axle=int(j) + 1,
+            weight=int(out['group_weight'][0, i, j]),
+            allowed=int(out['group_allowed'][0, i, j]),
+        ))
+    result.overweight_groups.sort(key=lambda g: -g.overload)
+    axles = np.arange(1, out['num_axles'][0] + 1)
+    for c in np.nonzero(out['cluster_overload'][0])[0]:
+        members = axles[out['cluster'][0, :len(axles)] == c]
+        result.cluster_violations.append(GroupResult(
+            first_axle=int(members[0]),
+            last_axle=int(members[-1]),
+            weight=int(out['cluster_weight'][0, c]),
+            allowed=int(out['cluster_limit'][0, c]),
+        ))
+    result.tire_violations = [
+        (int(i) + 1, int(out['tire_overload'][0, i])) for i in np.nonzero(out['tire_overload'][0])[0]
+    ]
+    return result
+
+
+# Denormalized columns on PermitRequest and the fields they are computed from
+DIMENSIONS = ['overall_length', 'overall_width', 'overall_height',
+              'front_overhang', 'rear_overhang', 'left_overhang', 'right_overhang']
+SUMMARY_FIELDS = [f'{d}_total_in' for d in DIMENSIONS] + ['max_axle_overload', 'compliance_flags']
+SUMMARY_INPUTS = (
+    [f'{d}_{unit}' for d in DIMENSIONS for unit in ('ft', 'in')]
+    + ['gross_weight'] + AXLE_COLUMNS
+)
+
+
+def summarize(rows, states):
+    """SUMMARY_FIELDS values for a batch of permits, computed in one vectorized pass.
+
+    ``rows`` are sequences of SUMMARY_INPUTS values (e.g. from
+    ``values_list(*SUMMARY_INPUTS)``); ``states`` holds each row's state codes.
+    """
+    # state_rules imports the models, which import this module
+    from .state_rules import Category, get_rules
+
+    if not len(rows):
+        return []
+    data = np.array(rows, dtype=np.float64).reshape(-1, len(SUMMARY_INPUTS))
+    n_dims = 2 * len(DIMENSIONS)
+    totals = (data[:, 0:n_dims:2] * 12 + data[:, 1:n_dims:2]).astype(np.int64)
+    out = evaluate(*load_arrays(data[:, n_dims + 1:]))
+    gross = data[:, n_dims].astype(np.int64)
+    gross = np.where(gross > 0, gross, out['group_weight'][:, 0, MAX_AXLES - 1].astype(np.int64))
+
+    rules = get_rules()
+    length, width, height = (DIMENSIONS.index(d) for d in ('overall_length', 'overall_width', 'overall_height'))
+    results = []
+    for n, codes in enumerate(states):
+        values = dict(zip(SUMMARY_FIELDS, map(int, totals[n])))
+        flags = int(out['flags'][n])
+        for state in codes:
+            category = rules.classify(
+                state, width=totals[n, width], height=totals[n, height],
+                length=totals[n, length], gross=gross[n],
+            ).category
+            if category >= Category.OVERSIZE:
+                flags |= Violation.OVERSIZE
+            if category >= Category.ESCORT:
+                flags |= Violation.ESCORT
+            if category == Category.SUPERLOAD:
+                flags |= Violation.SUPERLOAD
+        values['max_axle_overload'] = int(out['max_overload'][n])
+        values['compliance_flags'] = flags
+        results.append(values)
+    return results
@@ -0,0 +1,136 @@
+"""
+Optimistic concurrency for permit edits.
+
+Pages that edit a permit post back the ``version`` they were rendered with
+and a ``baseline`` of the values they showed. The baseline covers only the
+fields the page edits (it is readable in the page source, so it must not
+carry anything the user may not see). The view works out which of those
+fields the user actually edited against that baseline and writes only
+those, with the version in the UPDATE's WHERE clause
+(PermitRequest.save_changes()), so nothing is locked while the user edits:
+
+    fields = [*PermitStatusForm.Meta.fields, 'completed_at']
+    original = posted_baseline(request) or snapshot(permit, fields)
+    version = posted_version(request, permit)
+    form = PermitStatusForm(request.POST, instance=permit)
+    if form.is_valid():
+        permit = form.save(commit=False)
+        conflicts = save_merged(permit, changed_fields(permit, original, fields), version, original)
+        if not conflicts:
+            return redirect(...)
+        # re-render the form with the conflicts and the new version/baseline
+
+If someone else saved the permit in between, the save is retried on top of
+their version as long as they did not change any field this user edited.
+Otherwise ``merge_conflicts()`` lists those fields with both values so the
+page can ask which to keep. Set-based writers (bulk actions, the work
+queue, auto-assignment, autosave) bump ``version`` too.
+"""
+
+import json
+from dataclasses import dataclass
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+class StaleVersion(Exception):
+    """The permit changed since the client's version."""
+
+    def __init__(self, version):
+        super().__init__(version)
+        self.version = version
+
+
+def snapshot(instance, fields):
+    """The values of ``fields`` on the instance, as they round-trip through the baseline."""
+    values = {name: instance._meta.get_field(name).value_from_object(instance) for name in fields}
+    return json.loads(json.dumps(values, cls=DjangoJSONEncoder))
+
+
+def baseline(instance, fields):
+    """The ``baseline`` input for a page editing ``fields`` of ``instance``."""
+    return json.dumps(snapshot(instance, fields))
+
+
+def posted_baseline(request):
+    try:
+        original = json.loads(request.POST['baseline'])
+    except (KeyError, ValueError):
+        return None
+    return original if isinstance(original, dict) else None
+
+
+def posted_version(request, instance):
+    """The version the page was rendered with, or the instance's own if not posted."""
+    try:
+        return int(request.POST['version'])
+    except (KeyError, ValueError):
+        return instance.version
+
+
+def changed_fields(instance, original, fields):
+    """Names of the ``fields`` whose value differs from ``original`` (a snapshot())."""
+    return {
+        name for name, value in snapshot(instance, fields).items()
+        if name in original and original[name] != value
+    }
+
+
+def _display(instance, field):
+    value = field.value_from_object(instance)
+    if field.choices:
+        return dict(field.flatchoices).get(value, value)
+    if field.is_relation:
+        related = getattr(instance, field.name)
+        return str(related) if related is not None else '-'
+    return '-' if value in (None, '') else value
+
+
+@dataclass
+class FieldConflict:
+    name: str
+    label: str
+    current: object
+    yours: object
+    # What the "use current" button puts in the form input
+    current_value: object
+
+
+def merge_conflicts(instance, fields, original):
+    """The ``fields`` someone else also changed, to a different value, since ``original``."""
+    current = type(instance)._default_manager.get(pk=instance.pk)
+    theirs, mine = snapshot(current, fields), snapshot(instance, fields)
+    conflicts = []
+    for name in sorted(fields):
+        if theirs[name] == original.get(name) or theirs[name] == mine[name]:
+            continue
+        field = instance._meta.get_field(name)
+        conflicts.append(FieldConflict(
+            name=name,
+            label=str(field.verbose_name).capitalize(),
+            current=_display(current, field),
+            yours=_display(instance, field),
+            current_value='' if theirs[name] is None else theirs[name],
+        ))
+    return conflicts
+
+
+def save_merged(instance, fields, version, original, on_save=None):
+    """save_changes() in a transaction, calling ``on_save()`` in the same one.
+
+    Returns [] once saved, or the merge_conflicts() with someone else's
+    newer save (``instance.version`` is then set to theirs).
+    """
+    while True:
+        try:
+            with transaction.atomic():
+                instance.save_changes(fields, version)
+                if on_save is not None:
+                    on_save()
+            return []
+        except StaleVersion as e:
+            conflicts = merge_conflicts(instance, fields, original)
+            version = e.version
+            if conflicts:
+                instance.version = version
+                return conflicts
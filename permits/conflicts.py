@@ -0,0 +1,124 @@
+"""
+Equipment double-booking detection.
+
+Each permit's travel window is the span of its PermitState travel dates,
+stored on PermitRequest.travel_start/travel_end and indexed together with
+the truck, trailer and driver. Checking one permit is a single query over
+those indexes:
+
+    conflicts = find_conflicts(permit)
+
+``find_all_conflicts()`` reports every overlapping pair across the active
+permits using an in-memory IntervalIndex per vehicle and driver.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+
+from django.db.models import Q
+
+from .models import PermitRequest
+
+EQUIPMENT = ('truck', 'trailer', 'driver')
+
+# Drafts and cancelled permits do not hold equipment
+INACTIVE_STATUSES = [PermitRequest.Status.DRAFT, PermitRequest.Status.CANCELLED]
+
+
+@dataclass
+class Conflict:
+    equipment: str          # 'truck', 'trailer' or 'driver'
+    equipment_id: int
+    permit_id: int
+    other_id: int
+    start: date             # overlapping days
+    end: date
+
+
+def active_permits():
+    return PermitRequest.objects.exclude(status__in=INACTIVE_STATUSES).filter(
+        travel_start__isnull=False, travel_end__isnull=False,
+    )
+
+
+def find_conflicts(permit):
+    """Active permits sharing a truck, trailer or driver with ``permit`` on overlapping dates."""
+    if not permit.travel_start:
+        return []
+    equipment = {name: getattr(permit, f'{name}_id') for name in EQUIPMENT}
+    uses = Q()
+    for name, value in equipment.items():
+        if value:
+            uses |= Q(**{f'{name}_id': value})
+    if not uses:
+        return []
+
+    others = (
+        active_permits()
+        .filter(uses, travel_start__lte=permit.travel_end, travel_end__gte=permit.travel_start)
+        .exclude(pk=permit.pk)
+        .values_list('pk', 'travel_start', 'travel_end', *[f'{name}_id' for name in EQUIPMENT])
+    )
+    conflicts = []
+    for other_id, start, end, *other_equipment in others:
+        for name, other_value in zip(EQUIPMENT, other_equipment):
+            if other_value and other_value == equipment[name]:
+                conflicts.append(Conflict(
+                    name, other_value, permit.pk, other_id,
+                    max(start, permit.travel_start), min(end, permit.travel_end),
+                ))
+    return conflicts
+
+
+def describe(conflicts):
+    """Human-readable lines for messages and reports."""
+    numbers = dict(
+        PermitRequest.objects
+        .filter(pk__in={c.other_id for c in conflicts})
+        .values_list('pk', 'permit_number')
+    )
+    return [
+        f"{c.equipment.title()} is also on permit #{numbers.get(c.other_id, c.other_id)} "
+        f"({c.start:%m/%d/%Y}{'' if c.start == c.end else f' - {c.end:%m/%d/%Y}'})"
+        for c in conflicts
+    ]
+
+
+class IntervalIndex:
+    """Travel windows grouped per key (vehicle or driver id)."""
+
+    def __init__(self):
+        self._items = defaultdict(list)   # key -> [(start, end, permit_id)]
+
+    def add(self, key, start, end, permit_id):
+        self._items[key].append((start, end, permit_id))
+
+    def pairs(self):
+        """Every overlapping pair of windows, per key (sweep over start dates)."""
+        for key, items in self._items.items():
+            items.sort()
+            open_items = []
+            for start, end, permit_id in items:
+                open_items = [item for item in open_items if item[1] >= start]
+                for _, other_end, other_id in open_items:
+                    yield key, other_id, permit_id, start, min(end, other_end)
+                open_items.append((start, end, permit_id))
+
+
+def find_all_conflicts(permits=None):
+    """Every double booking among ``permits`` (default: all active permits)."""
+    permits = active_permits() if permits is None else permits
+    indexes = {name: IntervalIndex() for name in EQUIPMENT}
+    rows = permits.values_list('pk', 'travel_start', 'travel_end', *[f'{name}_id' for name in EQUIPMENT])
+    for permit_id, start, end, *equipment in rows.iterator():
+        for name, value in zip(EQUIPMENT, equipment):
+            if value:
+                indexes[name].add(value, start, end, permit_id)
+
+    conflicts = []
+    for name, index in indexes.items():
+        for key, first, second, start, end in index.pairs():
+            conflicts.append(Conflict(name, key, first, second, start, end))
+    conflicts.sort(key=lambda c: (c.start, c.equipment, c.permit_id))
+    return conflicts
@@ -0,0 +1,110 @@
+"""
+Near-duplicate permit detection.
+
+Every permit stores two hashes, refreshed with its states
+(PermitRequest.refresh_from_states):
+
+``fingerprint``
+    Exact match of the normalized permit: company, load description (case,
+    punctuation and word order ignored), origin and destination (common
+    street abbreviations folded), truck, trailer, overall dimensions,
+    gross weight, states and travel dates. Two permits with the same
+    fingerprint are almost certainly the same request entered twice.
+
+``similarity_key``
+    Coarse lane signature: company, origin and destination states and the
+    set of permit states. Matches are only reported when the travel
+    windows overlap (or a permit has no dates yet).
+
+Both are indexed together with ``created_at``, so ``find_duplicates()``
+is two index range scans over settings.DUPLICATE_WINDOW_DAYS around the
+permit's creation date.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .routing import address_state
+
+FINGERPRINT_FIELDS = [
+    'company_id', 'load_description', 'origin_address', 'destination_address',
+    'truck_id', 'trailer_id', 'overall_length_total_in', 'overall_width_total_in',
+    'overall_height_total_in', 'gross_weight',
+]
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+ABBREVIATIONS = {
+    'street': 'st', 'avenue': 'ave', 'road': 'rd', 'drive': 'dr', 'boulevard': 'blvd',
+    'highway': 'hwy', 'lane': 'ln', 'court': 'ct', 'parkway': 'pkwy', 'suite': 'ste',
+    'north': 'n', 'south': 's', 'east': 'e', 'west': 'w',
+}
+
+
+def words(text):
+    return [ABBREVIATIONS.get(word, word) for word in _WORD_RE.findall((text or '').lower())]
+
+
+def _digest(parts, size):
+    return hashlib.blake2b('\x1f'.join(str(part) for part in parts).encode(), digest_size=size).hexdigest()
+
+
+def compute(permit, states, travel_start=None, travel_end=None):
+    """``(fingerprint, similarity_key)`` of a permit with the given state codes."""
+    values = []
+    for name in FINGERPRINT_FIELDS:
+        value = getattr(permit, name)
+        if name == 'load_description':
+            value = ' '.join(sorted(words(value)))
+        elif name.endswith('_address'):
+            value = ' '.join(words(value))
+        values.append('' if value is None else value)
+    ordered_states = ','.join(sorted(states))
+    fingerprint = _digest(values + [ordered_states, travel_start or '', travel_end or ''], 16)
+    similarity_key = _digest([
+        permit.company_id,
+        address_state(permit.origin_address),
+        address_state(permit.destination_address),
+        ordered_states,
+    ], 8)
+    return fingerprint, similarity_key
+
+
+@dataclass
+class Duplicate:
+    permit: object
+    exact: bool
+
+
+def find_duplicates(permit):
+    """Other permits that look like the same request, exact matches first."""
+    from .models import PermitRequest
+
+    if not permit.fingerprint:
+        return []
+    created = permit.created_at or timezone.now()
+    window = timedelta(days=settings.DUPLICATE_WINDOW_DAYS)
+    overlapping = (
+        Q(travel_start__isnull=True)
+        | Q(travel_start__lte=permit.travel_end, travel_end__gte=permit.travel_start)
+        if permit.travel_start else Q()
+    )
+    candidates = (
+        PermitRequest.objects
+        .filter(
+            Q(fingerprint=permit.fingerprint) | (Q(similarity_key=permit.similarity_key) & overlapping),
+            created_at__range=(created - window, created + window),
+        )
+        .exclude(pk=permit.pk)
+        .exclude(status=PermitRequest.Status.CANCELLED)
+        .order_by('-created_at')[:10]
+    )
+    duplicates = [Duplicate(other, other.fingerprint == permit.fingerprint) for other in candidates]
+    duplicates.sort(key=lambda d: not d.exact)
+    return duplicates
@@ -1,5 +1,7 @@
 from django import forms
 from django.forms import inlineformset_factory
+from dashboard.bulk import MAX_PERMITS as MAX_BULK_PERMITS
+from .cloning import MAX_CLONES
 from .models import PermitRequest, PermitState, PermitAxleDetail, PermitDocument
 
 
@@ -226,3 +228,82 @@ class EmailForm(forms.Form):
         })
     )
 
+
+
+class RecurringPermitForm(forms.Form):
+    """Form for scheduling copies of a permit on a recurring lane."""
+    
+    first_date = forms.DateField(
+        label='First travel date',
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'})
+    )
+    count = forms.IntegerField(
+        label='Number of permits',
+        min_value=1,
+        max_value=MAX_CLONES,
+        initial=4,
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+    every_days = forms.IntegerField(
+        label='Repeat every (days)',
+        min_value=1,
+        max_value=365,
+        initial=7,
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+
+
+class BulkActionForm(forms.Form):
+    """Form for applying one action to the permits selected on the employee dashboard."""
+    
+    ACTIONS = [
+        ('assign', 'Assign to'),
+        ('status', 'Change status to'),
+        ('invoiced', 'Mark invoiced'),
+        ('comment', 'Add internal comment'),
+    ]
+    
+    action = forms.ChoiceField(
+        choices=ACTIONS,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    assigned_to = forms.ModelChoiceField(
+        queryset=None,
+        required=False,
+        empty_label='Select employee',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    status = forms.ChoiceField(
+        choices=[('', 'Select status')] + PermitRequest.Status.choices,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    message = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Internal comment'})
+    )
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        from accounts.models import User
+        self.fields['assigned_to'].queryset = User.objects.filter(
+            user_type__in=[User.UserType.EMPLOYEE, User.UserType.ADMIN]
+        )
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        try:
+            permits = sorted({int(value) for value in self.data.getlist('permits')})
+        except ValueError:
+            raise forms.ValidationError('Invalid permit selection.')
+        if not permits:
+            raise forms.ValidationError('Select at least one permit.')
+        if len(permits) > MAX_BULK_PERMITS:
+            raise forms.ValidationError(f'Select at most {MAX_BULK_PERMITS} permits at a time.')
+        cleaned_data['permits'] = permits
+        
+        action = cleaned_data.get('action')
+        required = {'assign': 'assigned_to', 'status': 'status', 'comment': 'message'}.get(action)
+        if required and not cleaned_data.get(required):
+            self.add_error(required, 'This field is required for the selected action.')
+        return cleaned_data
@@ -0,0 +1,78 @@
+"""
+Permit status history.
+
+Every path that changes a permit's status appends a PermitStatusChange in
+the same transaction as the change itself:
+
+    previous = permit.status
+    ...
+    with transaction.atomic():
+        permit.save()
+        record(permit, previous, request.user, PermitStatusChange.Source.FORM)
+
+Set-based changes pass the (id, old status) pairs they read before their
+UPDATE to ``record_many()``, which writes them with one bulk_create. Rows
+are never changed or deleted afterwards, other than by cascade when the
+permit itself is deleted.
+
+Timelines read the (permit, changed_at) index; ``throughput()`` reads
+(changed_by, to_status, changed_at).
+"""
+
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import PermitRequest, PermitStatusChange
+
+
+def _actor(user):
+    return user if user is not None and user.is_authenticated else None
+
+
+def record(permit, from_status, user, source, at=None):
+    """Log ``permit``'s move from ``from_status`` to its current status, if it moved."""
+    if from_status == permit.status:
+        return None
+    return PermitStatusChange.objects.create(
+        permit=permit,
+        from_status=from_status or '',
+        to_status=permit.status,
+        changed_by=_actor(user),
+        source=source,
+        changed_at=at or timezone.now(),
+    )
+
+
+def record_many(changes, to_status, user, source, at=None):
+    """Log many permits moving to ``to_status``; ``changes`` is (permit_id, from_status) pairs."""
+    at = at or timezone.now()
+    actor = _actor(user)
+    return PermitStatusChange.objects.bulk_create([
+        PermitStatusChange(
+            permit_id=permit_id,
+            from_status=from_status or '',
+            to_status=to_status,
+            changed_by=actor,
+            source=source,
+            changed_at=at,
+        )
+        for permit_id, from_status in changes
+        if from_status != to_status
+    ])
+
+
+def throughput(since, until=None, to_status=PermitRequest.Status.COMPLETED):
+    """``(changed_by_id, day, count)`` rows: permits each employee moved to ``to_status`` per day."""
+    changes = PermitStatusChange.objects.filter(
+        changed_by__isnull=False, to_status=to_status, changed_at__gte=since,
+    )
+    if until:
+        changes = changes.filter(changed_at__lt=until)
+    return (
+        changes
+        .annotate(day=TruncDate('changed_at'))
+        .values_list('changed_by', 'day')
+        .annotate(count=Count('id'))
+        .order_by('changed_by', 'day')
+    )
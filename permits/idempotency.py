@@ -0,0 +1,187 @@
+"""
+Idempotency keys for form POSTs.
+
+Forms that create or change things carry a one-time key (``{% idempotency_field %}``
+from the ``idempotency`` template tags; API clients send an
+``Idempotency-Key`` header instead). The first POST with a key claims it by
+inserting an IdempotencyKey row, runs the view and stores the response:
+
+    @login_required
+    @idempotent
+    def permit_create(request):
+        ...
+
+A double-click, refresh or client retry with the same key gets the stored
+response (the same redirect and flash messages, or the same JSON) without
+running the view again. The unique constraint on (user, scope, key) makes
+the claim atomic across workers; a repeat that arrives while the first
+request is still running waits for it to finish.
+
+Only redirects and JSON are stored. Anything else (a form re-rendered with
+errors) releases the key so the request can be retried. Keys are purged
+after settings.IDEMPOTENCY_TTL_HOURS by a periodic task.
+"""
+
+import hashlib
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+FIELD_NAME = 'idempotency_key'
+HEADER = 'Idempotency-Key'
+POLL_SECONDS = 0.2
+MAX_BODY = 64 * 1024
+
+FORM_CONTENT_TYPES = ('multipart/form-data', 'application/x-www-form-urlencoded')
+
+
+def request_hash(request):
+    """Fingerprint of the submitted data, to catch a key reused for a different request."""
+    digest = hashlib.sha256()
+    if request.content_type in FORM_CONTENT_TYPES:
+        for name in sorted(request.POST):
+            if name in ('csrfmiddlewaretoken', FIELD_NAME):
+                continue
+            for value in request.POST.getlist(name):
+                digest.update(f'{name}={value}\0'.encode())
+        for name in sorted(request.FILES):
+            for f in request.FILES.getlist(name):
+                digest.update(f'{name}:{f.name}:{f.size}\0'.encode())
+    else:
+        digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _claim(request, scope, key, fingerprint):
+    """Insert the key; returns (record, True) if this request owns it."""
+    while True:
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    user=request.user, scope=scope, key=key, request_hash=fingerprint,
+                ), True
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(user=request.user, scope=scope, key=key).first()
+            if record is not None:
+                return record, False
+            # Released between our insert and the lookup; try again
+
+
+def _take_over(record):
+    """Claim a key whose first request never finished (the worker died)."""
+    cutoff = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+    if record.claimed_at >= cutoff:
+        return False
+    now = timezone.now()
+    taken = IdempotencyKey.objects.filter(
+        pk=record.pk, response_status__isnull=True, claimed_at=record.claimed_at,
+    ).update(claimed_at=now)
+    record.claimed_at = now
+    return bool(taken)
+
+
+def _wait_for(record):
+    """Poll until the first request finishes.
+
+    Returns the record with its stored response, the unfinished record on
+    timeout, or None if the first request released the key.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(POLL_SECONDS)
+        record = IdempotencyKey.objects.filter(pk=record.pk).first()
+        if record is None or record.response_status is not None:
+            return record
+    return record
+
+
+def _message_count(request):
+    storage = messages.get_messages(request)
+    count = len(list(storage))
+    storage.used = False
+    return count
+
+
+def _new_messages(request, before):
+    storage = messages.get_messages(request)
+    queued = [(m.level, m.message) for m in storage][before:]
+    storage.used = False
+    return queued
+
+
+def _store(record, request, response, before):
+    cacheable = (
+        300 <= response.status_code < 400
+        or response.get('Content-Type', '').startswith('application/json')
+    )
+    if response.streaming or not cacheable or len(response.content) > MAX_BODY:
+        record.delete()
+        return
+    record.response_status = response.status_code
+    record.response_headers = {
+        name: response[name] for name in ('Content-Type', 'Location') if response.has_header(name)
+    }
+    record.response_body = response.content.decode(response.charset or 'utf-8')
+    record.response_messages = _new_messages(request, before)
+    record.save(update_fields=[
+        'response_status', 'response_headers', 'response_body', 'response_messages',
+    ])
+
+
+def _replay(request, record):
+    for level, text in record.response_messages:
+        messages.add_message(request, level, text)
+    response = HttpResponse(record.response_body, status=record.response_status)
+    for name, value in record.response_headers.items():
+        response[name] = value
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view):
+    """Run a POST view at most once per idempotency key (see module docstring)."""
+    scope = f'{view.__module__}.{view.__name__}'
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER) or request.POST.get(FIELD_NAME)
+        if request.method != 'POST' or not key or not request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+        if len(key) > 100:
+            return HttpResponse('Idempotency key too long.', status=400)
+
+        fingerprint = request_hash(request)
+        record, owner = _claim(request, scope, key, fingerprint)
+        if not owner:
+            if record.request_hash != fingerprint:
+                return HttpResponse('Idempotency key was already used for a different request.', status=422)
+            if record.response_status is None:
+                owner = _take_over(record)
+                if not owner:
+                    record = _wait_for(record)
+                    if record is None:
+                        # The first request failed or its response was not kept; run this one
+                        record, owner = _claim(request, scope, key, fingerprint)
+                    if not owner and record.response_status is None:
+                        return HttpResponse('This request is still being processed. Please wait.', status=409)
+            if not owner:
+                return _replay(request, record)
+
+        before = _message_count(request)
+        try:
+            response = view(request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+        _store(record, request, response, before)
+        return response
+
+    return wrapper
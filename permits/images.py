@@ -0,0 +1,114 @@
+"""
+Preview and thumbnail generation for uploaded photos.
+
+Image work never runs in the request: uploads enqueue a background job, and
+the job renders in a process pool. The pool function only deals with bytes so
+it needs no Django setup; reading the upload and saving the renditions
+happens in the calling process.
+"""
+
+import io
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.tif', '.tiff')
+IMAGE_NAME_REGEX = r'\.(jpe?g|png|gif|webp|bmp|tiff?)$'  # for __iregex lookups
+
+# Formats an oversized original is re-encoded in, keeping its format
+REENCODE_FORMATS = ('JPEG', 'PNG', 'WEBP')
+
+_pool = None
+
+
+def is_image(name):
+    return posixpath.splitext(name or '')[1].lower() in IMAGE_EXTENSIONS
+
+
+def get_pool():
+    """Shared process pool, created on first use."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+    return _pool
+
+
+def _encode(img, max_side, fmt='JPEG', quality=80):
+    img = img.copy()
+    img.thumbnail((max_side, max_side))
+    if fmt == 'JPEG' and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    out = io.BytesIO()
+    img.save(out, fmt, quality=quality, optimize=True)
+    return out.getvalue()
+
+
+def render_renditions(data, preview_size, thumbnail_size, reencode_over_bytes=0, reencode_max_side=3000):
+    """Return (preview, thumbnail, original) bytes for one image upload.
+
+    ``original`` is a smaller re-encode of the upload in its own format, or
+    None when the file is under ``reencode_over_bytes`` (0 disables
+    re-encoding), is not in a format we write back (the file keeps its name
+    and extension) or re-encoding would not shrink it.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as img:
+        fmt = img.format
+        img = ImageOps.exif_transpose(img)
+        preview = _encode(img, preview_size)
+        thumbnail = _encode(img, thumbnail_size, quality=70)
+        original = None
+        if reencode_over_bytes and len(data) > reencode_over_bytes and fmt in REENCODE_FORMATS:
+            original = _encode(img, reencode_max_side, fmt=fmt, quality=85)
+            if len(original) >= len(data):
+                original = None
+    return preview, thumbnail, original
+
+
+def _submit_render(obj):
+    with obj.file.open('rb') as f:
+        data = f.read()
+    return get_pool().submit(
+        render_renditions, data,
+        settings.IMAGE_PREVIEW_SIZE,
+        settings.IMAGE_THUMBNAIL_SIZE,
+        settings.IMAGE_REENCODE_OVER_BYTES,
+        settings.IMAGE_REENCODE_MAX_SIDE,
+    )
+
+
+def save_renditions(obj, preview, thumbnail, original=None):
+    """Store rendered bytes on ``obj`` without calling its ``save()``."""
+    base = posixpath.splitext(posixpath.basename(obj.file.name))[0]
+    obj.preview.save(f'{base}.jpg', ContentFile(preview), save=False)
+    obj.thumbnail.save(f'{base}.jpg', ContentFile(thumbnail), save=False)
+    fields = ['preview', 'thumbnail']
+    if original:
+        old_name = obj.file.name
+        obj.file.save(posixpath.basename(old_name), ContentFile(original), save=False)
+        obj.file.storage.delete(old_name)
+        fields.append('file')
+    type(obj).objects.filter(pk=obj.pk).update(**{f: getattr(obj, f).name for f in fields})
+
+
+def build_renditions(obj):
+    """Generate and store the renditions for ``obj``, waiting for the pool."""
+    save_renditions(obj, *_submit_render(obj).result())
+
+
+def schedule_renditions(obj):
+    """Queue a background job that builds the renditions for ``obj``."""
+    if not is_image(obj.file.name) or obj.preview:
+        return
+    from jobs.queue import enqueue
+    enqueue(build_renditions_job, args=[obj._meta.label, obj.pk])
+
+
+def build_renditions_job(model_label, pk):
+    obj = apps.get_model(model_label).objects.filter(pk=pk).first()
+    if obj is not None and not obj.preview:
+        build_renditions(obj)
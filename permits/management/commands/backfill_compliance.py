@@ -0,0 +1,39 @@
+"""
+Recompute the denormalized compliance columns on PermitRequest.
+
+    python manage.py backfill_compliance
+    python manage.py backfill_compliance --batch-size 2000 --start-after 150000
+
+Permits are walked in primary key order; each batch is evaluated in one
+vectorized pass and written back with bulk_update, so the command can be
+stopped and resumed with --start-after. For large archives use
+``revalidate_permits``, which spreads the batches over several processes.
+"""
+
+from django.core.management.base import BaseCommand
+
+from permits.models import PermitRequest
+from permits.revalidate import revalidate_ids
+
+
+class Command(BaseCommand):
+    help = 'Recompute compliance summary columns for existing permits'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--start-after', type=int, default=0, help='Resume after this permit id')
+
+    def handle(self, *args, **options):
+        permits = PermitRequest.objects.order_by('pk').values_list('pk', flat=True)
+        last_pk = options['start_after']
+        done = 0
+        while True:
+            ids = list(permits.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not ids:
+                break
+            last_pk = ids[-1]
+            checked, _ = revalidate_ids(ids, write_all=True)
+            done += checked
+            self.stdout.write(f'  {done} permits, through id {last_pk}')
+
+        self.stdout.write(self.style.SUCCESS(f'Recomputed {done} permit(s)'))
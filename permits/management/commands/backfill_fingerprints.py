@@ -0,0 +1,43 @@
+"""
+Compute the duplicate detection hashes for existing permits.
+
+    python manage.py backfill_fingerprints
+    python manage.py backfill_fingerprints --batch-size 2000 --start-after 150000
+
+Permits are walked in primary key order with their states prefetched and
+written back with bulk_update, so the command can be stopped and resumed
+with --start-after. New and edited permits get their hashes when their
+states are saved.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+
+from permits.models import PermitRequest, PermitState
+
+
+class Command(BaseCommand):
+    help = 'Compute fingerprint and similarity_key for existing permits'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--start-after', type=int, default=0, help='Resume after this permit id')
+
+    def handle(self, *args, **options):
+        states = Prefetch('states', queryset=PermitState.objects.only('permit_id', 'state', 'travel_date'))
+        permits = PermitRequest.objects.order_by('pk').prefetch_related(states)
+        last_pk = options['start_after']
+        done = 0
+        while True:
+            batch = list(permits.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for permit in batch:
+                rows = list(permit.states.all())
+                permit.apply_states([s.state for s in rows], [s.travel_date for s in rows])
+            PermitRequest.objects.bulk_update(batch, ['fingerprint', 'similarity_key'])
+            done += len(batch)
+            self.stdout.write(f'  {done} permits, through id {last_pk}')
+
+        self.stdout.write(self.style.SUCCESS(f'Fingerprinted {done} permit(s)'))
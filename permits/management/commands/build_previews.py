@@ -0,0 +1,69 @@
+"""
+Build previews and thumbnails for image uploads that do not have them yet.
+
+    python manage.py build_previews --workers 4
+
+New uploads are handled automatically after they are saved; this command
+backfills older files (or ones whose background render failed).
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dashboard.models import EmailAttachment
+from permits.images import IMAGE_NAME_REGEX, render_renditions, save_renditions
+from permits.models import PermitDocument
+
+
+class Command(BaseCommand):
+    help = 'Generate image previews/thumbnails for existing uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.IMAGE_WORKERS)
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            for model in (PermitDocument, EmailAttachment):
+                self.build(pool, model, options['batch_size'])
+
+    def build(self, pool, model, batch_size):
+        pending = model.objects.filter(preview='', file__iregex=IMAGE_NAME_REGEX).order_by('pk')
+        done = failed = 0
+        last_pk = 0
+        while True:
+            batch = list(pending.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            futures = {}
+            for obj in batch:
+                try:
+                    with obj.file.open('rb') as f:
+                        data = f.read()
+                except OSError as e:
+                    failed += 1
+                    self.stderr.write(f'  {model._meta.label} #{obj.pk}: {e}')
+                    continue
+                future = pool.submit(
+                    render_renditions, data,
+                    settings.IMAGE_PREVIEW_SIZE,
+                    settings.IMAGE_THUMBNAIL_SIZE,
+                    settings.IMAGE_REENCODE_OVER_BYTES,
+                    settings.IMAGE_REENCODE_MAX_SIDE,
+                )
+                futures[future] = obj
+
+            for future in as_completed(futures):
+                obj = futures[future]
+                try:
+                    save_renditions(obj, *future.result())
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'  {model._meta.label} #{obj.pk}: {e}')
+
+        self.stdout.write(self.style.SUCCESS(f'{model._meta.label}: {done} built, {failed} failed'))
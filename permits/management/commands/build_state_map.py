@@ -0,0 +1,213 @@
+"""
+Build the pre-projected US state map used by the dimensions map page.
+
+    python manage.py build_state_map path/to/cb_2018_us_state_20m.shp
+
+Reads a Census cartographic boundary shapefile of the states (any
+``cb_*_us_state_*`` release; the matching .dbf must sit next to it),
+projects it with the Albers USA layout (Alaska and Hawaii as insets, the
+same 975x610 frame as us-atlas' states-albers-10m.json), simplifies the
+outlines and writes ``static/maps/us-states.svg``.
+
+The output is committed, so this only needs to run when the source data or
+the simplification changes. collectstatic fingerprints and compresses it
+and WhiteNoise serves it with a far-future cache lifetime, so the map page
+needs no third-party requests.
+"""
+
+import math
+import struct
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+WIDTH, HEIGHT = 975, 610
+SCALE = 1300
+
+# Territories in the Census files that are not drawn
+SKIP = {'PR', 'VI', 'GU', 'AS', 'MP'}
+
+
+class ConicEqualArea:
+    """Albers equal-area conic, parameterised like d3.geoConicEqualArea."""
+
+    def __init__(self, parallels, rotate, center, scale, translate):
+        phi0, phi1 = (math.radians(p) for p in parallels)
+        sy0 = math.sin(phi0)
+        self.n = (sy0 + math.sin(phi1)) / 2
+        self.c = 1 + sy0 * (2 * self.n - sy0)
+        self.r0 = math.sqrt(self.c) / self.n
+        self.rotate = rotate
+        self.k = scale
+        cx, cy = self._raw(*center, rotated=True)
+        self.dx = translate[0] - cx * scale
+        self.dy = translate[1] + cy * scale
+
+    def _raw(self, lon, lat, rotated=False):
+        if not rotated:
+            lon = (lon + self.rotate + 180) % 360 - 180
+        lam, phi = math.radians(lon), math.radians(lat)
+        r = math.sqrt(max(self.c - 2 * self.n * math.sin(phi), 0)) / self.n
+        return r * math.sin(lam * self.n), self.r0 - r * math.cos(lam * self.n)
+
+    def __call__(self, lon, lat):
+        x, y = self._raw(lon, lat)
+        return self.dx + x * self.k, self.dy - y * self.k
+
+
+def albers_usa(scale=SCALE, translate=(WIDTH / 2, HEIGHT / 2)):
+    """Projection per state, mirroring d3.geoAlbersUsa's insets."""
+    x, y = translate
+    lower48 = ConicEqualArea((29.5, 45.5), 96, (-0.6, 38.7), scale, translate)
+    alaska = ConicEqualArea((55, 65), 154, (-2, 58.5), scale * 0.35,
+                            (x - 0.307 * scale, y + 0.201 * scale))
+    hawaii = ConicEqualArea((8, 18), 157, (-3, 19.9), scale,
+                            (x - 0.205 * scale, y + 0.212 * scale))
+    return lambda state: {'AK': alaska, 'HI': hawaii}.get(state, lower48)
+
+
+def read_dbf(path):
+    """Records of a dBase III file as dicts of stripped strings."""
+    data = Path(path).read_bytes()
+    count, header_len, record_len = struct.unpack('<xxxxIHH', data[:12])
+    fields = []
+    for offset in range(32, header_len - 1, 32):
+        name = data[offset:offset + 11].split(b'\0', 1)[0].decode('ascii')
+        fields.append((name, data[offset + 16]))
+    records = []
+    for i in range(count):
+        pos = header_len + i * record_len + 1  # skip the deletion flag
+        record = {}
+        for name, size in fields:
+            record[name] = data[pos:pos + size].decode('latin-1').strip()
+            pos += size
+        records.append(record)
+    return records
+
+
+def read_polygons(path):
+    """Rings (lists of (lon, lat)) of each polygon record in a .shp file."""
+    data = Path(path).read_bytes()
+    pos = 100
+    shapes = []
+    while pos < len(data):
+        _, length = struct.unpack('>ii', data[pos:pos + 8])
+        content = data[pos + 8:pos + 8 + length * 2]
+        pos += 8 + length * 2
+        shape_type = struct.unpack('<i', content[:4])[0]
+        if shape_type != 5:
+            shapes.append([])
+            continue
+        num_parts, num_points = struct.unpack('<ii', content[36:44])
+        parts = list(struct.unpack(f'<{num_parts}i', content[44:44 + 4 * num_parts])) + [num_points]
+        start = 44 + 4 * num_parts
+        points = struct.unpack(f'<{2 * num_points}d', content[start:start + 16 * num_points])
+        shapes.append([
+            [(points[2 * i], points[2 * i + 1]) for i in range(parts[p], parts[p + 1])]
+            for p in range(num_parts)
+        ])
+    return shapes
+
+
+def simplify(points, tolerance):
+    """Douglas-Peucker."""
+    if len(points) < 3:
+        return points
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = points[first], points[last]
+        dx, dy = x2 - x1, y2 - y1
+        norm = math.hypot(dx, dy) or 1e-12
+        best, index = 0, None
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if dx or dy:
+                d = abs(dy * px - dx * py + x2 * y1 - y2 * x1) / norm
+            else:
+                d = math.hypot(px - x1, py - y1)
+            if d > best:
+                best, index = d, i
+        if index is not None and best > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [p for p, k in zip(points, keep) if k]
+
+
+def ring_area_centroid(ring):
+    area = cx = cy = 0.0
+    for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]):
+        cross = x0 * y1 - x1 * y0
+        area += cross
+        cx += (x0 + x1) * cross
+        cy += (y0 + y1) * cross
+    area /= 2
+    if not area:
+        return 0.0, ring[0]
+    return area, (cx / (6 * area), cy / (6 * area))
+
+
+class Command(BaseCommand):
+    help = 'Project and simplify a Census state shapefile into static/maps/us-states.svg'
+
+    def add_arguments(self, parser):
+        parser.add_argument('shapefile', help='cb_*_us_state_*.shp (with the .dbf alongside)')
+        parser.add_argument('--tolerance', type=float, default=0.4, help='Simplification tolerance in pixels')
+        parser.add_argument('--min-area', type=float, default=1.0, help='Drop islands smaller than this (px²)')
+        parser.add_argument('--output', default=str(Path(settings.BASE_DIR) / 'static' / 'maps' / 'us-states.svg'))
+
+    def handle(self, *args, **options):
+        shp = Path(options['shapefile'])
+        dbf = shp.with_suffix('.dbf')
+        if not shp.exists() or not dbf.exists():
+            raise CommandError(f'Need both {shp} and {dbf}')
+
+        records = read_dbf(dbf)
+        shapes = read_polygons(shp)
+        projection_for = albers_usa()
+        tolerance, min_area = options['tolerance'], options['min_area']
+
+        states = []
+        for record, rings in zip(records, shapes):
+            code = record.get('STUSPS')
+            if not code or code in SKIP:
+                continue
+            project = projection_for(code)
+            commands = []
+            largest = (0, None)
+            for ring in rings:
+                projected = simplify([project(lon, lat) for lon, lat in ring], tolerance)
+                area, centroid = ring_area_centroid(projected)
+                if abs(area) < min_area or len(projected) < 4:
+                    continue
+                if abs(area) > largest[0]:
+                    largest = (abs(area), centroid)
+                coords = ['%.1f %.1f' % p for p in projected[:-1]]
+                commands.append('M' + 'L'.join(coords) + 'Z')
+            if commands:
+                states.append((code, ''.join(commands), largest[1]))
+
+        states.sort()
+        lines = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {WIDTH} {HEIGHT}">',
+            '<g class="states-group">',
+        ]
+        for code, d, _ in states:
+            lines.append(f'<path class="state-path" data-state="{code}" d="{d}"/>')
+        lines.append('</g>')
+        lines.append('<g class="state-labels-group" font-size="10" font-weight="600" fill="#555" text-anchor="middle" dominant-baseline="central">')
+        for code, _, (x, y) in states:
+            lines.append(f'<text class="state-abbr-label" x="{x:.1f}" y="{y:.1f}">{code}</text>')
+        lines.append('</g>')
+        lines.append('</svg>')
+
+        output = Path(options['output'])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {len(states)} states to {output} ({output.stat().st_size // 1024} KB)'
+        ))
@@ -0,0 +1,45 @@
+"""
+Report trucks, trailers and drivers booked on overlapping permits.
+
+    python manage.py equipment_conflicts
+    python manage.py equipment_conflicts --from 2026-01-01
+
+Only active permits (not drafts or cancelled) with travel dates are
+considered.
+"""
+
+from django.core.management.base import BaseCommand
+
+from fleet.models import Driver, Vehicle
+from permits.conflicts import active_permits, find_all_conflicts
+from permits.models import PermitRequest
+
+
+class Command(BaseCommand):
+    help = 'List equipment double-bookings across active permits'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='Only permits travelling on or after this date (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        permits = active_permits()
+        if options['date_from']:
+            permits = permits.filter(travel_end__gte=options['date_from'])
+        conflicts = find_all_conflicts(permits)
+
+        numbers = dict(
+            PermitRequest.objects
+            .filter(pk__in={c.permit_id for c in conflicts} | {c.other_id for c in conflicts})
+            .values_list('pk', 'permit_number')
+        )
+        vehicles = Vehicle.objects.in_bulk({c.equipment_id for c in conflicts if c.equipment != 'driver'})
+        drivers = Driver.objects.in_bulk({c.equipment_id for c in conflicts if c.equipment == 'driver'})
+
+        for c in conflicts:
+            names = drivers if c.equipment == 'driver' else vehicles
+            dates = f'{c.start:%m/%d/%Y}' if c.start == c.end else f'{c.start:%m/%d/%Y} - {c.end:%m/%d/%Y}'
+            self.stdout.write(
+                f'{dates}  {c.equipment} {names.get(c.equipment_id, c.equipment_id)}: '
+                f'#{numbers[c.permit_id]} and #{numbers[c.other_id]}'
+            )
+        self.stdout.write(self.style.SUCCESS(f'{len(conflicts)} conflict(s)'))
@@ -0,0 +1,131 @@
+"""
+Re-evaluate compliance for open and recent permits after rules change.
+
+    python manage.py revalidate_permits
+    python manage.py revalidate_permits --all --workers 8 --checkpoint /tmp/revalidate.ckpt
+
+Permit ids are streamed in chunks to a pool of worker processes. Each worker
+loads the axle and dimension columns with values_list, evaluates the whole
+chunk vectorized and bulk_updates only the rows whose stored flags changed,
+so the work scales with the number of cores until the database becomes the
+bottleneck.
+
+With --checkpoint the highest id below which every chunk has finished is
+written to the file as chunks complete; running the same command again
+resumes from there. The file is removed after a complete run.
+"""
+
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from permits.models import PermitRequest
+from permits.revalidate import init_process, revalidate_ids
+
+OPEN_STATUSES = [
+    PermitRequest.Status.DRAFT,
+    PermitRequest.Status.PENDING,
+    PermitRequest.Status.IN_PROGRESS,
+]
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = 'Re-evaluate compliance columns for open and recent permits using a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--days', type=int, default=90, help='Also include permits created in the last N days')
+        parser.add_argument('--all', action='store_true', help='Revalidate the whole archive')
+        parser.add_argument('--start-after', type=int, default=0, help='Skip permits up to this id')
+        parser.add_argument('--checkpoint', help='File recording progress; resumes from it if present')
+
+    def handle(self, *args, **options):
+        start_after = options['start_after']
+        checkpoint = options['checkpoint']
+        if checkpoint and os.path.exists(checkpoint):
+            with open(checkpoint) as f:
+                start_after = max(start_after, int(f.read().strip() or 0))
+            self.stdout.write(f'Resuming after permit id {start_after}')
+
+        permits = PermitRequest.objects.filter(pk__gt=start_after)
+        if not options['all']:
+            recent = timezone.now() - timedelta(days=options['days'])
+            permits = permits.filter(Q(status__in=OPEN_STATUSES) | Q(created_at__gte=recent))
+        total = permits.count()
+        self.stdout.write(f'Revalidating {total} permit(s) with {options["workers"]} worker(s)')
+
+        self.total = total
+        self.checked = self.changed = 0
+        self.started = time.monotonic()
+        self.safe_id = start_after
+        # Last id of each submitted chunk in order, and the ones that finished
+        self.submitted = deque()
+        self.finished = set()
+
+        ids = permits.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=options['chunk_size'])
+        max_pending = options['workers'] * 2
+        with ProcessPoolExecutor(
+            max_workers=options['workers'],
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_process,
+        ) as pool:
+            pending = {}
+            for chunk in chunked(ids, options['chunk_size']):
+                pending[pool.submit(revalidate_ids, chunk)] = chunk[-1]
+                self.submitted.append(chunk[-1])
+                if len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    self.collect(done, pending, checkpoint)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                self.collect(done, pending, checkpoint)
+
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {self.checked} permit(s) in {elapsed:.1f}s, {self.changed} changed'
+        ))
+
+    def collect(self, done, pending, checkpoint):
+        for future in done:
+            last_id = pending.pop(future)
+            checked, changed = future.result()
+            self.checked += checked
+            self.changed += changed
+            self.finished.add(last_id)
+
+        # Everything up to the oldest unfinished chunk is done
+        while self.submitted and self.submitted[0] in self.finished:
+            self.safe_id = self.submitted.popleft()
+            self.finished.discard(self.safe_id)
+        if checkpoint:
+            with open(checkpoint, 'w') as f:
+                f.write(str(self.safe_id))
+
+        elapsed = time.monotonic() - self.started
+        rate = self.checked / elapsed if elapsed else 0
+        pct = 100 * self.checked / self.total if self.total else 100
+        self.stdout.write(
+            f'  {self.checked}/{self.total} ({pct:.1f}%), {self.changed} changed, '
+            f'{rate:.0f}/s, complete through id {self.safe_id}'
+        )
@@ -0,0 +1,123 @@
+"""
+Move existing uploads from the old flat directories into the sharded layout.
+
+    python manage.py shard_media --workers 8 --batch-size 500
+
+Files are moved in parallel and the database references are rewritten one
+batch at a time. The target name of every file is derived from the row itself
+(upload date + hash of the old name), so an interrupted run can simply be
+started again: rows already pointing at sharded names are skipped, and files
+that were moved before their batch was saved are picked up at their target.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from dashboard.models import EmailAttachment
+from fleet.models import Vehicle
+from permit_system.uploads import sharded_name, sharded_regex
+from permits.models import PermitDocument
+
+
+# (model, file field, timestamp field used for the date shards)
+TARGETS = [
+    (PermitDocument, 'file', 'uploaded_at'),
+    (EmailAttachment, 'file', 'uploaded_at'),
+    (Vehicle, 'registration_pdf', 'created_at'),
+]
+
+
+def relocate(storage, old_name, new_name):
+    """Move one file. Returns 'moved', 'done' (already at target) or 'missing'."""
+    if not storage.exists(old_name):
+        return 'done' if storage.exists(new_name) else 'missing'
+
+    try:
+        old_path, new_path = storage.path(old_name), storage.path(new_name)
+    except NotImplementedError:
+        # Remote storage: copy through the storage API, then remove the original
+        with storage.open(old_name, 'rb') as f:
+            saved = storage.save(new_name, f)
+        if saved != new_name:
+            storage.delete(saved)
+            raise RuntimeError(f'{new_name} already exists')
+        storage.delete(old_name)
+        return 'moved'
+
+    os.makedirs(os.path.dirname(new_path), exist_ok=True)
+    os.replace(old_path, new_path)
+    return 'moved'
+
+
+class Command(BaseCommand):
+    help = 'Relocate uploaded files into date/hash sharded directories'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=8, help='Parallel file moves')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would move')
+
+    def handle(self, *args, **options):
+        storage = default_storage
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for model, field_name, date_field in TARGETS:
+                self.shard_model(pool, storage, model, field_name, date_field, options)
+
+    def shard_model(self, pool, storage, model, field_name, date_field, options):
+        prefix = model._meta.get_field(field_name).upload_to.prefix
+        pending = (
+            model.objects
+            .exclude(**{f'{field_name}__regex': sharded_regex(prefix)})
+            .exclude(**{f'{field_name}__isnull': True})
+            .exclude(**{field_name: ''})
+            .order_by('pk')
+        )
+        label = model._meta.label
+        self.stdout.write(f'{label}: {pending.count()} file(s) to relocate')
+
+        moved = missing = failed = 0
+        last_pk = 0
+        while True:
+            rows = list(
+                pending.filter(pk__gt=last_pk)
+                .values_list('pk', field_name, date_field)[:options['batch_size']]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+
+            plan = [
+                (pk, old, sharded_name(prefix, old, when=when, key=old))
+                for pk, old, when in rows
+            ]
+            if options['dry_run']:
+                for pk, old, new in plan:
+                    self.stdout.write(f'  {old} -> {new}')
+                continue
+
+            futures = [(pk, new, pool.submit(relocate, storage, old, new)) for pk, old, new in plan]
+            updates = []
+            for pk, new, future in futures:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'  {label} #{pk}: {e}')
+                    continue
+                if result == 'missing':
+                    missing += 1
+                    continue
+                moved += 1
+                updates.append(model(pk=pk, **{field_name: new}))
+
+            with transaction.atomic():
+                model.objects.bulk_update(updates, [field_name])
+            self.stdout.write(f'  ...{moved} moved (last id {last_pk})')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{label}: {moved} moved, {missing} missing, {failed} failed'
+        ))
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.27 on 2026-10-19 01:05
+
+from django.db import migrations, models
+import permit_system.uploads
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permits', '0011_remove_permitrequest_kingpin_to_rear_axle_ft_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='permitdocument',
+            name='file',
+            field=models.FileField(max_length=255, upload_to=permit_system.uploads.ShardedUploadTo('permit_documents')),
+        ),
+    ]
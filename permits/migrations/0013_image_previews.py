@@ -0,0 +1,24 @@
+# Generated by Django 4.2.27 on 2026-10-19 01:07
+
+from django.db import migrations, models
+import permit_system.uploads
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permits', '0012_sharded_upload_paths'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='permitdocument',
+            name='preview',
+            field=models.ImageField(blank=True, max_length=255, upload_to=permit_system.uploads.ShardedUploadTo('previews')),
+        ),
+        migrations.AddField(
+            model_name='permitdocument',
+            name='thumbnail',
+            field=models.ImageField(blank=True, max_length=255, upload_to=permit_system.uploads.ShardedUploadTo('thumbnails')),
+        ),
+    ]
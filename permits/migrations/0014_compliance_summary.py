@@ -0,0 +1,78 @@
+# Generated by Django 4.2.27 on 2026-10-19 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permits', '0013_image_previews'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='permitrequest',
+            name='compliance_flags',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='compliance.Violation bits'),
+        ),
+        migrations.AddField(
+            model_name='permitrequest',
+            name='front_overhang_total_in',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='permitrequest',
+            name='left_overhang_total_in',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='permitrequest',
+            name='max_axle_overload',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Worst axle/group overload in lbs'),
+        ),
+        migrations.AddField(
+            model_name='permitrequest',
+            name='overall_height_total_in',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='permitrequest',
+            name='overall_length_total_in',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='permitrequest',
+            name='overall_width_total_in',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='permitrequest',
+            name='rear_overhang_total_in',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='permitrequest',
+            name='right_overhang_total_in',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='permitrequest',
+            index=models.Index(fields=['compliance_flags', 'created_at'], name='permit_compliance_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='permitrequest',
+            index=models.Index(fields=['overall_width_total_in'], name='permit_width_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='permitrequest',
+            index=models.Index(fields=['overall_height_total_in'], name='permit_height_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='permitrequest',
+            index=models.Index(fields=['overall_length_total_in'], name='permit_length_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='permitrequest',
+            index=models.Index(fields=['max_axle_overload'], name='permit_overload_idx'),
+        ),
+    ]
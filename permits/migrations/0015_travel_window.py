@@ -0,0 +1,47 @@
+# Generated by Django 4.2.27 on 2026-10-19 01:20
+
+from django.db import migrations, models
+from django.db.models import Max, Min, OuterRef, Subquery
+
+
+def fill_travel_window(apps, schema_editor):
+    PermitRequest = apps.get_model('permits', 'PermitRequest')
+    PermitState = apps.get_model('permits', 'PermitState')
+    dates = PermitState.objects.filter(permit=OuterRef('pk'), travel_date__isnull=False).values('permit')
+    PermitRequest.objects.update(
+        travel_start=Subquery(dates.annotate(d=Min('travel_date')).values('d')[:1]),
+        travel_end=Subquery(dates.annotate(d=Max('travel_date')).values('d')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permits', '0014_compliance_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='permitrequest',
+            name='travel_end',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='permitrequest',
+            name='travel_start',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='permitrequest',
+            index=models.Index(fields=['truck', 'travel_start', 'travel_end'], name='permit_truck_travel_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='permitrequest',
+            index=models.Index(fields=['trailer', 'travel_start', 'travel_end'], name='permit_trailer_travel_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='permitrequest',
+            index=models.Index(fields=['driver', 'travel_start', 'travel_end'], name='permit_driver_travel_idx'),
+        ),
+        migrations.RunPython(fill_travel_window, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-19 01:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permits', '0016_permit_templates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='permitrequest',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.27 on 2026-10-19 01:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permits', '0018_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='permitrequest',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='permitrequest',
+            name='similarity_key',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='permitrequest',
+            index=models.Index(fields=['fingerprint', 'created_at'], name='permit_fingerprint_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='permitrequest',
+            index=models.Index(fields=['similarity_key', 'created_at'], name='permit_similarity_idx'),
+        ),
+    ]
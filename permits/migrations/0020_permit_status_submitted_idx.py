@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-19 01:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permits', '0019_permit_fingerprints'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='permitrequest',
+            index=models.Index(fields=['status', 'submitted_at'], name='permit_status_submitted_idx'),
+        ),
+    ]
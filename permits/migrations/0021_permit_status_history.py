@@ -0,0 +1,33 @@
+# Generated by Django 4.2.27 on 2026-10-19 01:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('permits', '0020_permit_status_submitted_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PermitStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, choices=[('draft', 'Draft'), ('pending', 'Pending Review'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('invoiced', 'Invoiced'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('to_status', models.CharField(choices=[('draft', 'Draft'), ('pending', 'Pending Review'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('invoiced', 'Invoiced'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('source', models.CharField(choices=[('submit', 'Customer Submission'), ('form', 'Permit Detail'), ('email', 'Email Sent'), ('bulk', 'Bulk Action'), ('claim', 'Work Queue'), ('admin', 'Admin')], max_length=10)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('permit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='permits.permitrequest')),
+            ],
+            options={
+                'ordering': ['changed_at', 'id'],
+                'indexes': [models.Index(fields=['permit', 'changed_at'], name='status_change_permit_idx'), models.Index(fields=['changed_by', 'to_status', 'changed_at'], name='status_change_user_idx')],
+            },
+        ),
+    ]
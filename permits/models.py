@@ -1,7 +1,16 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
+from django.utils import timezone
+from django.core.serializers.json import DjangoJSONEncoder
+from permit_system.uploads import permit_document_upload_to, preview_upload_to, thumbnail_upload_to
 from company.models import Company, PaymentMethod
 from fleet.models import Vehicle, Driver
+from . import fingerprints
+from .concurrency import StaleVersion
+from .compliance import SUMMARY_FIELDS, SUMMARY_INPUTS, Violation, summarize
+
+# Tries at fresh permit numbers when a concurrent insert took the ones we read
+PERMIT_NUMBER_ATTEMPTS = 5
 
 
 class PermitRequest(models.Model):
@@ -139,6 +148,25 @@ class PermitRequest(models.Model):
     spacing_7_8 = models.DecimalField(max_digits=5, decimal_places=1, default=0, blank=True, verbose_name="Spacing 7-8")
     spacing_8_9 = models.DecimalField(max_digits=5, decimal_places=1, default=0, blank=True, verbose_name="Spacing 8-9")
 
+    # Compliance summary, recomputed on save (see permits/compliance.py)
+    overall_length_total_in = models.PositiveIntegerField(default=0, editable=False)
+    overall_width_total_in = models.PositiveIntegerField(default=0, editable=False)
+    overall_height_total_in = models.PositiveIntegerField(default=0, editable=False)
+    front_overhang_total_in = models.PositiveIntegerField(default=0, editable=False)
+    rear_overhang_total_in = models.PositiveIntegerField(default=0, editable=False)
+    left_overhang_total_in = models.PositiveIntegerField(default=0, editable=False)
+    right_overhang_total_in = models.PositiveIntegerField(default=0, editable=False)
+    max_axle_overload = models.PositiveIntegerField(default=0, editable=False, help_text="Worst axle/group overload in lbs")
+    compliance_flags = models.PositiveIntegerField(default=0, editable=False, help_text="compliance.Violation bits")
+    
+    # First and last PermitState.travel_date, for equipment conflict checks (see permits/conflicts.py)
+    travel_start = models.DateField(null=True, blank=True, editable=False)
+    travel_end = models.DateField(null=True, blank=True, editable=False)
+    
+    # Near-duplicate detection hashes, refreshed with the states (see permits/fingerprints.py)
+    fingerprint = models.CharField(max_length=32, blank=True, editable=False)
+    similarity_key = models.CharField(max_length=16, blank=True, editable=False)
+
     
     # Payment
     payment_method = models.ForeignKey(
@@ -165,25 +193,142 @@ class PermitRequest(models.Model):
     submitted_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     
+    # Bumped on every save; edits and autosave based on an older version are
+    # rejected (see permits/concurrency.py)
+    version = models.PositiveIntegerField(default=0, editable=False)
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['compliance_flags', 'created_at'], name='permit_compliance_idx'),
+            models.Index(fields=['overall_width_total_in'], name='permit_width_idx'),
+            models.Index(fields=['overall_height_total_in'], name='permit_height_idx'),
+            models.Index(fields=['overall_length_total_in'], name='permit_length_idx'),
+            models.Index(fields=['max_axle_overload'], name='permit_overload_idx'),
+            models.Index(fields=['truck', 'travel_start', 'travel_end'], name='permit_truck_travel_idx'),
+            models.Index(fields=['trailer', 'travel_start', 'travel_end'], name='permit_trailer_travel_idx'),
+            models.Index(fields=['driver', 'travel_start', 'travel_end'], name='permit_driver_travel_idx'),
+            models.Index(fields=['status', 'submitted_at'], name='permit_status_submitted_idx'),
+            models.Index(fields=['fingerprint', 'created_at'], name='permit_fingerprint_idx'),
+            models.Index(fields=['similarity_key', 'created_at'], name='permit_similarity_idx'),
+        ]
     
     def __str__(self):
         return f"#{self.permit_number} - {self.load_description}"
     
     def save(self, *args, **kwargs):
-        if not self.permit_number:
-            # Generate permit number
-            last_permit = PermitRequest.objects.order_by('-id').first()
-            if last_permit:
-                try:
-                    last_num = int(last_permit.permit_number.replace('#', ''))
-                    self.permit_number = f"{last_num + 1}"
-                except ValueError:
-                    self.permit_number = "2100"
-            else:
-                self.permit_number = "2100"
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or not set(update_fields).isdisjoint(SUMMARY_INPUTS):
+            self.compute_compliance()
+            if update_fields is not None:
+                update_fields = kwargs['update_fields'] = set(update_fields) | set(SUMMARY_FIELDS)
+        if self.pk:
+            self.version += 1
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'version'}
+        if self.permit_number:
+            super().save(*args, **kwargs)
+            return
+        
+        def insert(numbers):
+            self.permit_number = numbers[0]
+            super(PermitRequest, self).save(*args, **kwargs)
+        try:
+            PermitRequest.allocate_permit_numbers(1, insert)
+        except Exception:
+            self.permit_number = ''
+            raise
+    
+    def save_changes(self, fields, expected_version):
+        """Save only ``fields`` (and the columns derived from them), if the row is
+        still at ``expected_version``; raises StaleVersion otherwise.
+        """
+        if not fields:
+            return
+        self.version = expected_version
+        self._expected_version = expected_version
+        try:
+            self.save(update_fields=set(fields) | {'updated_at'})
+        finally:
+            self._expected_version = None
+    
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected = getattr(self, '_expected_version', None)
+        if expected is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        if super()._do_update(base_qs.filter(version=expected), using, pk_val, values, update_fields, forced_update):
+            return True
+        self.version = expected
+        current = base_qs.filter(pk=pk_val).values_list('version', flat=True).first()
+        if current is None:
+            raise PermitRequest.DoesNotExist
+        raise StaleVersion(current)
+    
+    @classmethod
+    def next_permit_numbers(cls, count=1):
+        """The next ``count`` permit numbers, following the newest permit's."""
+        last_number = cls.objects.order_by('-id').values_list('permit_number', flat=True).first()
+        try:
+            first = int(last_number.replace('#', '')) + 1
+        except (AttributeError, ValueError):
+            first = 2100
+        return [f"{number}" for number in range(first, first + count)]
+    
+    @classmethod
+    def allocate_permit_numbers(cls, count, insert):
+        """Call ``insert(numbers)`` with the next ``count`` permit numbers and return its result.
+        
+        Numbers are read without a lock, so a concurrent insert can take them
+        first; ``insert`` then runs again (in a savepoint) with fresh ones.
+        """
+        for attempt in range(PERMIT_NUMBER_ATTEMPTS):
+            numbers = cls.next_permit_numbers(count)
+            try:
+                with transaction.atomic():
+                    return insert(numbers)
+            except IntegrityError:
+                last = attempt == PERMIT_NUMBER_ATTEMPTS - 1
+                if last or not cls.objects.filter(permit_number__in=numbers).exists():
+                    raise
+    
+    def compute_compliance(self, states=None):
+        """Fill in the compliance summary columns (does not save)."""
+        if states is None:
+            states = self.states_list if self.pk else []
+        row = [getattr(self, name) or 0 for name in SUMMARY_INPUTS]
+        for name, value in summarize([row], [states])[0].items():
+            setattr(self, name, value)
+    
+    def refresh_from_states(self, states=None):
+        """Recompute and store the columns derived from the permit's states.
+
+        Call after the PermitState rows were written (pass them as ``states``
+        to skip re-reading them): updates the compliance summary, the
+        travel window used for equipment conflict checks and the duplicate
+        detection hashes.
+        """
+        if states is None:
+            rows = list(self.states.values_list('state', 'travel_date'))
+        else:
+            rows = [(s.state, s.travel_date) for s in states]
+        self.apply_states([state for state, _ in rows], [day for _, day in rows])
+        PermitRequest.objects.filter(pk=self.pk).update(
+            travel_start=self.travel_start,
+            travel_end=self.travel_end,
+            fingerprint=self.fingerprint,
+            similarity_key=self.similarity_key,
+            **{name: getattr(self, name) for name in SUMMARY_FIELDS}
+        )
+    
+    def apply_states(self, codes, dates):
+        """Set the state-derived columns from state codes and travel dates (does not save)."""
+        self.compute_compliance(codes)
+        dates = [day for day in dates if day]
+        self.travel_start = min(dates) if dates else None
+        self.travel_end = max(dates) if dates else None
+        self.fingerprint, self.similarity_key = fingerprints.compute(
+            self, codes, self.travel_start, self.travel_end,
+        )
     
     @property
     def states_list(self):
@@ -192,6 +337,10 @@ class PermitRequest(models.Model):
     @property
     def states_display(self):
         return ", ".join(self.states_list)
+    
+    @property
+    def compliance_labels(self):
+        return [v.name.replace('_', ' ').title() for v in Violation if v and self.compliance_flags & v]
 
 
 class PermitState(models.Model):
@@ -268,7 +417,7 @@ class PermitDocument(models.Model):
         choices=DocumentType.choices,
         default=DocumentType.OTHER
     )
-    file = models.FileField(upload_to='permit_documents/')
+    file = models.FileField(upload_to=permit_document_upload_to, max_length=255)
     filename = models.CharField(max_length=200)
     uploaded_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -277,8 +426,17 @@ class PermitDocument(models.Model):
     )
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
+    # Web-sized renditions of image uploads (built in the background)
+    preview = models.ImageField(upload_to=preview_upload_to, max_length=255, blank=True)
+    thumbnail = models.ImageField(upload_to=thumbnail_upload_to, max_length=255, blank=True)
+    
     def __str__(self):
         return self.filename
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from .images import schedule_renditions
+        schedule_renditions(self)
 
 
 class PermitComment(models.Model):
@@ -304,3 +462,112 @@ class PermitComment(models.Model):
     def __str__(self):
         return f"Comment by {self.user} on #{self.permit.permit_number}"
 
+
+class PermitStatusChange(models.Model):
+    """One status transition of a permit (append-only, see permits/history.py)."""
+    
+    class Source(models.TextChoices):
+        SUBMIT = 'submit', 'Customer Submission'
+        FORM = 'form', 'Permit Detail'
+        EMAIL = 'email', 'Email Sent'
+        BULK = 'bulk', 'Bulk Action'
+        CLAIM = 'claim', 'Work Queue'
+        ADMIN = 'admin', 'Admin'
+    
+    permit = models.ForeignKey(
+        PermitRequest,
+        on_delete=models.CASCADE,
+        related_name='status_history'
+    )
+    from_status = models.CharField(max_length=20, choices=PermitRequest.Status.choices, blank=True)
+    to_status = models.CharField(max_length=20, choices=PermitRequest.Status.choices)
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    source = models.CharField(max_length=10, choices=Source.choices)
+    changed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['changed_at', 'id']
+        indexes = [
+            # A permit's timeline
+            models.Index(fields=['permit', 'changed_at'], name='status_change_permit_idx'),
+            # Per-employee throughput, e.g. permits completed per day
+            models.Index(fields=['changed_by', 'to_status', 'changed_at'], name='status_change_user_idx'),
+        ]
+    
+    def __str__(self):
+        return f"#{self.permit_id}: {self.from_status or '-'} → {self.to_status}"
+    
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError('Status history is append-only.')
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValueError('Status history is append-only.')
+
+
+
+class PermitTemplate(models.Model):
+    """Saved permit a company reuses for repeat moves (see permits/presets.py)."""
+    
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name='permit_templates'
+    )
+    name = models.CharField(max_length=100)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True
+    )
+    # Non-default field values and the ordered states, see presets.take_snapshot()
+    snapshot = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['name']
+        unique_together = ['company', 'name']
+    
+    def __str__(self):
+        return self.name
+
+
+class IdempotencyKey(models.Model):
+    """Outcome of a keyed POST, replayed when the same request arrives again (see permits/idempotency.py)."""
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    scope = models.CharField(max_length=100, help_text="View the key was used with")
+    key = models.CharField(max_length=100)
+    request_hash = models.CharField(max_length=64)
+    
+    # Empty while the first request is still running
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_headers = models.JSONField(default=dict, blank=True)
+    response_body = models.TextField(blank=True)
+    response_messages = models.JSONField(default=list, blank=True)
+    
+    # When the key was claimed (or taken over from a request that died)
+    claimed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'scope', 'key'], name='idempotency_key_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['claimed_at'], name='idempotency_claimed_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope} {self.key}"
@@ -0,0 +1,95 @@
+"""
+Company permit templates.
+
+A PermitTemplate stores a compact snapshot of a permit: the editable fields
+that differ from their defaults, plus the states in order.
+
+    {"fields": {"load_description": "D8 dozer", "gross_weight": 98000, ...},
+     "states": [["IL", "", ""], ["MO", "I-44", ""], ...]}
+
+``template_permit()`` turns it back into an unsaved PermitRequest, which
+the create form renders as its initial values. ``create_from_template()``
+saves one directly for the one-POST API.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cloning import NOT_COPIED
+from .history import record
+from .models import PermitRequest, PermitStatusChange, PermitTemplate
+from .state_sync import StateRow, in_route_order, sync_states
+
+# Equipment and payment references are re-checked against the company when used
+RELATED = ('driver', 'truck', 'trailer', 'payment_method')
+
+
+def snapshot_fields():
+    return [
+        field for field in PermitRequest._meta.concrete_fields
+        if field.editable and field.name not in NOT_COPIED and field.name != 'company'
+    ]
+
+
+def take_snapshot(permit):
+    """JSON-ready snapshot of ``permit``'s fields and states."""
+    fields = {}
+    for field in snapshot_fields():
+        value = field.value_from_object(permit)
+        if value != field.get_default():
+            fields[field.attname] = value
+    states = [list(row) for row in permit.states.values_list('state', 'route', 'comments')]
+    return {'fields': fields, 'states': states}
+
+
+def save_template(permit, name, user):
+    """Create or overwrite the company's template called ``name`` from ``permit``."""
+    template, _ = PermitTemplate.objects.update_or_create(
+        company=permit.company,
+        name=name,
+        defaults={'snapshot': take_snapshot(permit), 'created_by': user},
+    )
+    return template
+
+
+def template_permit(template):
+    """Unsaved PermitRequest filled in from the template."""
+    stored = template.snapshot.get('fields', {})
+    values = {}
+    for field in snapshot_fields():
+        if field.attname in stored:
+            values[field.attname] = field.to_python(stored[field.attname])
+    permit = PermitRequest(company=template.company, **values)
+
+    # Vehicles, drivers or cards removed since the template was saved are dropped
+    for name in RELATED:
+        pk = getattr(permit, f'{name}_id')
+        if pk is None:
+            continue
+        model = PermitRequest._meta.get_field(name).related_model
+        if not model.objects.filter(pk=pk, company=template.company).exists():
+            setattr(permit, f'{name}_id', None)
+    return permit
+
+
+def template_states(template):
+    return [
+        StateRow(state, route=route, comments=comments)
+        for state, route, comments in template.snapshot.get('states', [])
+    ]
+
+
+def create_from_template(template, user, submit=False):
+    """Save a new permit from ``template``; a draft unless ``submit``."""
+    permit = template_permit(template)
+    permit.submitted_by = user
+    if submit:
+        permit.status = PermitRequest.Status.PENDING
+        permit.submitted_at = timezone.now()
+    with transaction.atomic():
+        permit.save()
+        if submit:
+            record(permit, '', user, PermitStatusChange.Source.SUBMIT)
+        rows = in_route_order(permit, template_states(template))
+        permit.refresh_from_states(sync_states(permit, rows))
+    return permit
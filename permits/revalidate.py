@@ -0,0 +1,58 @@
+"""
+Re-evaluate stored compliance columns for a set of permits.
+
+Used by ``manage.py revalidate_permits`` (in a process pool) and
+``manage.py backfill_compliance``. Like jobs/worker.py this module must be
+importable before Django is set up, since it is the entry point of spawned
+pool processes; models are imported inside the functions.
+"""
+
+
+def init_process():
+    """ProcessPoolExecutor initializer for spawned workers."""
+    import django
+    django.setup()
+
+
+def revalidate_ids(ids, write_all=False):
+    """Recompute the summary columns of the given permits.
+
+    Only rows whose stored values differ are written, unless ``write_all``.
+    Returns ``(checked, changed)``.
+    """
+    from collections import defaultdict
+
+    from django.db import transaction
+
+    from .compliance import SUMMARY_FIELDS, SUMMARY_INPUTS, summarize
+    from .models import PermitRequest, PermitState
+
+    rows = list(
+        PermitRequest.objects
+        .filter(pk__in=ids)
+        .order_by()
+        .values_list('pk', *SUMMARY_INPUTS, *SUMMARY_FIELDS)
+    )
+    states = defaultdict(list)
+    for permit_id, state in (
+        PermitState.objects
+        .filter(permit_id__in=ids)
+        .order_by('permit_id', 'order')
+        .values_list('permit_id', 'state')
+    ):
+        states[permit_id].append(state)
+
+    n_inputs = len(SUMMARY_INPUTS)
+    results = summarize(
+        [row[1:1 + n_inputs] for row in rows],
+        [states[row[0]] for row in rows],
+    )
+    changed = []
+    for row, values in zip(rows, results):
+        stored = dict(zip(SUMMARY_FIELDS, row[1 + n_inputs:]))
+        if write_all or stored != values:
+            changed.append(PermitRequest(pk=row[0], **values))
+    if changed:
+        with transaction.atomic():
+            PermitRequest.objects.bulk_update(changed, SUMMARY_FIELDS)
+    return len(rows), len(changed)
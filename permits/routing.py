@@ -0,0 +1,195 @@
+"""
+State sequence checks for permit routes.
+
+Uses the bundled adjacency graph of the lower 48 states
+(settings.STATE_ADJACENCY_FILE). Given the states selected on a permit and
+the origin/destination states it can tell whether they form a contiguous
+route, suggest the shortest chain of states between the endpoints, and put
+the selected states in driving order:
+
+    check = check_route(frozenset({'TX', 'IL', 'MO', 'OK'}), 'IL', 'TX')
+    check.ordered    # ('IL', 'MO', 'OK', 'TX')
+
+Everything is memoized per state set and endpoints, so repeat lanes are a
+dictionary hit. Alaska and Hawaii have no neighbours and are left alone.
+"""
+
+import json
+import re
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+
+# Permits with more states than this are checked but not auto-ordered
+MAX_ORDERED_STATES = 16
+
+# A state (code or name) at the end of an address, before an optional ZIP and "USA"
+_ADDRESS_END = r'(?:\s+\d{5}(?:-\d{4})?)?[\s,.]*(?:USA?)?[\s.]*$'
+_STATE_RE = re.compile(r'\b([A-Z]{2})\b' + _ADDRESS_END)
+
+
+@dataclass(frozen=True)
+class RouteCheck:
+    contiguous: bool
+    components: tuple        # groups of selected states that touch each other
+    missing_endpoints: tuple  # origin/destination states not selected
+    suggested: tuple         # shortest state chain origin -> destination (may include unselected states)
+    ordered: tuple           # selected states in driving order, or () if no single path covers them
+
+    @property
+    def missing_states(self):
+        """States on the suggested route that were not selected."""
+        selected = {state for group in self.components for state in group}
+        return tuple(s for s in self.suggested if s not in selected)
+
+
+_graph = None
+
+
+def get_graph():
+    global _graph
+    if _graph is None:
+        with open(settings.STATE_ADJACENCY_FILE, encoding='utf-8') as f:
+            data = json.load(f)
+        _graph = {state: frozenset(neighbours) for state, neighbours in data['adjacent'].items()}
+    return _graph
+
+
+@lru_cache(maxsize=None)
+def _state_names():
+    """(regex for a state name at the end of an address, lower-case name -> code)."""
+    from .models import PermitState
+    codes = {name.lower(): code for code, name in PermitState.US_STATES}
+    # Longest first, so "West Virginia" is not read as "Virginia"
+    names = '|'.join(sorted(map(re.escape, codes), key=len, reverse=True))
+    return re.compile(r'(?:^|[\s,])(%s)' % names + _ADDRESS_END, re.IGNORECASE), codes
+
+
+def address_state(address):
+    """State code for the state at the end of an address ("Dallas, TX 75201",
+    "Chicago, Illinois"), or '' when it is unknown. Never a guess.
+    """
+    match = _STATE_RE.search(address or '')
+    if match and match.group(1) in get_graph():
+        return match.group(1)
+    name_re, codes = _state_names()
+    match = name_re.search(address or '')
+    if match and codes[match.group(1).lower()] in get_graph():
+        return codes[match.group(1).lower()]
+    return ''
+
+
+@lru_cache(maxsize=4096)
+def shortest_path(origin, destination):
+    """Fewest-states chain from origin to destination (BFS), or () if unreachable."""
+    graph = get_graph()
+    if origin not in graph or destination not in graph:
+        return ()
+    previous = {origin: None}
+    queue = deque([origin])
+    while queue:
+        state = queue.popleft()
+        if state == destination:
+            path = []
+            while state:
+                path.append(state)
+                state = previous[state]
+            return tuple(reversed(path))
+        for neighbour in sorted(graph[state]):
+            if neighbour not in previous:
+                previous[neighbour] = state
+                queue.append(neighbour)
+    return ()
+
+
+def is_path(states):
+    """True if each state in the sequence borders the next one."""
+    graph = get_graph()
+    return all(b in graph.get(a, ()) for a, b in zip(states, states[1:]))
+
+
+def _components(states):
+    graph = get_graph()
+    remaining = set(states)
+    groups = []
+    while remaining:
+        start = min(remaining)
+        group = {start}
+        queue = [start]
+        while queue:
+            for neighbour in graph.get(queue.pop(), ()):
+                if neighbour in remaining and neighbour not in group:
+                    group.add(neighbour)
+                    queue.append(neighbour)
+        remaining -= group
+        groups.append(tuple(sorted(group)))
+    return tuple(groups)
+
+
+def _hamiltonian_path(states, origin, destination):
+    """Order ``states`` so each one borders the next (bitmask DP), or ()."""
+    graph = get_graph()
+    states = sorted(states)
+    n = len(states)
+    if n == 1:
+        return tuple(states)
+    index = {s: i for i, s in enumerate(states)}
+    starts = [index[origin]] if origin in index else range(n)
+    end = index.get(destination)
+
+    # reach[mask][i]: previous state index on some path covering mask that ends at i
+    full = (1 << n) - 1
+    reach = [dict() for _ in range(1 << n)]
+    for i in starts:
+        reach[1 << i][i] = None
+    for mask in range(1 << n):
+        for i in list(reach[mask]):
+            for neighbour in graph.get(states[i], ()):
+                j = index.get(neighbour)
+                if j is None or mask & (1 << j):
+                    continue
+                reach[mask | (1 << j)].setdefault(j, i)
+
+    ends = [end] if end is not None else sorted(reach[full])
+    for i in ends:
+        if i in reach[full]:
+            path, mask = [], full
+            while i is not None:
+                path.append(states[i])
+                i, mask = reach[mask][i], mask & ~(1 << i)
+            return tuple(reversed(path))
+    return ()
+
+
+@lru_cache(maxsize=4096)
+def check_route(states, origin='', destination=''):
+    """Check a frozenset of state codes against the origin/destination states."""
+    graph = get_graph()
+    components = _components(states)
+    missing = tuple(s for s in dict.fromkeys((origin, destination)) if s and s not in states)
+    suggested = shortest_path(origin, destination) if origin and destination else ()
+
+    ordered = ()
+    routable = all(s in graph for s in states)
+    if states and routable and len(components) == 1 and len(states) <= MAX_ORDERED_STATES:
+        ordered = _hamiltonian_path(states, origin, destination)
+    return RouteCheck(
+        contiguous=len(components) <= 1 and not missing,
+        components=components,
+        missing_endpoints=missing,
+        suggested=suggested,
+        ordered=ordered,
+    )
+
+
+def check_permit_route(permit, states=None):
+    if states is None:
+        states = permit.states_list
+    return check_route(
+        frozenset(states),
+        address_state(permit.origin_address),
+        address_state(permit.destination_address),
+    )
+
@@ -0,0 +1,155 @@
+"""
+Per-state oversize/overweight rules.
+
+Limits live in a versioned JSON file (settings.STATE_RULES_FILE, by default
+permits/data/state_rules.json): a ``defaults`` block plus per-state
+overrides, dimensions in inches and weights in lbs. The file is compiled
+once into a dict of flat tuples, so classifying a state leg is a dict lookup
+and a handful of integer comparisons:
+
+    rules = get_rules()
+    leg = rules.classify('TX', width=150, height=160, length=900, gross=120000)
+    leg.category  # Category.ESCORT
+
+Call ``reload_rules()`` after editing the file in a running process.
+"""
+
+import json
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import NamedTuple
+
+from django.conf import settings
+
+from .models import PermitState
+
+
+class Category(IntEnum):
+    """Leg classifications, from least to most restrictive."""
+    LEGAL = 0
+    OVERSIZE = 1
+    ESCORT = 2
+    SUPERLOAD = 3
+
+    @property
+    def label(self):
+        return {
+            Category.LEGAL: 'Legal',
+            Category.OVERSIZE: 'Oversize/Overweight',
+            Category.ESCORT: 'Escort Required',
+            Category.SUPERLOAD: 'Superload',
+        }[self]
+
+    @property
+    def badge(self):
+        return ['success', 'warning', 'info', 'danger'][self]
+
+
+class StateLimits(NamedTuple):
+    legal_width: int
+    legal_height: int
+    legal_length: int
+    legal_gross: int
+    escort_width: int
+    escort_height: int
+    escort_length: int
+    superload_width: int
+    superload_height: int
+    superload_length: int
+    superload_gross: int
+
+
+@dataclass
+class LegResult:
+    state: str
+    category: Category
+    reasons: list = field(default_factory=list)
+
+
+def _feet(inches):
+    return f"{inches // 12}'{inches % 12}\""
+
+
+class StateRules:
+
+    def __init__(self, data):
+        self.version = data['version']
+        self.effective = data.get('effective', '')
+        defaults = data['defaults']
+        self.limits = {}
+        for code, _ in PermitState.US_STATES:
+            values = {**defaults, **data['states'].get(code, {})}
+            self.limits[code] = StateLimits(**{name: int(values[name]) for name in StateLimits._fields})
+
+    def classify(self, state, width=0, height=0, length=0, gross=0):
+        """Classify one leg. Dimensions in inches, gross weight in lbs."""
+        limits = self.limits.get(state)
+        if limits is None:
+            return LegResult(state, Category.LEGAL, ['No rules on file'])
+
+        reasons = []
+        category = Category.LEGAL
+        checks = (
+            ('Width', width, limits.legal_width, limits.escort_width, limits.superload_width, _feet),
+            ('Height', height, limits.legal_height, limits.escort_height, limits.superload_height, _feet),
+            ('Length', length, limits.legal_length, limits.escort_length, limits.superload_length, _feet),
+            ('Gross', gross, limits.legal_gross, None, limits.superload_gross, '{:,} lbs'.format),
+        )
+        for name, value, legal, escort, superload, fmt in checks:
+            if value > superload:
+                category = max(category, Category.SUPERLOAD)
+                reasons.append(f'{name} {fmt(value)} over superload limit {fmt(superload)}')
+            elif escort is not None and value > escort:
+                category = max(category, Category.ESCORT)
+                reasons.append(f'{name} {fmt(value)} over escort threshold {fmt(escort)}')
+            elif value > legal:
+                category = max(category, Category.OVERSIZE)
+                reasons.append(f'{name} {fmt(value)} over legal {fmt(legal)}')
+        return LegResult(state, category, reasons)
+
+    def classify_permit(self, permit, states=None):
+        """Classify every state leg of a permit, in route order."""
+        dims = permit_dimensions(permit)
+        if states is None:
+            states = [s.state for s in permit.states.all()]
+        return [self.classify(state, **dims) for state in states]
+
+
+def permit_dimensions(permit):
+    gross = permit.gross_weight or sum(
+        getattr(permit, f'axle_weight_{i}') or 0 for i in range(1, 10)
+    )
+    return {
+        'width': permit.overall_width_ft * 12 + permit.overall_width_in,
+        'height': permit.overall_height_ft * 12 + permit.overall_height_in,
+        'length': permit.overall_length_ft * 12 + permit.overall_length_in,
+        'gross': gross,
+    }
+
+
+def load_rules(path=None):
+    with open(path or settings.STATE_RULES_FILE, encoding='utf-8') as f:
+        return StateRules(json.load(f))
+
+
+_rules = None
+
+
+def get_rules():
+    global _rules
+    if _rules is None:
+        _rules = load_rules()
+    return _rules
+
+
+def reload_rules():
+    global _rules
+    _rules = load_rules()
+    return _rules
+
+
+def state_legs(permit):
+    """(PermitState, LegResult) pairs for the detail pages."""
+    states = list(permit.states.all())
+    results = get_rules().classify_permit(permit, [s.state for s in states])
+    return list(zip(states, results))
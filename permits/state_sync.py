@@ -0,0 +1,123 @@
+"""
+Write a permit's PermitState rows from the submitted selection.
+
+``sync_states()`` diffs the submitted states against the stored ones and
+issues at most four queries in one transaction: the initial select, a
+bulk_create for new states, a bulk_update for changed ones and a delete for
+states that were removed. Unchanged rows keep their primary keys.
+"""
+
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from .models import PermitState
+from .routing import address_state, check_permit_route, is_path
+
+SYNC_FIELDS = ['order', 'travel_date', 'route', 'comments']
+
+VALID_STATES = {code for code, _ in PermitState.US_STATES}
+
+
+@dataclass
+class StateRow:
+    state: str
+    travel_date: object = None
+    route: str = ''
+    comments: str = ''
+
+
+def _state_row(code, day, route, comments):
+    try:
+        travel_date = parse_date(str(day or ''))
+    except ValueError:
+        travel_date = None
+    return StateRow(state=code, travel_date=travel_date, route=str(route or ''), comments=str(comments or ''))
+
+
+def states_from_post(data):
+    """StateRows from the permit form's ``selected_states[]`` and per-state inputs."""
+    rows = []
+    seen = set()
+    for code in data.getlist('selected_states[]'):
+        if code not in VALID_STATES or code in seen:
+            continue
+        seen.add(code)
+        rows.append(_state_row(
+            code,
+            data.get(f'state_date_{code}'),
+            data.get(f'state_route_{code}', ''),
+            data.get(f'state_comments_{code}', ''),
+        ))
+    return rows
+
+
+def states_from_json(items):
+    """StateRows from a list of ``{"state", "travel_date", "route", "comments"}`` dicts."""
+    rows = []
+    seen = set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        code = str(item.get('state') or '')
+        if code not in VALID_STATES or code in seen:
+            continue
+        seen.add(code)
+        rows.append(_state_row(code, item.get('travel_date'), item.get('route'), item.get('comments')))
+    return rows
+
+
+def in_route_order(permit, rows):
+    """
+    Rows in driving order.
+
+    A submitted order whose neighbouring states border each other is kept,
+    unless both route endpoints are known and it doesn't run between them.
+    Otherwise the rows are sorted into the suggested order, if there is one.
+    """
+    states = [row.state for row in rows]
+    origin = address_state(permit.origin_address)
+    destination = address_state(permit.destination_address)
+    wrong_way = origin and destination and (
+        (origin in states and states[0] != origin)
+        or (destination in states and states[-1] != destination)
+    )
+    if is_path(states) and not wrong_way:
+        return rows
+    ordered = check_permit_route(permit, states).ordered
+    if not ordered:
+        return rows
+    position = {state: n for n, state in enumerate(ordered)}
+    return sorted(rows, key=lambda row: position[row.state])
+
+
+def sync_states(permit, rows):
+    """Make the permit's states match ``rows`` (in order). Returns the PermitStates."""
+    with transaction.atomic():
+        existing = {s.state: s for s in permit.states.all()}
+        to_create, to_update, result = [], [], []
+        for order, row in enumerate(rows):
+            values = {
+                'order': order,
+                'travel_date': row.travel_date,
+                'route': row.route,
+                'comments': row.comments,
+            }
+            current = existing.pop(row.state, None)
+            if current is None:
+                current = PermitState(permit=permit, state=row.state, **values)
+                to_create.append(current)
+            elif any(getattr(current, name) != value for name, value in values.items()):
+                for name, value in values.items():
+                    setattr(current, name, value)
+                to_update.append(current)
+            result.append(current)
+
+        if existing:
+            PermitState.objects.filter(pk__in=[s.pk for s in existing.values()]).delete()
+        if to_update:
+            PermitState.objects.bulk_update(to_update, SYNC_FIELDS)
+        if to_create:
+            PermitState.objects.bulk_create(to_create)
+    return result
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from jobs.scheduler import periodic
+from .models import IdempotencyKey, PermitRequest
+
+
+@periodic(cron='0 8 * * 1-5')
+def stale_pending_digest():
+    """Post one notification listing permits that have been pending too long."""
+    from dashboard.models import Notification
+    
+    cutoff = timezone.now() - timedelta(hours=settings.STALE_PENDING_HOURS)
+    stale = list(
+        PermitRequest.objects.filter(
+            status=PermitRequest.Status.PENDING,
+            submitted_at__lt=cutoff,
+        ).order_by('submitted_at').values_list('permit_number', flat=True)
+    )
+    if not stale:
+        return 'no stale permits'
+    
+    numbers = ', '.join(f'#{n}' for n in stale[:20])
+    if len(stale) > 20:
+        numbers += f' and {len(stale) - 20} more'
+    Notification.objects.create(
+        notification_type=Notification.NotificationType.GENERAL,
+        title=f'{len(stale)} permit(s) pending over {settings.STALE_PENDING_HOURS}h',
+        message=f'Still waiting for review: {numbers}',
+    )
+    return f'{len(stale)} stale permits'
+
+
+@periodic(every=timedelta(hours=1))
+def purge_idempotency_keys():
+    """Delete idempotency keys older than IDEMPOTENCY_TTL_HOURS."""
+    cutoff = timezone.now() - timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+    deleted, _ = IdempotencyKey.objects.filter(claimed_at__lt=cutoff).delete()
+    return f'{deleted} idempotency keys deleted'
@@ -0,0 +1,276 @@
+import numpy as np
+from django.db import transaction
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from accounts.models import User
+from company.models import Company
+
+from . import compliance
+from .compliance import MAX_AXLES, Violation, check_permit, evaluate
+from .concurrency import StaleVersion, save_merged, snapshot
+from .models import IdempotencyKey, PermitRequest
+from .routing import address_state, check_route
+from .state_sync import StateRow, in_route_order, states_from_json, states_from_post
+
+EDITED = ['load_description', 'load_make_model', 'load_serial']
+
+
+def make_permit(**fields):
+    company = Company.objects.create(
+        name='Acme', email='a@example.com', address='1 Main St', city='Chicago',
+        state='IL', zipcode='60601', phone='555-0100', usdot_number='1',
+    )
+    customer = User.objects.create_user('cust', 'c@example.com', 'pw', user_type='customer', company=company)
+    return PermitRequest.objects.create(
+        company=company, submitted_by=customer, load_description='Excavator',
+        origin_address='Chicago, IL', destination_address='Dallas, TX', **fields,
+    )
+
+
+class SaveMergedTests(TestCase):
+    def setUp(self):
+        self.permit = make_permit()
+
+    def edit(self):
+        """A second copy of the permit, as another user's form would load it."""
+        permit = PermitRequest.objects.get(pk=self.permit.pk)
+        return permit, permit.version, snapshot(permit, EDITED)
+
+    def test_save_changes_rejects_stale_version(self):
+        mine, version, _ = self.edit()
+        theirs, _, _ = self.edit()
+        theirs.load_serial = 'SN-2'
+        theirs.save()
+
+        mine.load_serial = 'SN-1'
+        with self.assertRaises(StaleVersion) as raised, transaction.atomic():
+            mine.save_changes({'load_serial'}, version)
+        self.assertEqual(raised.exception.version, theirs.version)
+        self.assertEqual(PermitRequest.objects.get(pk=self.permit.pk).load_serial, 'SN-2')
+
+    def test_disjoint_edits_are_merged(self):
+        mine, version, original = self.edit()
+        theirs, _, _ = self.edit()
+        theirs.load_make_model = 'CAT 336'
+        theirs.save()
+
+        mine.load_serial = 'SN-1'
+        self.assertEqual(save_merged(mine, {'load_serial'}, version, original), [])
+        saved = PermitRequest.objects.get(pk=self.permit.pk)
+        self.assertEqual((saved.load_make_model, saved.load_serial), ('CAT 336', 'SN-1'))
+        self.assertEqual(saved.version, theirs.version + 1)
+
+    def test_same_field_edits_conflict(self):
+        mine, version, original = self.edit()
+        theirs, _, _ = self.edit()
+        theirs.load_description = 'Dozer'
+        theirs.save()
+
+        mine.load_description = 'Crane'
+        conflicts = save_merged(mine, {'load_description'}, version, original)
+        self.assertEqual([c.name for c in conflicts], ['load_description'])
+        self.assertEqual((conflicts[0].current, conflicts[0].yours), ('Dozer', 'Crane'))
+        self.assertEqual(mine.version, theirs.version)
+        self.assertEqual(PermitRequest.objects.get(pk=self.permit.pk).load_description, 'Dozer')
+
+    def test_matching_edits_do_not_conflict(self):
+        mine, version, original = self.edit()
+        theirs, _, _ = self.edit()
+        theirs.load_description = 'Dozer'
+        theirs.save()
+
+        mine.load_description = 'Dozer'
+        self.assertEqual(save_merged(mine, {'load_description'}, version, original), [])
+
+
+class IdempotentTests(TestCase):
+    def setUp(self):
+        self.permit = make_permit()
+        self.client.login(username='cust', password='pw')
+        self.url = reverse('permits:copy', args=[self.permit.pk])
+
+    def test_repeat_post_replays_the_first_response(self):
+        first = self.client.post(self.url, {'idempotency_key': 'k1'})
+        again = self.client.post(self.url, {'idempotency_key': 'k1'})
+
+        self.assertEqual(PermitRequest.objects.count(), 2)
+        self.assertEqual(again.status_code, first.status_code)
+        self.assertEqual(again['Location'], first['Location'])
+        self.assertEqual(again['Idempotent-Replayed'], 'true')
+        self.assertFalse(first.has_header('Idempotent-Replayed'))
+
+    def test_header_key_is_honoured(self):
+        self.client.post(self.url, headers={'Idempotency-Key': 'k2'})
+        again = self.client.post(self.url, headers={'Idempotency-Key': 'k2'})
+        self.assertEqual(PermitRequest.objects.count(), 2)
+        self.assertEqual(again['Idempotent-Replayed'], 'true')
+
+    def test_new_key_runs_the_view_again(self):
+        self.client.post(self.url, {'idempotency_key': 'k1'})
+        self.client.post(self.url, {'idempotency_key': 'k3'})
+        self.assertEqual(PermitRequest.objects.count(), 3)
+
+    def test_key_reused_for_different_request_is_rejected(self):
+        self.client.post(self.url, {'idempotency_key': 'k1'})
+        other = self.client.post(self.url, {'idempotency_key': 'k1', 'note': 'changed'})
+        self.assertEqual(other.status_code, 422)
+        self.assertEqual(PermitRequest.objects.count(), 2)
+
+    def test_key_is_released_when_the_view_fails(self):
+        missing = reverse('permits:copy', args=[self.permit.pk + 100])
+        self.assertEqual(self.client.post(missing, {'idempotency_key': 'k4'}).status_code, 404)
+        self.assertFalse(IdempotencyKey.objects.filter(key='k4').exists())
+
+
+def scalar_check(weights, tires, spacings_in, num_axles):
+    """One axle layout checked axle by axle, as a reference for evaluate()."""
+    n = num_axles or max((i + 1 for i, w in enumerate(weights) if w > 0), default=0)
+    weights = [w if i < n else 0 for i, w in enumerate(weights)]
+    positions = [sum(spacings_in[:i]) / 12 for i in range(MAX_AXLES)]
+
+    bridge = 0
+    for i in range(n):
+        for j in range(i + 1, n):
+            length, count = positions[j] - positions[i], j - i + 1
+            allowed = round(500 * (round(length) * count / (count - 1) + 12 * count + 36) / 500) * 500
+            if count == 4 and length >= 36:
+                allowed = max(allowed, 2 * compliance.TANDEM_LIMIT)
+            bridge = max(bridge, sum(weights[i:j + 1]) - allowed)
+
+    limits = {1: compliance.SINGLE_AXLE_LIMIT, 2: compliance.TANDEM_LIMIT, 3: compliance.TRIDEM_LIMIT}
+    clusters = [[0]]
+    for i in range(1, n):
+        if spacings_in[i - 1] > compliance.GROUP_SPACING_IN:
+            clusters.append([])
+        clusters[-1].append(i)
+    cluster = max(
+        (sum(weights[i] for i in axles) - limits[len(axles)] for axles in clusters if len(axles) in limits),
+        default=0,
+    )
+    tire = max((weights[i] / tires[i] - compliance.TIRE_LOAD_LIMIT for i in range(n) if tires[i]), default=0)
+    gross = sum(weights) - compliance.GROSS_LIMIT
+
+    flags = (
+        (bridge > 0) * Violation.BRIDGE | (cluster > 0) * Violation.AXLE_GROUP
+        | (tire > 0) * Violation.TIRE_LOAD | (gross > 0) * Violation.GROSS
+    )
+    return n, max(bridge, cluster, gross, 0), int(flags)
+
+
+class EvaluateTests(SimpleTestCase):
+    def test_batch_matches_scalar_check(self):
+        rng = np.random.default_rng(31)
+        rows = 300
+        num_axles = rng.integers(0, MAX_AXLES + 1, rows)
+        used = rng.integers(1, MAX_AXLES + 1, rows)
+        weights = rng.integers(4, 50, (rows, MAX_AXLES)) * 500
+        weights[np.arange(MAX_AXLES)[None, :] >= used[:, None]] = 0
+        tires = rng.choice([0, 2, 4, 8], (rows, MAX_AXLES))
+        spacings = rng.choice([40, 50, 60, 100, 200, 400, 600], (rows, MAX_AXLES - 1))
+
+        out = evaluate(weights, tires, spacings, num_axles)
+        for p in range(rows):
+            expected = scalar_check(weights[p].tolist(), tires[p].tolist(), spacings[p].tolist(), int(num_axles[p]))
+            got = (int(out['num_axles'][p]), out['max_overload'][p], int(out['flags'][p]))
+            self.assertEqual(got, expected, f'row {p}')
+
+    def test_legal_five_axle_semi(self):
+        permit = type('Permit', (), {name: 0 for name in compliance.AXLE_COLUMNS})()
+        permit.num_axles = 5
+        for i, weight in enumerate([12000, 17000, 17000, 17000, 17000], start=1):
+            setattr(permit, f'axle_weight_{i}', weight)
+            setattr(permit, f'tires_per_axle_{i}', 2 if i == 1 else 4)
+        for i, spacing in enumerate([200, 52, 400, 49], start=1):
+            setattr(permit, f'spacing_{i}_{i + 1}', spacing)
+
+        result = check_permit(permit)
+        self.assertTrue(result.is_compliant)
+        self.assertEqual((result.gross_weight, result.max_overload), (80000, 0))
+
+        permit.axle_weight_5 = 27000
+        result = check_permit(permit)
+        self.assertEqual(result.flags, Violation.AXLE_GROUP | Violation.GROSS | Violation.BRIDGE | Violation.TIRE_LOAD)
+        self.assertEqual(result.tire_violations, [(5, 150)])
+        self.assertEqual(result.cluster_violations[0].overload, 10000)
+        groups = result.overweight_groups + result.cluster_violations
+        self.assertEqual(result.max_overload, max(g.overload for g in groups))
+
+
+class CheckRouteTests(SimpleTestCase):
+    LANE = frozenset({'TX', 'IL', 'MO', 'OK'})
+
+    def test_orders_between_endpoints(self):
+        self.assertEqual(check_route(self.LANE, 'IL', 'TX').ordered, ('IL', 'MO', 'OK', 'TX'))
+        self.assertEqual(check_route(self.LANE, 'TX', 'IL').ordered, ('TX', 'OK', 'MO', 'IL'))
+        self.assertEqual(check_route(self.LANE, 'IL', '').ordered, ('IL', 'MO', 'OK', 'TX'))
+        self.assertEqual(check_route(self.LANE, '', 'IL').ordered, ('TX', 'OK', 'MO', 'IL'))
+
+    def test_contiguous_lane(self):
+        check = check_route(self.LANE, 'IL', 'TX')
+        self.assertTrue(check.contiguous)
+        self.assertEqual(check.components, (('IL', 'MO', 'OK', 'TX'),))
+        self.assertEqual(check.missing_endpoints, ())
+
+    def test_gap_in_lane(self):
+        check = check_route(frozenset({'IL', 'OK', 'TX'}), 'IL', 'TX')
+        self.assertFalse(check.contiguous)
+        self.assertEqual(check.components, (('IL',), ('OK', 'TX')))
+        self.assertEqual(check.ordered, ())
+        self.assertIn('MO', check.missing_states)
+        self.assertEqual((check.suggested[0], check.suggested[-1]), ('IL', 'TX'))
+
+    def test_missing_endpoint(self):
+        check = check_route(frozenset({'MO', 'OK'}), 'IL', 'TX')
+        self.assertFalse(check.contiguous)
+        self.assertEqual(check.missing_endpoints, ('IL', 'TX'))
+
+    def test_address_state(self):
+        cases = {
+            'Chicago, IL 60601': 'IL',
+            'Chicago, Illinois': 'IL',
+            'Charleston, West Virginia 25301, USA': 'WV',
+            'Richmond, virginia': 'VA',
+            'Kansas City, MO': 'MO',
+            '123 Texas Ave, Houston': '',
+            'Somewhere': '',
+            '': '',
+        }
+        for address, state in cases.items():
+            with self.subTest(address=address):
+                self.assertEqual(address_state(address), state)
+
+
+class StateSelectionTests(SimpleTestCase):
+    def order(self, states, origin='', destination=''):
+        permit = PermitRequest(origin_address=origin, destination_address=destination)
+        return [row.state for row in in_route_order(permit, [StateRow(state) for state in states])]
+
+    def test_submitted_route_is_kept(self):
+        self.assertEqual(self.order(['IL', 'MO', 'OK', 'TX']), ['IL', 'MO', 'OK', 'TX'])
+        self.assertEqual(self.order(['TX', 'OK', 'MO', 'IL']), ['TX', 'OK', 'MO', 'IL'])
+        self.assertEqual(self.order(['IL', 'MO', 'OK', 'TX'], 'Dallas, TX'), ['IL', 'MO', 'OK', 'TX'])
+        self.assertEqual(self.order(['IL', 'MO', 'OK', 'TX'], 'Chicago, IL', 'Dallas, TX'), ['IL', 'MO', 'OK', 'TX'])
+
+    def test_route_against_known_endpoints_is_reversed(self):
+        self.assertEqual(self.order(['IL', 'MO', 'OK', 'TX'], 'Dallas, TX', 'Chicago, IL'), ['TX', 'OK', 'MO', 'IL'])
+
+    def test_unordered_selection_is_sorted(self):
+        self.assertEqual(self.order(['TX', 'IL', 'MO', 'OK'], 'Chicago, Illinois', 'Dallas, Texas'),
+                         ['IL', 'MO', 'OK', 'TX'])
+        self.assertIn(self.order(['MO', 'TX', 'OK']), (['MO', 'OK', 'TX'], ['TX', 'OK', 'MO']))
+
+    def test_selection_without_a_route_is_unchanged(self):
+        self.assertEqual(self.order(['TX', 'IL', 'OK']), ['TX', 'IL', 'OK'])
+
+    def test_unknown_codes_are_dropped(self):
+        data = QueryDict(mutable=True)
+        data.setlist('selected_states[]', ['IL', 'XX', '', 'tx', 'IL', 'TX'])
+        data['state_route_TX'] = 'I-35'
+        rows = states_from_post(data)
+        self.assertEqual([row.state for row in rows], ['IL', 'TX'])
+        self.assertEqual(rows[1].route, 'I-35')
+
+        rows = states_from_json([{'state': 'IL'}, {'state': 'XX'}, 'TX', {'state': 'TX', 'travel_date': 'bad'}])
+        self.assertEqual([(row.state, row.travel_date) for row in rows], [('IL', None), ('TX', None)])
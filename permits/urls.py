@@ -6,11 +6,19 @@ app_name = 'permits'
 urlpatterns = [
     path('', views.permit_list, name='list'),
     path('new/', views.permit_create, name='create'),
+    path('autosave/', views.permit_autosave, name='autosave_new'),
     path('<int:permit_id>/', views.permit_detail, name='detail'),
+    path('<int:permit_id>/autosave/', views.permit_autosave, name='autosave'),
     path('<int:permit_id>/edit/', views.permit_edit, name='edit'),
     path('<int:permit_id>/copy/', views.permit_copy, name='copy'),
+    path('<int:permit_id>/repeat/', views.permit_repeat, name='repeat'),
     path('<int:permit_id>/delete/', views.permit_delete, name='delete'),
+    path('templates/', views.template_list, name='templates'),
+    path('templates/<int:template_id>/delete/', views.template_delete, name='template_delete'),
+    path('templates/<int:template_id>/create/', views.template_create_permit, name='template_create_permit'),
+    path('<int:permit_id>/save-template/', views.template_save, name='template_save'),
     path('document/<int:document_id>/download/', views.permit_document_download, name='document_download'),
+    path('document/<int:document_id>/<str:rendition>/', views.permit_document_preview, name='document_preview'),
     path('dimensions-map/', views.dimensions_map, name='dimensions_map'),
 ]
 
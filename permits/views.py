@@ -1,17 +1,116 @@
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, FileResponse
+from django.http import JsonResponse, FileResponse, Http404
+from django.views.decorators.http import require_POST
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from django.core.mail import EmailMessage
 from django.core.paginator import Paginator
+from django.core.exceptions import ValidationError
 
-from .models import PermitRequest, PermitState, PermitDocument, PermitComment
+from .models import PermitRequest, PermitState, PermitDocument, PermitComment, PermitStatusChange, PermitTemplate
 from .forms import (
     PermitRequestForm, PermitStateFormSet, PermitDocumentForm,
-    PermitStatusForm, EmailForm
+    PermitStatusForm, EmailForm, RecurringPermitForm
 )
+from .autosave import autosave, autosave_new, clean_changes
+from .concurrency import StaleVersion, baseline, changed_fields, posted_baseline, posted_version, save_merged, snapshot
+from .cloning import clone_permit
+from .idempotency import idempotent
+from .presets import create_from_template, save_template, template_permit, template_states
+from .conflicts import describe, find_conflicts
+from .fingerprints import find_duplicates
+from .history import record
+from .routing import check_permit_route
+from .state_sync import in_route_order, states_from_post, sync_states
+from .state_rules import get_rules, state_legs
+
+# What permit_edit compares against the page's baseline; the baseline is in
+# the customer's page source, so nothing internal belongs here
+EDIT_FIELDS = [*PermitRequestForm.Meta.fields, 'status', 'submitted_at']
+
+
+def _warn_about_states(request, permit):
+    """Flag route gaps, equipment double-bookings and duplicates after the states were saved."""
+    route = check_permit_route(permit)
+    if permit.states_list and not route.contiguous:
+        text = 'The selected states do not form a continuous route.'
+        if route.suggested:
+            text += f' Suggested route: {" → ".join(route.suggested)}.'
+        messages.warning(request, text)
+    for conflict in describe(find_conflicts(permit)):
+        messages.warning(request, f'Scheduling conflict: {conflict}')
+    for duplicate in find_duplicates(permit):
+        if duplicate.exact:
+            messages.warning(
+                request,
+                f'This looks like a duplicate of permit #{duplicate.permit.permit_number} '
+                f'({duplicate.permit.get_status_display()}, created {duplicate.permit.created_at:%m/%d/%Y}).'
+            )
+
+
+def _form_extras(permit=None, states=None):
+    """Initial values for the form inputs that are not rendered by PermitRequestForm."""
+    if states is None:
+        states = list(permit.states.values('state', 'travel_date', 'route', 'comments')) if permit and permit.pk else []
+    axle_rows = [
+        (i, getattr(permit, f'axle_weight_{i}', 0) or '', getattr(permit, f'tires_per_axle_{i}', 0) or '')
+        for i in range(1, 10)
+    ]
+    spacing_rows = []
+    for i in range(1, 9):
+        total = int(getattr(permit, f'spacing_{i}_{i + 1}', 0) or 0)
+        spacing_rows.append((i, i + 1, total // 12 if total else '', total % 12 if total else ''))
+    return {
+        'axle_rows': axle_rows,
+        'spacing_rows': spacing_rows,
+        'gross_weight': getattr(permit, 'gross_weight', 0) or '',
+        'initial_states': states,
+    }
+
+
+def _apply_axle_inputs(permit, data):
+    """Copy the raw axle, spacing and kingpin inputs of the permit form onto ``permit``."""
+    # Handle axle weights from raw POST data (must be before save)
+    for i in range(1, 10):
+        weight_val = data.get(f'axle_weight_{i}', '') or 0
+        setattr(permit, f'axle_weight_{i}', int(weight_val) if weight_val else 0)
+        
+        tires_val = data.get(f'tires_per_axle_{i}', '') or 0
+        setattr(permit, f'tires_per_axle_{i}', int(tires_val) if tires_val else 0)
+
+    # Handle spacings (ft/in from form, convert to total inches for storage)
+    for spacing in ['1_2', '2_3', '3_4', '4_5', '5_6', '6_7', '7_8', '8_9']:
+        ft_val = int(data.get(f'spacing_{spacing}_ft', 0) or 0)
+        in_val = int(data.get(f'spacing_{spacing}_in', 0) or 0)
+        total_inches = (ft_val * 12) + in_val
+        setattr(permit, f'spacing_{spacing}', total_inches)
+
+    # Handle kingpin to rear axle
+    permit.kingpin_to_rear_ft = int(data.get('kingpin_to_rear_ft', 0) or 0)
+    permit.kingpin_to_rear_in = int(data.get('kingpin_to_rear_in', 0) or 0)
+
+
+def _notify_new_permit(request, permit):
+    """Assign a newly submitted permit and let the office know about it."""
+    from dashboard.assignment import auto_assign
+    from dashboard.models import Notification
+    
+    message = f'New permit submitted by {request.user.get_full_name() or request.user.username}. Load: {permit.load_description}. Route: {permit.origin_address} → {permit.destination_address}'
+    assignee = auto_assign(permit)
+    if assignee is not None:
+        message += f'. Assigned to {assignee.name}.'
+    Notification.objects.create(
+        notification_type=Notification.NotificationType.NEW_PERMIT,
+        title=f'New Permit from {permit.company.name}',
+        message=message,
+        permit=permit
+    )
 
 
 @login_required
@@ -65,6 +164,7 @@ def permit_list(request):
 
 
 @login_required
+@idempotent
 def permit_create(request):
     """Create a new permit request."""
     
@@ -79,6 +179,14 @@ def permit_create(request):
     combinations = EquipmentCombination.objects.filter(company=company)
     default_combination = combinations.filter(is_default=True).first()
     
+    # Start from a saved template (?template=<id>)
+    preset = None
+    template_id = request.GET.get('template', '')
+    if template_id:
+        if not template_id.isdigit():
+            raise Http404('No such template.')
+        preset = get_object_or_404(PermitTemplate, pk=template_id, company=company)
+    
     if request.method == 'POST':
         form = PermitRequestForm(request.POST, company=company)
         print("Form errors:", form.errors)
@@ -88,24 +196,7 @@ def permit_create(request):
             permit.company = company
             permit.submitted_by = request.user
             
-            # Handle axle weights from raw POST data (must be before save)
-            for i in range(1, 10):
-                weight_val = request.POST.get(f'axle_weight_{i}', '') or 0
-                setattr(permit, f'axle_weight_{i}', int(weight_val) if weight_val else 0)
-                
-                tires_val = request.POST.get(f'tires_per_axle_{i}', '') or 0
-                setattr(permit, f'tires_per_axle_{i}', int(tires_val) if tires_val else 0)
-
-            # Handle spacings (ft/in from form, convert to total inches for storage)
-            for spacing in ['1_2', '2_3', '3_4', '4_5', '5_6', '6_7', '7_8', '8_9']:
-                ft_val = int(request.POST.get(f'spacing_{spacing}_ft', 0) or 0)
-                in_val = int(request.POST.get(f'spacing_{spacing}_in', 0) or 0)
-                total_inches = (ft_val * 12) + in_val
-                setattr(permit, f'spacing_{spacing}', total_inches)
-
-            # Handle kingpin to rear axle
-            permit.kingpin_to_rear_ft = int(request.POST.get('kingpin_to_rear_ft', 0) or 0)
-            permit.kingpin_to_rear_in = int(request.POST.get('kingpin_to_rear_in', 0) or 0)
+            _apply_axle_inputs(permit, request.POST)
             
             # Set status based on which button was clicked
             if 'draft' in request.POST:
@@ -114,40 +205,28 @@ def permit_create(request):
                 permit.status = PermitRequest.Status.PENDING
                 permit.submitted_at = timezone.now()
             
-            permit.save()
+            with transaction.atomic():
+                permit.save()
+                if permit.status == PermitRequest.Status.PENDING:
+                    record(permit, '', request.user, PermitStatusChange.Source.SUBMIT)
             
             # Handle state selections
-            selected_states = request.POST.getlist('selected_states[]')
-            for index, state_code in enumerate(selected_states):
-                if state_code:
-                    date_key = f'state_date_{state_code}'
-                    route_key = f'state_route_{state_code}'
-                    comments_key = f'state_comments_{state_code}'
-                    
-                    PermitState.objects.create(
-                        permit=permit,
-                        state=state_code,
-                        order=index,  # ADD THIS LINE
-                        travel_date=request.POST.get(date_key) or None,
-                        route=request.POST.get(route_key, ''),
-                        comments=request.POST.get(comments_key, '')
-                    )
+            rows = in_route_order(permit, states_from_post(request.POST))
+            permit.refresh_from_states(sync_states(permit, rows))
+            _warn_about_states(request, permit)
             
             # Send notification (after save, only for submitted permits)
             if 'draft' not in request.POST:
                 # Create notification for admins
-                from dashboard.models import Notification
-                Notification.objects.create(
-                    notification_type=Notification.NotificationType.NEW_PERMIT,
-                    title=f'New Permit from {company.name}',
-                    message=f'New permit submitted by {request.user.get_full_name() or request.user.username}. Load: {permit.load_description}. Route: {permit.origin_address} → {permit.destination_address}',
-                    permit=permit
-                )
+                _notify_new_permit(request, permit)
                 messages.success(request, 'Permit request submitted successfully!')
             else:
                 messages.success(request, 'Permit saved as draft.')
             
             return redirect('dashboard:customer_dashboard')
+    elif preset:
+        permit = template_permit(preset)
+        form = PermitRequestForm(company=company, instance=permit)
     else:
         # Pre-populate with default combination if it exists
         initial = {}
@@ -161,6 +240,11 @@ def permit_create(request):
     
     state_choices = PermitState.US_STATES
     
+    if preset and request.method != 'POST':
+        extras = _form_extras(permit, [vars(row) for row in template_states(preset)])
+    else:
+        extras = _form_extras()
+    
     return render(request, 'permits/form.html', {
         'form': form,
         'company': company,
@@ -168,10 +252,14 @@ def permit_create(request):
         'title': 'New Permit Request',
         'combinations': combinations,
         'default_combination': default_combination,
+        'permit_templates': PermitTemplate.objects.filter(company=company),
+        'preset': preset,
+        **extras,
     })
 
 
 @login_required
+@idempotent
 def permit_edit(request, permit_id):
     """Edit a permit request."""
     
@@ -191,35 +279,48 @@ def permit_edit(request, permit_id):
         return redirect('permits:detail', permit_id=permit.id)
     
     company = request.user.company
+    conflicts = []
+    extras = None
+    shown = baseline(permit, EDIT_FIELDS)
     
     if request.method == 'POST':
+        original = posted_baseline(request) or snapshot(permit, EDIT_FIELDS)
+        version = posted_version(request, permit)
+        shown = json.dumps(original)
         form = PermitRequestForm(request.POST, instance=permit, company=company)
         
         if form.is_valid():
             permit = form.save(commit=False)
+            _apply_axle_inputs(permit, request.POST)
             
-            if 'submit' in request.POST and permit.status == PermitRequest.Status.DRAFT:
+            submitted = 'submit' in request.POST and permit.status == PermitRequest.Status.DRAFT
+            if submitted:
                 permit.status = PermitRequest.Status.PENDING
                 permit.submitted_at = timezone.now()
             
-            permit.save()
-            
-            # Update states
-            permit.states.all().delete()
-            states_data = request.POST.getlist('selected_states[]')
-            for state_code in states_data:
-                if state_code:
-                    PermitState.objects.create(
-                        permit=permit,
-                        state=state_code,
-                        order=index,
-                        travel_date=request.POST.get(f'state_date_{state_code}') or None,
-                        route=request.POST.get(f'state_route_{state_code}', ''),
-                        comments=request.POST.get(f'state_comments_{state_code}', ''),
-                    )
+            def log_submission():
+                if submitted:
+                    record(permit, PermitRequest.Status.DRAFT, request.user, PermitStatusChange.Source.SUBMIT)
             
-            messages.success(request, 'Permit updated successfully.')
-            return redirect('permits:detail', permit_id=permit.id)
+            # Only the changed columns are written, and only if nobody saved in between
+            conflicts = save_merged(
+                permit, changed_fields(permit, original, EDIT_FIELDS), version, original, log_submission,
+            )
+            if conflicts:
+                shown = baseline(PermitRequest.objects.get(pk=permit.pk), EDIT_FIELDS)
+                extras = _form_extras(permit, [vars(row) for row in states_from_post(request.POST)])
+                messages.warning(request, 'This permit was changed by someone else while you were editing it. '
+                                          'Review the differences below and save again.')
+            else:
+                # Update states
+                rows = in_route_order(permit, states_from_post(request.POST))
+                permit.refresh_from_states(sync_states(permit, rows))
+                _warn_about_states(request, permit)
+                if submitted:
+                    _notify_new_permit(request, permit)
+                
+                messages.success(request, 'Permit updated successfully.')
+                return redirect('permits:detail', permit_id=permit.id)
     else:
         form = PermitRequestForm(instance=permit, company=company)
     
@@ -228,11 +329,60 @@ def permit_edit(request, permit_id):
         'permit': permit,
         'company': company,
         'title': f'Edit Permit #{permit.permit_number}',
-        'existing_states': list(permit.states.values('state', 'travel_date', 'route', 'comments')),
         'state_choices': PermitState.US_STATES,
+        'conflicts': conflicts,
+        'baseline': shown,
+        **(extras or _form_extras(permit)),
     })
 
 
+@login_required
+@require_POST
+def permit_autosave(request, permit_id=None):
+    """Save changed draft fields from the permit form (JSON in, JSON out).
+    
+    Without ``permit_id`` the first autosave of a new permit creates the draft.
+    """
+    
+    if not request.user.is_customer or not request.user.company:
+        return JsonResponse({'error': 'Access denied.'}, status=403)
+    
+    try:
+        payload = json.loads(request.body)
+        data = payload.get('fields') or {}
+        states = payload.get('states')
+        version = int(payload.get('version') or 0)
+        if not isinstance(data, dict) or not (states is None or isinstance(states, list)):
+            raise ValueError
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'error': 'Invalid JSON.'}, status=400)
+    
+    try:
+        changes = clean_changes(data, request.user.company)
+    except ValidationError as e:
+        return JsonResponse({'errors': e.message_dict}, status=400)
+    
+    if permit_id is None:
+        permit = autosave_new(request.user.company, request.user, changes, states)
+        return JsonResponse({
+            'id': permit.id,
+            'version': permit.version,
+            'edit_url': reverse('permits:edit', args=[permit.id]),
+            'autosave_url': reverse('permits:autosave', args=[permit.id]),
+        }, status=201)
+    
+    try:
+        version = autosave(permit_id, request.user.company, version, changes, states)
+    except PermitRequest.DoesNotExist:
+        return JsonResponse({'error': 'This permit can no longer be edited.'}, status=404)
+    except StaleVersion as e:
+        return JsonResponse({
+            'error': 'This permit was changed in another window. Reload to see the latest version.',
+            'version': e.version,
+        }, status=409)
+    return JsonResponse({'id': permit_id, 'version': version})
+
+
 @login_required
 def permit_detail(request, permit_id):
     """View permit details."""
@@ -252,10 +402,14 @@ def permit_detail(request, permit_id):
         'permit': permit,
         'documents': documents,
         'comments': comments,
+        'state_legs': state_legs(permit),
+        'rules_version': get_rules().version,
     })
 
 
 @login_required
+@require_POST
+@idempotent
 def permit_copy(request, permit_id):
     """Copy an existing permit to create a new one."""
     
@@ -269,43 +423,122 @@ def permit_copy(request, permit_id):
         company=request.user.company
     )
     
-    # Create a copy
-    new_permit = PermitRequest.objects.create(
-        company=original.company,
-        submitted_by=request.user,
-        load_description=original.load_description,
-        origin_address=original.origin_address,
-        destination_address=original.destination_address,
-        driver=original.driver,
-        truck=original.truck,
-        trailer=original.trailer,
-        overall_length_ft=original.overall_length_ft,
-        overall_length_in=original.overall_length_in,
-        overall_width_ft=original.overall_width_ft,
-        overall_width_in=original.overall_width_in,
-        overall_height_ft=original.overall_height_ft,
-        overall_height_in=original.overall_height_in,
-        gross_weight=original.gross_weight,
-        axle_configuration=original.axle_configuration,
-        num_axles=original.num_axles,
-        is_legal_weight=original.is_legal_weight,
-        payment_method=original.payment_method,
-        status=PermitRequest.Status.DRAFT,
-    )
-    
-    # Copy states
-    for state in original.states.all():
-        PermitState.objects.create(
-            permit=new_permit,
-            state=state.state,
-            route=state.route,
-            comments=state.comments,
-        )
+    new_permit = clone_permit(original, request.user)[0]
     
     messages.success(request, f'Permit copied. New permit #{new_permit.permit_number} created as draft.')
     return redirect('permits:edit', permit_id=new_permit.id)
 
 
+@login_required
+@idempotent
+def permit_repeat(request, permit_id):
+    """Schedule copies of a permit on a recurring lane."""
+    
+    if not request.user.is_customer or not request.user.company:
+        messages.error(request, 'Access denied.')
+        return redirect('dashboard:index')
+    
+    original = get_object_or_404(
+        PermitRequest,
+        pk=permit_id,
+        company=request.user.company
+    )
+    
+    if request.method == 'POST':
+        form = RecurringPermitForm(request.POST)
+        if form.is_valid():
+            permits = clone_permit(original, request.user, **form.cleaned_data)
+            messages.success(
+                request,
+                f'{len(permits)} draft permits created '
+                f'(#{permits[0].permit_number} - #{permits[-1].permit_number}).'
+            )
+            return redirect('permits:list')
+    else:
+        form = RecurringPermitForm()
+    
+    return render(request, 'permits/repeat.html', {
+        'form': form,
+        'permit': original,
+    })
+
+
+@login_required
+def template_list(request):
+    """Saved permit templates of the customer's company."""
+    
+    if not request.user.is_customer or not request.user.company:
+        messages.error(request, 'Access denied.')
+        return redirect('dashboard:index')
+    
+    return render(request, 'permits/template_list.html', {
+        'templates': PermitTemplate.objects.filter(company=request.user.company).select_related('created_by'),
+    })
+
+
+@login_required
+@require_POST
+def template_save(request, permit_id):
+    """Save a permit as a company template."""
+    
+    if not request.user.is_customer or not request.user.company:
+        messages.error(request, 'Access denied.')
+        return redirect('dashboard:index')
+    
+    permit = get_object_or_404(
+        PermitRequest,
+        pk=permit_id,
+        company=request.user.company
+    )
+    name = request.POST.get('name', '').strip()[:100]
+    if not name:
+        messages.error(request, 'Please enter a template name.')
+        return redirect('permits:detail', permit_id=permit.id)
+    
+    save_template(permit, name, request.user)
+    messages.success(request, f'Saved template "{name}".')
+    return redirect('permits:templates')
+
+
+@login_required
+@require_POST
+def template_delete(request, template_id):
+    """Delete a company template."""
+    
+    if not request.user.is_customer or not request.user.company:
+        messages.error(request, 'Access denied.')
+        return redirect('dashboard:index')
+    
+    template = get_object_or_404(PermitTemplate, pk=template_id, company=request.user.company)
+    template.delete()
+    messages.success(request, f'Template "{template.name}" deleted.')
+    return redirect('permits:templates')
+
+
+@login_required
+@require_POST
+@idempotent
+def template_create_permit(request, template_id):
+    """API: create a permit from a template in one POST (``submit=1`` to submit it)."""
+    
+    if not request.user.is_customer or not request.user.company:
+        return JsonResponse({'error': 'Access denied.'}, status=403)
+    
+    template = get_object_or_404(PermitTemplate, pk=template_id, company=request.user.company)
+    submit = request.POST.get('submit') in ('1', 'true', 'on')
+    permit = create_from_template(template, request.user, submit=submit)
+    if submit:
+        _notify_new_permit(request, permit)
+    
+    return JsonResponse({
+        'id': permit.id,
+        'permit_number': permit.permit_number,
+        'status': permit.status,
+        'states': permit.states_list,
+        'url': reverse('permits:detail', args=[permit.id]),
+    }, status=201)
+
+
 @login_required
 def permit_delete(request, permit_id):
     """Delete a permit request."""
@@ -350,6 +583,26 @@ def permit_document_download(request, document_id):
         filename=document.filename
     )
 
+
+@login_required
+def permit_document_preview(request, document_id, rendition):
+    """Serve the preview or thumbnail of an image document."""
+    
+    document = get_object_or_404(PermitDocument, pk=document_id)
+    
+    # Check access
+    if request.user.is_customer and request.user.company != document.permit.company:
+        messages.error(request, 'Access denied.')
+        return redirect('dashboard:index')
+    
+    image = getattr(document, rendition) if rendition in ('preview', 'thumbnail') else None
+    if not image:
+        raise Http404('Preview not available yet.')
+    
+    response = FileResponse(image.open('rb'), content_type='image/jpeg')
+    response['Cache-Control'] = 'private, max-age=86400'
+    return response
+
 @login_required
 def dimensions_map(request):
     return render(request, 'permits/dimensions_map.html')
\ No newline at end of file